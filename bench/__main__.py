@@ -0,0 +1,88 @@
+import argparse, json, os, sys
+
+from bench.corpus import CorpusOptions, write_corpus, write_static
+from bench.suite import compare_results, run_suite
+
+
+
+DEFAULT_OUTPUT = os.path.join(".build", "bench", "latest.json")
+
+
+def add_corpus_arguments(parser):
+    defaults = CorpusOptions()
+    parser.add_argument("--pages", type=int, default=defaults.pages)
+    parser.add_argument("--paragraphs", type=int, default=defaults.paragraphs)
+    parser.add_argument("--inline-density", type=int, default=defaults.inline_density)
+    parser.add_argument("--lists", type=int, default=defaults.lists)
+    parser.add_argument("--code-blocks", type=int, default=defaults.code_blocks)
+    parser.add_argument("--images", type=int, default=defaults.images)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def corpus_options(args):
+    return CorpusOptions(args.pages, args.paragraphs, args.inline_density, args.lists, args.code_blocks, args.images, args.seed)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench", description="Performance benchmarks for the site generator")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run the benchmark suite and write results as JSON")
+    add_corpus_arguments(run)
+    run.add_argument("--repeat", type=int, default=5)
+    run.add_argument("--jobs", type=int, default=1, help="--jobs value for the full generate_pages_recursive benchmark")
+    run.add_argument("--only", nargs="+", help="run only these benchmarks")
+    run.add_argument("--output", default=DEFAULT_OUTPUT, help=f'results file (default: {DEFAULT_OUTPUT})')
+
+    compare = commands.add_parser("compare", help="compare results against a stored baseline")
+    compare.add_argument("baseline")
+    compare.add_argument("current", nargs="?", default=DEFAULT_OUTPUT)
+    compare.add_argument("--threshold", type=float, default=0.10, help="relative slowdown reported as a regression (default: 0.10)")
+    compare.add_argument("--metric", choices=("min", "median", "mean"), default="min")
+
+    corpus = commands.add_parser("corpus", help="write a synthetic content/ and static/ tree to a directory")
+    corpus.add_argument("directory")
+    add_corpus_arguments(corpus)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.command == "run":
+        results = run_suite(corpus_options(args), args.repeat, args.jobs, args.only)
+        for name, result in results["benchmarks"].items():
+            print(f'{name:<26} min {result["min"] * 1e3:10.2f} ms  median {result["median"] * 1e3:10.2f} ms')
+        directory = os.path.dirname(args.output)
+        if directory != "":
+            os.makedirs(directory, exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f'Wrote {args.output}')
+        return 0
+
+    if args.command == "compare":
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        if baseline.get("corpus") != current.get("corpus"):
+            print("warning: baseline and current results were produced from different corpus options")
+        regressions = 0
+        for name, before, after, change, regressed in compare_results(baseline, current, args.threshold, args.metric):
+            if before is None:
+                print(f'{name:<26} {"new":>10}  {after * 1e3:10.2f} ms')
+                continue
+            flag = "  REGRESSION" if regressed else ""
+            print(f'{name:<26} {before * 1e3:10.2f} ms -> {after * 1e3:10.2f} ms  {change:+7.1%}{flag}')
+            regressions += regressed
+        return 1 if regressions else 0
+
+    write_corpus(os.path.join(args.directory, "content"), corpus_options(args))
+    write_static(os.path.join(args.directory, "static"))
+    print(f'Wrote {args.pages} pages to {args.directory}')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,37 @@
+import argparse, random, timeit
+
+from bench.corpus import make_paragraph
+from inline_markdown import split_nodes_delimiter, split_nodes_image, split_nodes_link, text_to_textnodes
+from textnode import TextNode, TextType
+
+
+
+def five_pass_textnodes(text):
+    # The previous pipeline, kept here as the comparison baseline
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    nodes = split_nodes_image(nodes)
+    nodes = split_nodes_link(nodes)
+    return nodes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the single-pass inline tokenizer with the five-pass pipeline")
+    parser.add_argument("--spans", type=int, nargs="+", default=[10, 100, 500, 2000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for spans in args.spans:
+        text = make_paragraph(random.Random(0), spans, words_between=4)
+        if five_pass_textnodes(text) != text_to_textnodes(text):
+            raise SystemExit(f'Output mismatch at {spans} spans')
+        number = max(1, 2000 // spans)
+        old = min(timeit.repeat(lambda: five_pass_textnodes(text), number=number, repeat=args.repeat)) / number
+        new = min(timeit.repeat(lambda: text_to_textnodes(text), number=number, repeat=args.repeat)) / number
+        print(f'spans={spans:<5} five-pass {old * 1e3:8.3f} ms  single-pass {new * 1e3:8.3f} ms  x{old / new:.2f}')
+
+
+if __name__ == "__main__":
+    main()
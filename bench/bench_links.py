@@ -0,0 +1,45 @@
+import argparse, os, random, time
+
+from link_check import LinkChecker
+from page import Page
+
+
+
+def make_site(rng, pages, links_per_page, broken_fraction):
+    outputs = [os.path.join("docs", "section", f'page{i}', "index.html") for i in range(pages)]
+    index = {f'/section/page{i}' for i in range(pages)}
+    index.update(f'/images/img{i}.png' for i in range(pages))
+    summaries = []
+    for i in range(pages):
+        links = []
+        for line in range(links_per_page):
+            target = rng.randrange(pages)
+            if rng.random() < broken_fraction:
+                links.append((f'/section/missing{target}', line + 1))
+            elif line % 3 == 0:
+                links.append((f'../page{target}/', line + 1))
+            else:
+                links.append((f'/section/page{target}#top', line + 1))
+        images = [(f'/images/img{i}.png', links_per_page + 1)]
+        summaries.append(Page(None, f'Page {i}', {}, [], 0, links, images, 1))
+    return outputs, index, summaries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of the link checker against a precomputed URL index")
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--links-per-page", type=int, default=50)
+    parser.add_argument("--broken", type=float, default=0.01, help="fraction of links pointing nowhere")
+    args = parser.parse_args()
+
+    outputs, index, summaries = make_site(random.Random(0), args.pages, args.links_per_page, args.broken)
+    checker = LinkChecker(index, "docs")
+    start = time.perf_counter()
+    for src, dest, page in zip(outputs, outputs, summaries):
+        checker.check_page(src, dest, page)
+    seconds = time.perf_counter() - start
+    print(f'{checker.checked} links checked in {seconds * 1e3:.1f} ms ({checker.checked / seconds / 1e6:.2f} M links/s), {len(checker.broken)} broken')
+
+
+if __name__ == "__main__":
+    main()
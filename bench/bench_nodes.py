@@ -0,0 +1,65 @@
+import argparse, random, timeit, tracemalloc
+
+from bench.corpus import CorpusOptions, make_page
+from block_markdown import markdown_to_html_node
+from htmlnode import LeafNode, ParentNode
+from textnode import TextNode, TextType
+
+
+
+# Dict-backed stand-ins: a subclass without __slots__ gets a per-instance __dict__ again,
+# which is what every node carried before the node classes were slotted.
+class DictLeafNode(LeafNode):
+    pass
+
+
+class DictParentNode(ParentNode):
+    pass
+
+
+class DictTextNode(TextNode):
+    pass
+
+
+def build_tree(leaf_cls, parent_cls, text_cls, paragraphs, spans):
+    children = []
+    for _ in range(paragraphs):
+        leaves = []
+        for i in range(spans):
+            text_node = text_cls(f'word {i}', TextType.BOLD)
+            leaves.append(leaf_cls("b", text_node.text))
+        children.append(parent_cls("p", leaves))
+    return parent_cls("div", children)
+
+
+def peak_bytes(func):
+    tracemalloc.start()
+    try:
+        result = func()
+        return tracemalloc.get_traced_memory()[1], result
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory and throughput of slotted node classes on large documents")
+    parser.add_argument("--paragraphs", type=int, default=2000)
+    parser.add_argument("--spans", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    nodes = args.paragraphs * (args.spans + 1) + 1
+    for label, classes in (("dict", (DictLeafNode, DictParentNode, DictTextNode)), ("slots", (LeafNode, ParentNode, TextNode))):
+        build = lambda: build_tree(*classes, args.paragraphs, args.spans)
+        peak, _ = peak_bytes(build)
+        seconds = min(timeit.repeat(build, number=1, repeat=args.repeat))
+        print(f'{label:<6} {nodes} nodes  peak {peak / 1e6:8.2f} MB ({peak / nodes:6.1f} B/node)  build {seconds * 1e3:8.2f} ms')
+
+    page = make_page(random.Random(0), 0, CorpusOptions(paragraphs=args.paragraphs, inline_density=args.spans // 4))
+    peak, node = peak_bytes(lambda: markdown_to_html_node(page))
+    seconds = min(timeit.repeat(lambda: markdown_to_html_node(page), number=1, repeat=args.repeat))
+    print(f'markdown_to_html_node on a {len(page) / 1e6:.1f} MB page: peak {peak / 1e6:.2f} MB, {seconds * 1e3:.2f} ms')
+
+
+if __name__ == "__main__":
+    main()
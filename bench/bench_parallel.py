@@ -0,0 +1,30 @@
+import argparse, os, shutil, tempfile, time
+
+from bench.corpus import CorpusOptions, write_corpus
+from bench.suite import TEMPLATE_PATH
+from page_generator import generate_pages_recursive
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure page rendering throughput for several --jobs values")
+    parser.add_argument("--pages", type=int, default=5000)
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        content = os.path.join(root, "content")
+        write_corpus(content, CorpusOptions(pages=args.pages))
+
+        baseline = None
+        for jobs in args.jobs:
+            dest = os.path.join(root, "docs")
+            shutil.rmtree(dest, ignore_errors=True)
+            start = time.perf_counter()
+            generate_pages_recursive(content, TEMPLATE_PATH, dest, "/", jobs=jobs)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f'jobs={jobs:<3} {elapsed:8.3f}s  {args.pages / elapsed:9.1f} pages/s  speedup x{baseline / elapsed:.2f}')
+
+
+if __name__ == "__main__":
+    main()
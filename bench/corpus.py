@@ -0,0 +1,84 @@
+import os, random
+
+
+
+WORDS = (
+    "middle earth ring fellowship hobbit wizard mountain river forest shadow light song road "
+    "elf dwarf king tower valley journey council sword star lore ancient quest shire"
+).split()
+
+SPANS = (
+    lambda rng: f'**{rng.choice(WORDS)} {rng.choice(WORDS)}**',
+    lambda rng: f'_{rng.choice(WORDS)}_',
+    lambda rng: f'`{rng.choice(WORDS)}()`',
+    lambda rng: f'[{rng.choice(WORDS)}](/blog/post-{rng.randrange(1000):05d})',
+    lambda rng: f'![{rng.choice(WORDS)}](/images/image-{rng.randrange(8)}.png)',
+)
+
+
+class CorpusOptions:
+    def __init__(self, pages=100, paragraphs=20, inline_density=4, lists=2, code_blocks=1, images=1, seed=0):
+        self.pages = pages # number of content/blog/*/index.md pages
+        self.paragraphs = paragraphs # paragraphs per page
+        self.inline_density = inline_density # inline spans (bold, links, ...) per paragraph
+        self.lists = lists # ordered + unordered lists per page
+        self.code_blocks = code_blocks # fenced code blocks per page
+        self.images = images # standalone images per page
+        self.seed = seed
+
+    def to_dict(self):
+        return dict(vars(self))
+
+
+def make_paragraph(rng, inline_density, words_between=8):
+    parts = []
+    for _ in range(inline_density):
+        parts.append(" ".join(rng.choice(WORDS) for _ in range(words_between)))
+        parts.append(rng.choice(SPANS)(rng))
+    parts.append(" ".join(rng.choice(WORDS) for _ in range(words_between)) + ".")
+    return " ".join(parts)
+
+
+def make_page(rng, index, options):
+    blocks = [f'# Post {index}: {rng.choice(WORDS).title()} and the {rng.choice(WORDS).title()}', "[< Back Home](/)"]
+    for _ in range(options.images):
+        blocks.append(f'![{rng.choice(WORDS)}](/images/image-{rng.randrange(8)}.png)')
+    blocks.append(f'> {make_paragraph(rng, 1)}')
+
+    sections = max(1, options.lists + options.code_blocks)
+    per_section = max(1, options.paragraphs // sections)
+    for section in range(sections):
+        blocks.append(f'## Section {section + 1}')
+        for _ in range(per_section):
+            blocks.append(make_paragraph(rng, options.inline_density))
+        if section < options.lists:
+            if section % 2 == 0:
+                blocks.append("\n".join(f'- {make_paragraph(rng, 1, 3)}' for _ in range(rng.randint(3, 6))))
+            else:
+                blocks.append("\n".join(f'{i}. {make_paragraph(rng, 1, 3)}' for i in range(1, rng.randint(3, 6) + 1)))
+        elif section - options.lists < options.code_blocks:
+            code = "\n".join(f'print("{rng.choice(WORDS)}")' for _ in range(rng.randint(3, 8)))
+            blocks.append(f'```\n{code}\n```')
+    return "\n\n".join(blocks) + "\n"
+
+
+def write_corpus(root, options):
+    rng = random.Random(options.seed)
+    for index in range(options.pages):
+        page_dir = os.path.join(root, "blog", f'post-{index:05d}')
+        os.makedirs(page_dir, exist_ok=True)
+        with open(os.path.join(page_dir, "index.md"), "w") as f:
+            f.write(make_page(rng, index, options))
+    with open(os.path.join(root, "index.md"), "w") as f:
+        f.write(make_page(rng, options.pages, options))
+
+
+def write_static(root, files=8, size=256 * 1024, seed=0):
+    rng = random.Random(seed)
+    images = os.path.join(root, "images")
+    os.makedirs(images, exist_ok=True)
+    for index in range(files):
+        with open(os.path.join(images, f'image-{index}.png'), "wb") as f:
+            f.write(rng.randbytes(size))
+    with open(os.path.join(root, "index.css"), "w") as f:
+        f.write("body { margin: 0 auto; max-width: 40em; }\n")
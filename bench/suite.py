@@ -0,0 +1,103 @@
+import os, platform, random, shutil, statistics, sys, tempfile, time
+
+from bench.corpus import make_page, make_paragraph, write_corpus, write_static
+from block_markdown import markdown_to_html_node
+from copy_static import copy_src_to_dest
+from inline_markdown import text_to_textnodes
+from page_generator import generate_pages_recursive
+
+
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "template.html")
+
+
+def measure(func, repeat, setup=None):
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "repeat": repeat,
+    }
+
+
+def bench_text_to_textnodes(options, repeat):
+    rng = random.Random(options.seed)
+    paragraphs = [make_paragraph(rng, options.inline_density) for _ in range(200)]
+    return measure(lambda: [text_to_textnodes(text) for text in paragraphs], repeat)
+
+
+def bench_markdown_to_html_node(options, repeat):
+    rng = random.Random(options.seed)
+    pages = [make_page(rng, index, options) for index in range(20)]
+    return measure(lambda: [markdown_to_html_node(page) for page in pages], repeat)
+
+
+def bench_to_html(options, repeat):
+    rng = random.Random(options.seed)
+    nodes = [markdown_to_html_node(make_page(rng, index, options)) for index in range(20)]
+    return measure(lambda: [node.to_html() for node in nodes], repeat)
+
+
+def bench_generate_pages(options, repeat, workdir, jobs=1):
+    content = os.path.join(workdir, "content")
+    dest = os.path.join(workdir, "docs")
+    write_corpus(content, options)
+    return measure(
+        lambda: generate_pages_recursive(content, TEMPLATE_PATH, dest, "/", jobs=jobs),
+        repeat,
+        setup=lambda: shutil.rmtree(dest, ignore_errors=True),
+    )
+
+
+def bench_copy_static(repeat, workdir, files=32, size=256 * 1024):
+    static = os.path.join(workdir, "static")
+    dest = os.path.join(workdir, "static_out")
+    write_static(static, files, size)
+    return measure(
+        lambda: copy_src_to_dest(static, dest),
+        repeat,
+        setup=lambda: shutil.rmtree(dest, ignore_errors=True),
+    )
+
+
+def run_suite(options, repeat=5, jobs=1, only=None):
+    benchmarks = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        cases = {
+            "text_to_textnodes": lambda: bench_text_to_textnodes(options, repeat),
+            "markdown_to_html_node": lambda: bench_markdown_to_html_node(options, repeat),
+            "to_html": lambda: bench_to_html(options, repeat),
+            "generate_pages_recursive": lambda: bench_generate_pages(options, repeat, workdir, jobs),
+            "copy_src_to_dest": lambda: bench_copy_static(repeat, workdir),
+        }
+        for name, case in cases.items():
+            if only and name not in only:
+                continue
+            benchmarks[name] = case()
+    return {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "corpus": options.to_dict(),
+        "jobs": jobs,
+        "benchmarks": benchmarks,
+    }
+
+
+def compare_results(baseline, current, threshold=0.10, metric="min"):
+    rows = []
+    for name, result in current["benchmarks"].items():
+        before = baseline["benchmarks"].get(name)
+        if before is None:
+            rows.append((name, None, result[metric], None, False))
+            continue
+        change = result[metric] / before[metric] - 1 if before[metric] else 0.0
+        rows.append((name, before[metric], result[metric], change, change > threshold))
+    return rows
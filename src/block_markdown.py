@@ -5,6 +5,11 @@ from inline_markdown import text_to_textnodes
 
 
 
+HEADER_TAGS = ("h1", "h2", "h3", "h4", "h5", "h6")
+HEADER_PREFIXES = ("# ", "## ", "### ", "#### ", "##### ", "###### ")
+ORDERED_LIST_PREFIXES = ["1. "] # "n. " for n = 1, 2, ...; extended on demand by is_ordered_list
+
+
 class BlockType(Enum):
     PARAGRAPH = "paragraph"
     HEADER = "header"
@@ -14,116 +19,200 @@ class BlockType(Enum):
     ORDERED_LIST = "ordered_list"
 
 
+def iter_numbered_blocks(lines):
+    # lines is any iterable of lines (a list, an open file, ...); blocks are yielded as soon as they end,
+    # together with the 1-based number of their first line
+    block = []
+    start = 0
+    in_fence = False
+    for number, line in enumerate(lines, 1):
+        line = line.rstrip("\r\n")
+        stripped = line.strip()
+        if in_fence:
+            block.append(line)
+            if stripped == "```":
+                yield start, "\n".join(block).strip()
+                block = []
+                in_fence = False
+        elif stripped == "":
+            if block:
+                yield start, "\n".join(block).strip()
+                block = []
+        else:
+            if not block:
+                start = number
+                if stripped.startswith("```") and stripped.count("```") == 1:
+                    in_fence = True
+            block.append(line)
+    if block:
+        yield start, "\n".join(block).strip()
+
+
+def iter_blocks(lines):
+    for _, block in iter_numbered_blocks(lines):
+        yield block
+
+
 def markdown_to_blocks(markdown):
-    blocks = markdown.split("\n\n")
-    result = []
-    for block in blocks:
-        stripped = block.strip()
-        if stripped != "":
-            result.append(stripped)
-    return result
+    return list(iter_blocks(markdown.split("\n")))
 
 
-def block_to_block_type(block):
+def is_header(block):
+    return block.startswith(HEADER_PREFIXES)
+
+
+def is_code(block):
+    return block.startswith("```") and block.endswith("\n```")
+
+
+def is_quote(block):
+    # Every line starts with ">": the first by the classifier's dispatch, the rest when each newline is followed by one
+    return block.count("\n") == block.count("\n>")
+
+
+def is_unordered_list(block):
+    return block.startswith("- ") and block.count("\n") == block.count("\n- ")
+
+
+def is_ordered_list(block):
+    # Lines must be numbered 1. 2. 3. ... in order
     lines = block.split("\n")
+    while len(ORDERED_LIST_PREFIXES) < len(lines):
+        ORDERED_LIST_PREFIXES.append(f'{len(ORDERED_LIST_PREFIXES) + 1}. ')
+    return all(map(str.startswith, lines, ORDERED_LIST_PREFIXES))
+
+
+# first character of a block -> [(matches(block), block type), ...] tried in order; a block that
+# matches none of the classifiers for its first character is a paragraph
+BLOCK_CLASSIFIERS = {
+    "#": [(is_header, BlockType.HEADER)],
+    "`": [(is_code, BlockType.CODE)],
+    ">": [(is_quote, BlockType.QUOTE)],
+    "-": [(is_unordered_list, BlockType.UNORDERED_LIST)],
+    "1": [(is_ordered_list, BlockType.ORDERED_LIST)],
+}
+
 
-    if block.startswith(("# ", "## ", "### ", "#### ", "##### ", "###### ")):
-        return BlockType.HEADER
-    elif block.startswith("```") and block.endswith("\n```") and len(lines) > 1:
-        return BlockType.CODE
-    elif block.startswith(">"):
-        for line in lines:
-            if not line.startswith(">"):
-                return BlockType.PARAGRAPH
-        return BlockType.QUOTE
-    elif block.startswith("- "):
-        for line in lines:
-            if not line.startswith("- "):
-                return BlockType.PARAGRAPH
-        return BlockType.UNORDERED_LIST
-    elif block.startswith("1. "):
-        i = 1
-        for line in lines:
-            if not line.startswith(f'{i}. '):
-                return BlockType.PARAGRAPH
-            i += 1
-        return BlockType.ORDERED_LIST
-    else:
-        return BlockType.PARAGRAPH
-
-
-def text_to_children(text):
+def block_to_block_type(block):
+    for matches, block_type in BLOCK_CLASSIFIERS.get(block[:1], ()):
+        if matches(block):
+            return block_type
+    return BlockType.PARAGRAPH
+
+
+def text_to_children(text, resolve_url=None):
     text_nodes = text_to_textnodes(text)
-    html_nodes = [text_node_to_html_node(node) for node in text_nodes]
+    html_nodes = [text_node_to_html_node(node, resolve_url) for node in text_nodes]
     return html_nodes
 
 
-def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
-    nodes = []
-    for block in blocks:
-        block_type = block_to_block_type(block)
-        lines = block.split("\n")
-
-        if block_type == BlockType.PARAGRAPH:
-            text = block.replace("\n", " ")
-            children = text_to_children(text)
-            nodes.append(ParentNode("p", children))
-
-        elif block_type == BlockType.HEADER:
-            hashes = 0
-            for char in block:
-                if char == "#":
-                    hashes += 1
-                else:
-                    break
-            if hashes > 6:
-                raise ValueError("Invalid header syntax: Too many # characters")
-            children = text_to_children(block[hashes+1:])
-            nodes.append(ParentNode(f'h{hashes}', children))
-
-        elif block_type == BlockType.CODE:
-            node = TextNode(block[4:-3], TextType.TEXT)
-            child = text_node_to_html_node(node)
-            code = ParentNode("code", [child])
-            nodes.append(ParentNode("pre", [code]))
-
-        elif block_type == BlockType.QUOTE:
-            new_lines = []
-            for line in lines:
-                if not line.startswith(">"):
-                    raise ValueError("Invalid quote syntax: Each line must start with '>'")
-                else:
-                    new_lines.append(line.lstrip(">").strip())
-            text_value = " ".join(new_lines)
-            children = text_to_children(text_value)
-            nodes.append(ParentNode("blockquote", children))
-
-        elif block_type == BlockType.UNORDERED_LIST:
-            list_items = []
-            for item in lines:
-                if not item.startswith("- "):
-                    raise ValueError("Invalid unordered list syntax: Each line must start with '- '")
-                else:
-                    child = text_to_children(item[2:])
-                    list_items.append(ParentNode("li", child))
-            nodes.append(ParentNode("ul", list_items))
-
-        elif block_type == BlockType.ORDERED_LIST:
-            list_items = []
-            for item in lines:
-                sections = item.split(". ", 1)
-                if len(sections) != 2:
-                    raise ValueError("Invalid ordered list syntax: Each line must start with a number followed by '. '")
-                else:
-                    child = text_to_children(sections[1])
-                    list_items.append(ParentNode("li", child))
-            nodes.append(ParentNode("ol", list_items))
-        
+def paragraph_to_html_node(block, resolve_url):
+    text = block.replace("\n", " ")
+    children = text_to_children(text, resolve_url)
+    return ParentNode("p", children)
+
+
+def header_to_html_node(block, resolve_url):
+    hashes = 0
+    for char in block:
+        if char == "#":
+            hashes += 1
         else:
-            raise ValueError("Unknown block type")
-        
-    return ParentNode("div", nodes)
+            break
+    if hashes > 6:
+        raise ValueError("Invalid header syntax: Too many # characters")
+    children = text_to_children(block[hashes+1:], resolve_url)
+    return ParentNode(HEADER_TAGS[hashes - 1], children)
+
+
+def code_to_html_node(block, resolve_url):
+    node = TextNode(block[4:-3], TextType.TEXT)
+    child = text_node_to_html_node(node)
+    code = ParentNode("code", [child])
+    return ParentNode("pre", [code])
+
+
+def quote_to_html_node(block, resolve_url):
+    new_lines = []
+    for line in block.split("\n"):
+        if not line.startswith(">"):
+            raise ValueError("Invalid quote syntax: Each line must start with '>'")
+        else:
+            new_lines.append(line.lstrip(">").strip())
+    text_value = " ".join(new_lines)
+    children = text_to_children(text_value, resolve_url)
+    return ParentNode("blockquote", children)
+
+
+def unordered_list_to_html_node(block, resolve_url):
+    list_items = []
+    for item in block.split("\n"):
+        if not item.startswith("- "):
+            raise ValueError("Invalid unordered list syntax: Each line must start with '- '")
+        else:
+            child = text_to_children(item[2:], resolve_url)
+            list_items.append(ParentNode("li", child))
+    return ParentNode("ul", list_items)
+
+
+def ordered_list_to_html_node(block, resolve_url):
+    list_items = []
+    for item in block.split("\n"):
+        sections = item.split(". ", 1)
+        if len(sections) != 2:
+            raise ValueError("Invalid ordered list syntax: Each line must start with a number followed by '. '")
+        else:
+            child = text_to_children(sections[1], resolve_url)
+            list_items.append(ParentNode("li", child))
+    return ParentNode("ol", list_items)
+
+
+# block type -> handler(block, resolve_url) returning its HTML node
+BLOCK_HANDLERS = {
+    BlockType.PARAGRAPH: paragraph_to_html_node,
+    BlockType.HEADER: header_to_html_node,
+    BlockType.CODE: code_to_html_node,
+    BlockType.QUOTE: quote_to_html_node,
+    BlockType.UNORDERED_LIST: unordered_list_to_html_node,
+    BlockType.ORDERED_LIST: ordered_list_to_html_node,
+}
+
+CUSTOM_BLOCK_TYPES = [] # block types added by register_block_type, in registration order
+
+
+def register_block_type(block_type, first_chars, matches, handler):
+    # Adds a block type, e.g. register_block_type(Table.TABLE, "|", is_table, table_handler).
+    # matches(block) is only called for blocks starting with one of first_chars, ahead of the built-in
+    # classifiers for that character, so other blocks are classified exactly as before.
+    # Register at import time, before pages are rendered on worker processes.
+    for char in first_chars:
+        BLOCK_CLASSIFIERS.setdefault(char, []).insert(0, (matches, block_type))
+    BLOCK_HANDLERS[block_type] = handler
+    CUSTOM_BLOCK_TYPES.append(block_type)
+
+
+def block_to_html_node(block, resolve_url=None):
+    handler = BLOCK_HANDLERS.get(block_to_block_type(block))
+    if handler is None:
+        raise ValueError("Unknown block type")
+    return handler(block, resolve_url)
+
+
+def iter_block_nodes(lines, resolve_url=None):
+    for block in iter_blocks(lines):
+        yield block_to_html_node(block, resolve_url)
+
+
+def markdown_to_html_node(markdown, resolve_url=None):
+    return ParentNode("div", list(iter_block_nodes(markdown.split("\n"), resolve_url)))
+
+
+def write_markdown_html(lines, buf, resolve_url=None):
+    # Streams a document of any size: only one block and its node tree are held at a time
+    buf.write("<div>")
+    for node in iter_block_nodes(lines, resolve_url):
+        node.write_html(buf)
+    buf.write("</div>")
 
 
 def extract_title(markdown):
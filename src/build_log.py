@@ -0,0 +1,80 @@
+import logging, logging.handlers, multiprocessing, sys, threading
+
+
+
+logger = logging.getLogger("ssg")
+logger.addHandler(logging.NullHandler())
+
+VERBOSITY_LEVELS = {0: logging.WARNING, 1: logging.INFO, 2: logging.DEBUG}
+
+
+class PhaseCounters:
+    def __init__(self):
+        self.phases = {} # phase name -> {event name: count}
+        self.lock = threading.Lock() # stages on thread pools (copy transforms, ...) count from their workers
+
+    def add(self, phase, event, amount=1):
+        with self.lock:
+            events = self.phases.setdefault(phase, {})
+            events[event] = events.get(event, 0) + amount
+
+    def get(self, phase, event):
+        return self.phases.get(phase, {}).get(event, 0)
+
+    def reset(self):
+        self.phases.clear()
+
+    def summary(self):
+        lines = []
+        for phase, events in self.phases.items():
+            details = ", ".join(f'{event}={count}' for event, count in events.items())
+            lines.append(f'{phase}: {details}')
+        return lines
+
+
+counters = PhaseCounters()
+
+
+def count(phase, event, amount=1):
+    counters.add(phase, event, amount)
+
+
+class BuildLogging:
+    def __init__(self, verbosity=1, log_file=None):
+        self.level = VERBOSITY_LEVELS[max(0, min(verbosity, 2))]
+        # A multiprocessing queue so records from forked render workers reach the listener too
+        self.queue = multiprocessing.Queue()
+        self.handler = logging.handlers.QueueHandler(self.queue)
+
+        console = logging.StreamHandler(sys.stdout)
+        console.setFormatter(logging.Formatter("%(message)s"))
+        handlers = [console]
+        if log_file is not None:
+            file_handler = logging.FileHandler(log_file)
+            file_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+            handlers.append(file_handler)
+        self.listener = logging.handlers.QueueListener(self.queue, *handlers)
+
+    def start(self):
+        self.saved = (logger.level, logger.propagate) # put back by stop(), so tests and embedders see the logger as before
+        logger.setLevel(self.level)
+        logger.addHandler(self.handler)
+        logger.propagate = False
+        self.listener.start()
+        return self
+
+    def stop(self):
+        self.listener.stop()
+        self.queue.close()
+        self.queue.join_thread()
+        logger.removeHandler(self.handler)
+        logger.setLevel(self.saved[0])
+        logger.propagate = self.saved[1]
+        for handler in self.listener.handlers:
+            handler.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
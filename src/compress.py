@@ -0,0 +1,75 @@
+import gzip, os
+
+from build_log import count, logger
+from concurrent.futures import ThreadPoolExecutor
+from manifest import hash_file
+
+try:
+    import brotli # optional: without it only .gz siblings are written
+except ImportError:
+    brotli = None
+
+
+
+COMPRESSIBLE_EXTENSIONS = (".html", ".css", ".js", ".json", ".xml", ".svg", ".txt")
+MIN_COMPRESS_SIZE = 1024 # smaller files gain less than the extra request headers cost
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+
+def find_compressible(dest_dir, min_size=MIN_COMPRESS_SIZE):
+    found = []
+    for root, _, files in os.walk(dest_dir):
+        for name in sorted(files):
+            if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            if os.path.getsize(path) >= min_size:
+                found.append(path)
+    found.sort()
+    return found
+
+
+def encodings(use_brotli=True):
+    # [(file suffix, compress function), ...]; gzip output uses mtime=0 so unchanged input gives identical bytes
+    available = [(".gz", lambda data: gzip.compress(data, GZIP_LEVEL, mtime=0))]
+    if use_brotli and brotli is not None:
+        available.append((".br", lambda data: brotli.compress(data, quality=BROTLI_QUALITY)))
+    return available
+
+
+def write_compressed(path, suffix, compress):
+    # zlib and brotli release the GIL, so this runs in parallel on a thread pool. The file is read
+    # here rather than while scanning, so only the files being compressed right now are in memory.
+    with open(path, "rb") as f:
+        data = f.read()
+    compressed = compress(data)
+    tmp_path = f'{path}{suffix}.tmp'
+    with open(tmp_path, "wb") as f:
+        f.write(compressed)
+    os.replace(tmp_path, path + suffix)
+    logger.debug(f'Compressed {path}{suffix}: {len(data)} -> {len(compressed)} bytes')
+    return len(data), len(compressed)
+
+
+def compress_outputs(dest_dir, manifest=None, jobs=8, min_size=MIN_COMPRESS_SIZE, use_brotli=True):
+    # Writes .gz (and .br) siblings for text outputs whose content changed since they were last compressed
+    work = []
+    for path in find_compressible(dest_dir, min_size):
+        inputs = {"content": hash_file(path)}
+        for suffix, compress in encodings(use_brotli):
+            key = path + suffix
+            if manifest is not None and manifest.is_fresh("compress", key, inputs, key):
+                count("compress", "unchanged")
+                continue
+            work.append((path, suffix, compress, inputs))
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        futures = [executor.submit(write_compressed, path, suffix, compress) for path, suffix, compress, _ in work]
+        for (path, suffix, _, inputs), future in zip(work, futures):
+            size_in, size_out = future.result()
+            count("compress", "written")
+            count("compress", "bytes_in", size_in)
+            count("compress", "bytes_out", size_out)
+            if manifest is not None:
+                manifest.record("compress", path + suffix, inputs, path + suffix)
@@ -1,22 +1,159 @@
-import os, shutil, logging
+import os, shutil
 
+from build_log import count, logger
+from concurrent.futures import ThreadPoolExecutor
+from manifest import hash_file
 
 
-logging.basicConfig(filename="src/copy_src_to_dest_log.txt", level=logging.INFO, format='%(asctime)s - %(message)s')
-logger = logging.getLogger()
 
-def copy_src_to_dest(src, dest):
+class SyncStats:
+    def __init__(self):
+        self.copied_files = 0
+        self.copied_bytes = 0
+        self.skipped_files = 0
+        self.skipped_bytes = 0
+        self.changed = [] # destination paths written by this sync
+
+    def __repr__(self):
+        return f'SyncStats(copied={self.copied_files} files/{self.copied_bytes} bytes, skipped={self.skipped_files} files/{self.skipped_bytes} bytes)'
+
+
+def scan_tree(src, dest):
+    files = []
+    with os.scandir(src) as entries:
+        for entry in sorted(entries, key=lambda entry: entry.name):
+            destination_item = os.path.join(dest, entry.name)
+            if entry.is_dir():
+                files.extend(scan_tree(entry.path, destination_item))
+            else:
+                files.append((entry.path, destination_item, entry.stat()))
+    return files
+
+
+def is_unchanged(source_item, destination_item, source_stat, use_hash=False):
+    try:
+        dest_stat = os.stat(destination_item)
+    except FileNotFoundError:
+        return False
+    if dest_stat.st_size != source_stat.st_size or dest_stat.st_mtime_ns != source_stat.st_mtime_ns:
+        return False
+    if use_hash:
+        return hash_file(source_item) == hash_file(destination_item)
+    return True
+
+
+def kernel_copy(copy, fsrc, fdst):
+    # Runs copy(offset, remaining) -> bytes copied until the whole file is copied; False (with the
+    # destination emptied again) when the call is not supported for these files
+    remaining = os.fstat(fsrc.fileno()).st_size
+    offset = 0
+    try:
+        while remaining > 0:
+            copied = copy(offset, remaining)
+            if copied == 0:
+                break
+            offset += copied
+            remaining -= copied
+    except OSError:
+        remaining = -1
+    if remaining == 0:
+        return True
+    fsrc.seek(0)
+    fdst.seek(0)
+    fdst.truncate()
+    return False
+
+
+def fast_copy(source_item, destination_item):
+    # copy_file_range can reflink on copy-on-write filesystems and sendfile still copies inside the
+    # kernel; either falls back to the next, and a plain read/write loop is the last resort
+    with open(source_item, "rb") as fsrc, open(destination_item, "wb") as fdst:
+        if hasattr(os, "copy_file_range"):
+            if kernel_copy(lambda offset, count: os.copy_file_range(fsrc.fileno(), fdst.fileno(), count, offset), fsrc, fdst):
+                return
+        if hasattr(os, "sendfile"):
+            if kernel_copy(lambda offset, count: os.sendfile(fdst.fileno(), fsrc.fileno(), offset, count), fsrc, fdst):
+                return
+        shutil.copyfileobj(fsrc, fdst)
+
+
+def copy_file(source_item, destination_item, link=False):
+    os.makedirs(os.path.dirname(destination_item), exist_ok=True)
+    tmp_item = f'{destination_item}.tmp'
+    if link:
+        try:
+            if os.path.lexists(tmp_item):
+                os.remove(tmp_item)
+            os.link(source_item, tmp_item)
+            os.replace(tmp_item, destination_item)
+            logger.debug(f'Linked file: {source_item} to {destination_item}')
+            return
+        except OSError:
+            pass
+    fast_copy(source_item, tmp_item)
+    shutil.copystat(source_item, tmp_item)
+    os.replace(tmp_item, destination_item)
+    logger.debug(f'Copied file: {source_item} to {destination_item}')
+
+
+def transform_file(source_item, destination_item, transform):
+    # Writes transform(source bytes) instead of a plain copy; the source mtime is kept like copystat does
+    with open(source_item, "rb") as f:
+        data = transform(f.read())
+    os.makedirs(os.path.dirname(destination_item), exist_ok=True)
+    tmp_item = f'{destination_item}.tmp'
+    with open(tmp_item, "wb") as f:
+        f.write(data)
+    shutil.copystat(source_item, tmp_item)
+    os.replace(tmp_item, destination_item)
+    logger.debug(f'Transformed file: {source_item} to {destination_item} with {transform.__name__}')
+
+
+def copy_src_to_dest(src, dest, manifest=None, jobs=4, use_hash=False, link=False, transforms=None):
+    # transforms maps a file extension (".css") to a function(bytes) -> bytes applied instead of copying.
+    # Transformed outputs differ from their source, so only the manifest can tell they are up to date.
+    stats = SyncStats()
     if not os.path.exists(dest):
-        os.mkdir(dest)
-        logger.info(f'Replicated directory: {dest}')
-    
-    for item in os.listdir(src):
-        source_item = os.path.join(src, item)
-        destination_item = os.path.join(dest, item)
-
-        if os.path.isdir(source_item):
-            logger.info(f'Entering directory: {source_item}')
-            copy_src_to_dest(source_item, destination_item)
+        os.makedirs(dest)
+        logger.debug(f'Replicated directory: {dest}')
+
+    changed = []
+    for source_item, destination_item, source_stat in scan_tree(src, dest):
+        transform = transforms.get(os.path.splitext(source_item)[1].lower()) if transforms else None
+        inputs = {"size": source_stat.st_size, "mtime_ns": source_stat.st_mtime_ns}
+        if transform is not None:
+            inputs["transform"] = transform.__name__
+            unchanged = manifest is not None and manifest.is_fresh("static", source_item, inputs, destination_item)
         else:
-            shutil.copy2(source_item, dest)
-            logger.info(f'Copied file: {source_item} to {dest}')
\ No newline at end of file
+            unchanged = is_unchanged(source_item, destination_item, source_stat, use_hash)
+        if manifest is not None:
+            manifest.record("static", source_item, inputs, destination_item)
+        if unchanged:
+            stats.skipped_files += 1
+            stats.skipped_bytes += source_stat.st_size
+            logger.debug(f'Unchanged file: {source_item}')
+        else:
+            changed.append((source_item, destination_item, transform))
+            stats.changed.append(destination_item)
+            stats.copied_files += 1
+            stats.copied_bytes += source_stat.st_size
+
+    def sync(source_item, destination_item, transform):
+        if transform is None:
+            copy_file(source_item, destination_item, link)
+        else:
+            transform_file(source_item, destination_item, transform)
+
+    if jobs <= 1 or len(changed) <= 1:
+        for source_item, destination_item, transform in changed:
+            sync(source_item, destination_item, transform)
+    else:
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            for future in [executor.submit(sync, s, d, t) for s, d, t in changed]:
+                future.result()
+
+    count("static", "copied", stats.copied_files)
+    count("static", "copied_bytes", stats.copied_bytes)
+    count("static", "skipped", stats.skipped_files)
+    count("static", "skipped_bytes", stats.skipped_bytes)
+    return stats
@@ -0,0 +1,94 @@
+import os, posixpath, re
+
+
+
+SCHEME_PATTERN = re.compile(r'[A-Za-z][A-Za-z0-9+.-]*:')
+
+# Nodes are prefixed strings so one graph can hold every kind of build input:
+#   page:<source path>       a markdown page (the only kind that is ever rebuilt)
+#   template:<path>          a template file
+#   url:<site URL>           a page or static asset as other pages reference it
+# Links and images depend on URLs rather than source paths, so adding, editing or removing
+# whatever lives at a URL reaches the pages that reference it even before it exists.
+
+def page_node(src):
+    return f'page:{os.path.normpath(src)}'
+
+
+def template_node(template_path):
+    return f'template:{os.path.normpath(template_path)}'
+
+
+def url_node(url):
+    return f'url:{url}'
+
+
+def site_url(dest_path, dest_dir):
+    # Site URL of an output file: docs/blog/tom/index.html -> /blog/tom, docs/blog/post.html -> /blog/post
+    relative = os.path.relpath(dest_path, dest_dir).replace(os.sep, "/")
+    return canonical_url("/" + relative, "/")
+
+
+def site_directory(dest_path, dest_dir):
+    # Site URL that relative links in an output file resolve against: docs/blog/tom/index.html -> /blog/tom
+    relative = os.path.relpath(os.path.dirname(dest_path), dest_dir).replace(os.sep, "/")
+    return posixpath.normpath("/" + relative)
+
+
+def canonical_url(url, directory):
+    # Resolves a link as written in a page under directory to a site URL, or None for external links.
+    # Called once per link by the link checker, so the common absolute-path case avoids urlsplit/normpath.
+    if url.startswith("//") or SCHEME_PATTERN.match(url):
+        return None
+    for separator in "?#":
+        position = url.find(separator)
+        if position != -1:
+            url = url[:position]
+    if url == "":
+        return None
+    path = url if url.startswith("/") else f'{directory.rstrip("/")}/{url}'
+    if "/." in path or "//" in path:
+        path = posixpath.normpath(path)
+    if path.endswith("/index.html"):
+        path = path[:-len("index.html")]
+    elif path.endswith(".html"):
+        path = path[:-len(".html")] # /blog/post and /blog/post.html name the same page
+    if path != "/":
+        path = path.rstrip("/") or "/"
+    return path
+
+
+class DependencyGraph:
+    def __init__(self, dependencies=None):
+        self.dependencies = dependencies or {} # dependent node -> sorted list of nodes it depends on
+        self._dependents = None # reverse index, built on first query
+
+    def to_dict(self):
+        return self.dependencies
+
+    def set_dependencies(self, node, dependencies):
+        self.dependencies[node] = sorted(set(dependencies))
+        self._dependents = None
+
+    def remove(self, node):
+        if self.dependencies.pop(node, None) is not None:
+            self._dependents = None
+
+    def dependents(self, nodes):
+        # Nodes that directly depend on any of nodes. Edges are not followed transitively: a page that
+        # links to a changed page is rebuilt, but nothing about its own output changes for its referrers.
+        if self._dependents is None:
+            self._dependents = {}
+            for dependent, dependencies in self.dependencies.items():
+                for dependency in dependencies:
+                    self._dependents.setdefault(dependency, set()).add(dependent)
+        found = set()
+        for node in nodes:
+            found.update(self._dependents.get(node, ()))
+        return found
+
+    def rebuild_set(self, changed):
+        # Minimal set of page nodes to rebuild after the given nodes changed
+        pages = {node for node in changed if node.startswith("page:")}
+        pages.update(node for node in self.dependents(changed) if node.startswith("page:"))
+        return pages
@@ -0,0 +1,342 @@
+import ctypes, ctypes.util, os, select, struct, sys, threading, time
+
+from build_log import logger
+from copy_static import copy_file, copy_src_to_dest
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from page_generator import discover_pages, render_markdown, write_page
+from template import load_template, template_path_for, TEMPLATE_DIR
+from textnode import basepath_resolver
+from urllib.parse import parse_qs, urlsplit
+
+
+
+LIVE_RELOAD_PATH = "/__livereload"
+LIVE_RELOAD_SCRIPT = (
+    "<script>(function () {"
+    " var version = null;"
+    " function poll() {"
+    "  fetch('" + LIVE_RELOAD_PATH + "?v=' + (version === null ? '' : version))"
+    "   .then(function (response) { return response.text(); })"
+    "   .then(function (text) { if (version !== null && text !== version) { location.reload(); return; } version = text; poll(); })"
+    "   .catch(function () { setTimeout(poll, 1000); });"
+    " }"
+    " poll();"
+    "})();</script>"
+)
+LIVE_RELOAD_TIMEOUT = 25 # seconds a long-poll request is held open before returning the current version
+
+IN_MODIFY = 0x2
+IN_ATTRIB = 0x4
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def scan_paths(roots):
+    snapshot = {}
+    for root in roots:
+        if os.path.isfile(root):
+            stat = os.stat(root)
+            snapshot[os.path.normpath(root)] = (stat.st_mtime_ns, stat.st_size)
+            continue
+        for dir_path, _, file_names in os.walk(root):
+            for name in file_names:
+                path = os.path.normpath(os.path.join(dir_path, name))
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+class PollingWatcher:
+    def __init__(self, roots, interval=0.05):
+        self.roots = roots
+        self.interval = interval
+
+    def wait(self, timeout=None):
+        # Polling cannot tell what changed, so None asks the caller to rescan everything
+        time.sleep(self.interval)
+        return None
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    def __init__(self, roots):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self.roots = roots
+        self.directories = {} # watch descriptor -> directory path
+        for root in roots:
+            if os.path.isdir(root):
+                self.watch_tree(root)
+            else:
+                # Editors often replace files by rename, so a single file is watched through its directory
+                self.watch(os.path.dirname(root) or ".")
+
+    def watch(self, directory):
+        wd = self._add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd >= 0:
+            self.directories[wd] = os.path.normpath(directory)
+
+    def watch_tree(self, root):
+        for dir_path, _, _ in os.walk(root):
+            self.watch(dir_path)
+
+    def wait(self, timeout=None):
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        time.sleep(0.005) # let the burst of events from a single editor save arrive together
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0").decode(errors="surrogateescape")
+                offset += length
+                directory = self.directories.get(wd)
+                if directory is None:
+                    continue
+                path = os.path.join(directory, name) if name else directory
+                changed.add(os.path.normpath(path))
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    self.watch_tree(path)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+def make_watcher(roots, poll=False, interval=0.05):
+    if not poll and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(roots)
+        except (OSError, AttributeError) as e:
+            logger.warning(f'inotify unavailable ({e}), falling back to polling')
+    return PollingWatcher(roots, interval)
+
+
+class DevSite:
+    def __init__(self, content_dir, static_dir, template_path, dest_dir, basepath="/"):
+        self.content_dir = os.path.normpath(content_dir)
+        self.static_dir = os.path.normpath(static_dir)
+        self.template_path = os.path.normpath(template_path)
+        self.template_dir = os.path.normpath(os.path.join(os.path.dirname(template_path), TEMPLATE_DIR))
+        self.dest_dir = os.path.normpath(dest_dir)
+        self.basepath = basepath
+        self.pages = {} # source path -> (dest path, template name, title, body html)
+        self.snapshot = {} # watched file -> (mtime_ns, size)
+        self.version = 0
+        self.changed = threading.Condition()
+
+    @property
+    def roots(self):
+        roots = [self.content_dir, self.static_dir, self.template_path]
+        if os.path.isdir(self.template_dir):
+            roots.append(self.template_dir)
+        return roots
+
+    def build(self):
+        copy_src_to_dest(self.static_dir, self.dest_dir)
+        for src, dest in discover_pages(self.content_dir, self.dest_dir):
+            self.render(os.path.normpath(src), dest)
+        self.snapshot = scan_paths(self.roots)
+
+    def render(self, src, dest=None):
+        if dest is None:
+            relative = os.path.relpath(src, self.content_dir)
+            dest = os.path.join(self.dest_dir, os.path.splitext(relative)[0] + ".html")
+        try:
+            with open(src) as f:
+                page = render_markdown(f.read(), basepath_resolver(self.basepath))
+            template_name, title, html = page.template, page.title, page.node.to_html()
+            template = load_template(template_path_for(self.template_path, template_name), self.basepath)
+            write_page(template, title, html, dest)
+        except Exception as e:
+            logger.error(f'Failed to render {src}: {type(e).__name__}: {e}')
+            return
+        self.pages[src] = (dest, template_name, title, html)
+
+    def rewrap(self, template_file):
+        # A template edit only needs the cached bodies re-rendered through the new template
+        try:
+            template = load_template(template_file, self.basepath)
+        except Exception as e:
+            logger.error(f'Failed to load {template_file}: {type(e).__name__}: {e}')
+            return 0
+        rendered = 0
+        for src, (dest, template_name, title, html) in self.pages.items():
+            if os.path.normpath(template_path_for(self.template_path, template_name)) != template_file:
+                continue
+            try:
+                write_page(template, title, html, dest)
+            except Exception as e:
+                logger.error(f'Failed to render {src}: {type(e).__name__}: {e}')
+                continue
+            rendered += 1
+        return rendered
+
+    def sync_static(self, path):
+        # Copies (or removes) one changed static file; it may vanish again before we get to it
+        dest = os.path.join(self.dest_dir, os.path.relpath(path, self.static_dir))
+        try:
+            if os.path.isfile(path):
+                copy_file(path, dest)
+            elif os.path.isfile(dest):
+                os.remove(dest)
+        except OSError as e:
+            logger.error(f'Failed to sync {path}: {type(e).__name__}: {e}')
+
+    def is_watched(self, path):
+        return any(path == root or path.startswith(root + os.sep) for root in map(os.path.normpath, self.roots))
+
+    def rescan(self, candidates):
+        if candidates is None:
+            return scan_paths(self.roots)
+        snapshot = dict(self.snapshot)
+        for path in candidates:
+            if not self.is_watched(path):
+                continue
+            if os.path.isdir(path):
+                snapshot.update(scan_paths([path]))
+            elif os.path.isfile(path):
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    snapshot.pop(path, None)
+                    continue
+                snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+            else:
+                prefix = path + os.sep
+                for known in [known for known in snapshot if known == path or known.startswith(prefix)]:
+                    del snapshot[known]
+        return snapshot
+
+    def update(self, candidates=None):
+        start = time.perf_counter()
+        snapshot = self.rescan(candidates)
+        changed = {path for path in snapshot.keys() | self.snapshot.keys() if snapshot.get(path) != self.snapshot.get(path)}
+        self.snapshot = snapshot
+        if not changed:
+            return 0
+
+        rebuilt = 0
+        for path in sorted(changed):
+            if path.startswith(self.static_dir + os.sep):
+                self.sync_static(path)
+            elif path == self.template_path or path.startswith(self.template_dir + os.sep):
+                if path in snapshot:
+                    rebuilt += self.rewrap(path)
+            elif path.startswith(self.content_dir + os.sep) and path.endswith(".md"):
+                if path in snapshot:
+                    self.render(path)
+                    rebuilt += 1
+                elif path in self.pages:
+                    dest = self.pages.pop(path)[0]
+                    if os.path.isfile(dest):
+                        os.remove(dest)
+
+        with self.changed:
+            self.version += 1
+            self.changed.notify_all()
+        logger.info(f'Rebuilt {rebuilt} pages for {len(changed)} changed files in {(time.perf_counter() - start) * 1e3:.1f} ms')
+        return rebuilt
+
+    def wait_for_version(self, known_version, timeout=LIVE_RELOAD_TIMEOUT):
+        with self.changed:
+            if known_version == str(self.version):
+                self.changed.wait(timeout)
+            return self.version
+
+
+class DevRequestHandler(SimpleHTTPRequestHandler):
+    site = None # the DevSite being served, set by serve()
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == LIVE_RELOAD_PATH:
+            self.send_live_reload(parse_qs(url.query).get("v", [""])[0])
+            return
+        path = self.translate_path(self.path)
+        if os.path.isdir(path) and url.path.endswith("/"):
+            path = os.path.join(path, "index.html")
+        if path.endswith(".html") and os.path.isfile(path):
+            self.send_html(path)
+            return
+        super().do_GET()
+
+    def send_html(self, path):
+        with open(path, "rb") as f:
+            body = f.read()
+        script = LIVE_RELOAD_SCRIPT.encode()
+        index = body.rfind(b"</body>")
+        body = body[:index] + script + body[index:] if index != -1 else body + script
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_live_reload(self, known_version):
+        body = str(self.site.wait_for_version(known_version)).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f'{self.address_string()} - {format % args}')
+
+
+def serve(site, host="127.0.0.1", port=8888, watch=True, poll=False, interval=0.05):
+    logger.info("Building site...")
+    site.build()
+
+    handler = type("BoundDevRequestHandler", (DevRequestHandler,), {"site": site})
+    server = ThreadingHTTPServer((host, port), lambda *args: handler(*args, directory=site.dest_dir))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(f'Serving {site.dest_dir} at http://{host}:{port}/')
+
+    watcher = make_watcher(site.roots, poll, interval) if watch else None
+    try:
+        while True:
+            if watcher is None:
+                time.sleep(3600)
+                continue
+            candidates = watcher.wait(1.0)
+            if candidates is None or candidates:
+                site.update(candidates)
+    except KeyboardInterrupt:
+        logger.info("Stopping server")
+    finally:
+        if watcher is not None:
+            watcher.close()
+        server.shutdown()
+        server.server_close()
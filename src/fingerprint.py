@@ -0,0 +1,57 @@
+import json, os
+
+from build_log import count, logger
+from copy_static import copy_file, scan_tree
+from dep_graph import site_url
+from manifest import hash_bytes, hash_file
+
+
+
+FINGERPRINT_LENGTH = 10 # hex digits of the content hash kept in the file name
+
+
+def fingerprint_name(path, digest):
+    # docs/index.css -> docs/index.<hash>.css
+    root, extension = os.path.splitext(path)
+    return f'{root}.{digest[:FINGERPRINT_LENGTH]}{extension}'
+
+
+class AssetMap:
+    def __init__(self, urls=None):
+        self.urls = urls or {} # site URL of a static file -> site URL of its fingerprinted copy
+        self.key = self.digest(self.urls) # identifies the whole map, e.g. for compiled template caching
+
+    def digest(self, urls):
+        # Changes only when the fingerprint of one of urls changes
+        return hash_bytes(json.dumps([[url, self.urls.get(url)] for url in sorted(urls)]).encode())
+
+    def __repr__(self):
+        return f'AssetMap({len(self.urls)} assets)'
+
+
+def fingerprint_assets(static_dir, dest_dir, manifest=None, link=False):
+    # Writes a content-addressed copy of every static file next to its plain copy in dest_dir. The
+    # name depends only on the content, so unchanged assets keep their URL across builds. Runs after
+    # copy_src_to_dest and fingerprints the copy, which may have been transformed (minified CSS).
+    urls = {}
+    for source_item, destination_item, _ in scan_tree(static_dir, dest_dir):
+        if destination_item.endswith(".html"):
+            continue
+        digest = manifest.file_hash(destination_item) if manifest is not None else hash_file(destination_item)
+        fingerprinted = fingerprint_name(destination_item, digest)
+        urls[site_url(destination_item, dest_dir)] = site_url(fingerprinted, dest_dir)
+
+        inputs = {"content": digest}
+        if manifest is not None:
+            previous = manifest.entries["fingerprint"].get(os.path.normpath(source_item))
+            if previous is not None and previous["output"] != os.path.normpath(fingerprinted) and os.path.isfile(previous["output"]):
+                os.remove(previous["output"])
+                logger.debug(f'Removed outdated fingerprinted copy {previous["output"]}')
+            if manifest.is_fresh("fingerprint", source_item, inputs, fingerprinted):
+                count("fingerprint", "unchanged")
+                continue
+        copy_file(destination_item, fingerprinted, link)
+        count("fingerprint", "written")
+        if manifest is not None:
+            manifest.record("fingerprint", source_item, inputs, fingerprinted)
+    return AssetMap(urls)
@@ -1,4 +1,6 @@
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag # str representing HTML tag name
         self.value = value # str representing HTML tag content
@@ -7,21 +9,33 @@ class HTMLNode:
 
     def to_html(self):
         raise NotImplementedError("to_html method must be implemented by subclasses")
+
+    def iter_html(self):
+        yield self.to_html()
+
+    def write_html(self, buf):
+        # buf is anything with a write method (io.StringIO, an open file, ...)
+        write = buf.write
+        for fragment in self.iter_html():
+            write(fragment)
     
     def props_to_html(self):
         if not self.props:
             return ""
-        props_str = ""
-        for key, value in self.props.items():
-            props_str += f' {key}="{value}"'
-        return props_str
+        return "".join([f' {key}="{value}"' for key, value in self.props.items()])
     
     def __repr__(self):
         return f'HTMLNode({self.tag}, {self.value}, {self.children}, {self.props})'
     
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
-        super().__init__(tag, value, None, props)
+        # Assigned directly rather than through super().__init__; leaves are the most-allocated node
+        self.tag = tag
+        self.value = value
+        self.children = None
+        self.props = props
 
     def to_html(self):
         if not self.value:
@@ -35,18 +49,39 @@ class LeafNode(HTMLNode):
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
-        super().__init__(tag, None, children, props)
+        self.tag = tag
+        self.value = None
+        self.children = children
+        self.props = props
     
     def to_html(self):
+        return "".join(self.iter_html())
+
+    def open_tag(self):
         if not self.tag:
             raise ValueError("All parent nodes must have a tag")
         if not self.children:
             raise ValueError("All parent nodes must have a child")
-        result = ""
-        for child in self.children:
-            result += child.to_html()
-        return f"<{self.tag}{self.props_to_html()}>{result}</{self.tag}>"
+        return f"<{self.tag}{self.props_to_html()}>"
+
+    def iter_html(self):
+        # Walks the tree with an explicit stack so deep nesting never hits the recursion limit
+        yield self.open_tag()
+        stack = [(self.tag, iter(self.children))]
+        while stack:
+            tag, children = stack[-1]
+            for child in children:
+                if isinstance(child, ParentNode):
+                    yield child.open_tag()
+                    stack.append((child.tag, iter(child.children)))
+                    break
+                yield from child.iter_html()
+            else:
+                stack.pop()
+                yield f"</{tag}>"
     
     def __repr__(self):
         return f'ParentNode({self.tag}, {self.children}, {self.props})'
\ No newline at end of file
@@ -0,0 +1,241 @@
+import json, os, struct
+
+from build_log import count, logger
+from concurrent.futures import ProcessPoolExecutor
+from copy_static import copy_file
+from dep_graph import canonical_url, site_directory, site_url
+from manifest import hash_bytes, hash_file
+from textnode import basepath_resolver
+
+try:
+    from PIL import Image # optional: without Pillow images only get width/height, no variants
+except ImportError:
+    Image = None
+
+
+
+IMAGE_PIPELINE_VERSION = 1 # bump whenever variant output changes; invalidates the image cache
+IMAGE_CACHE_DIR = "./.build/images"
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".webp")
+IMAGE_WIDTHS = (480, 960, 1440)
+WEBP_QUALITY = 80
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC} # start-of-frame markers; C4/C8/CC are not frames
+
+
+def read_jpeg_size(f):
+    f.seek(2)
+    while True:
+        marker = f.read(2)
+        if len(marker) != 2 or marker[0] != 0xFF:
+            return None
+        if marker[1] == 0xFF: # fill byte before the real marker
+            f.seek(-1, os.SEEK_CUR)
+            continue
+        if 0xD0 <= marker[1] <= 0xD9 or marker[1] == 0x01: # markers without a length field
+            continue
+        length_bytes = f.read(2)
+        if len(length_bytes) != 2:
+            return None
+        length = struct.unpack(">H", length_bytes)[0]
+        if marker[1] in JPEG_SOF_MARKERS:
+            frame = f.read(5)
+            if len(frame) != 5:
+                return None
+            height, width = struct.unpack(">xHH", frame)
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+def image_size(path):
+    # (width, height) from the file header alone, or None for formats or files we cannot read
+    with open(path, "rb") as f:
+        header = f.read(30)
+        if header.startswith(PNG_SIGNATURE) and header[12:16] == b"IHDR":
+            return struct.unpack(">II", header[16:24])
+        if header[:6] in (b"GIF87a", b"GIF89a"):
+            return struct.unpack("<HH", header[6:10])
+        if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+            chunk = header[12:16]
+            if chunk == b"VP8 ":
+                width, height = struct.unpack("<HH", header[26:30])
+                return width & 0x3FFF, height & 0x3FFF
+            if chunk == b"VP8L":
+                bits = struct.unpack("<I", header[21:25])[0]
+                return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+            if chunk == b"VP8X":
+                return int.from_bytes(header[24:27], "little") + 1, int.from_bytes(header[27:30], "little") + 1
+            return None
+        if header[:2] == b"\xff\xd8":
+            return read_jpeg_size(f)
+    return None
+
+
+class ImageInfo:
+    def __init__(self, width, height, variants=None):
+        self.width = width
+        self.height = height
+        self.variants = variants or [] # [(width, file name in the cache entry), ...] narrowest first
+
+    def to_dict(self):
+        return {"width": self.width, "height": self.height, "variants": self.variants}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["width"], data["height"], [tuple(variant) for variant in data["variants"]])
+
+    def __repr__(self):
+        return f'ImageInfo({self.width}x{self.height}, {len(self.variants)} variants)'
+
+
+def variant_name(path, width):
+    # images/rivendell.png -> images/rivendell.480w.webp
+    return f'{os.path.splitext(path)[0]}.{width}w.webp'
+
+
+def make_variants(src, entry_dir, size, widths):
+    variants = []
+    with Image.open(src) as image:
+        for width in sorted(widths):
+            if width >= size[0]:
+                break
+            name = f'{width}w.webp'
+            tmp_path = os.path.join(entry_dir, f'.{name}.tmp')
+            resized = image.resize((width, max(1, round(size[1] * width / size[0]))), Image.LANCZOS)
+            resized.save(tmp_path, "WEBP", quality=WEBP_QUALITY)
+            os.replace(tmp_path, os.path.join(entry_dir, name))
+            variants.append((width, name))
+    return variants
+
+
+def process_image(src, key, cache_dir, widths):
+    # Runs on worker processes: returns (ImageInfo as a dict, whether it came from the cache)
+    entry_dir = os.path.join(cache_dir, key)
+    meta_path = os.path.join(entry_dir, "meta.json")
+    try:
+        with open(meta_path) as f:
+            info = ImageInfo.from_dict(json.load(f))
+        if all(os.path.exists(os.path.join(entry_dir, name)) for _, name in info.variants):
+            return info.to_dict(), True
+    except (OSError, ValueError, KeyError):
+        pass
+
+    size = image_size(src)
+    if size is None:
+        return None, False
+    variants = []
+    if Image is not None and widths:
+        os.makedirs(entry_dir, exist_ok=True)
+        try:
+            variants = make_variants(src, entry_dir, size, widths)
+        except Exception as e:
+            logger.warning(f'Could not create variants of {src}: {type(e).__name__}: {e}')
+    info = ImageInfo(size[0], size[1], variants)
+    os.makedirs(entry_dir, exist_ok=True)
+    with open(meta_path + ".tmp", "w") as f:
+        json.dump(info.to_dict(), f)
+    os.replace(meta_path + ".tmp", meta_path)
+    return info.to_dict(), False
+
+
+def pipeline_key(widths):
+    # What decides the variants of an unchanged image: pages whose srcset lists them depend on it too
+    return f'{IMAGE_PIPELINE_VERSION}:{sorted(widths) if Image is not None else []}'
+
+
+class ImageIndex:
+    def __init__(self, dest_dir, images=None, key=None):
+        self.dest_dir = dest_dir
+        self.images = images or {} # site URL of the original image -> ImageInfo
+        self.key = key # pipeline_key of the build that made the variants
+        self.aliases = {} # site URL of a fingerprinted copy -> site URL of the original
+
+    def add_aliases(self, assets):
+        for url, fingerprinted in assets.urls.items():
+            if url in self.images:
+                self.aliases[fingerprinted] = url
+
+    def annotate(self, node, dest_path, basepath="/"):
+        # Adds width/height (and srcset when variants exist) to the img nodes of a page's tree
+        if not self.images:
+            return
+        directory = site_directory(dest_path, self.dest_dir)
+        resolve_url = basepath_resolver(basepath)
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if current.children:
+                stack.extend(current.children)
+                continue
+            if current.tag != "img":
+                continue
+            src = current.props["src"]
+            if basepath != "/" and src.startswith(basepath):
+                src = "/" + src[len(basepath):]
+            url = canonical_url(src, directory)
+            url = self.aliases.get(url, url)
+            info = self.images.get(url)
+            if info is None:
+                continue
+            props = dict(current.props)
+            props["width"] = str(info.width)
+            props["height"] = str(info.height)
+            if info.variants:
+                candidates = []
+                for width, _ in info.variants:
+                    variant_url = variant_name(url, width)
+                    candidates.append(f'{resolve_url(variant_url) if resolve_url else variant_url} {width}w')
+                candidates.append(f'{current.props["src"]} {info.width}w')
+                props["srcset"] = ", ".join(candidates)
+                props["sizes"] = f'(max-width: {info.width}px) 100vw, {info.width}px'
+            current.props = props
+
+
+def find_images(static_dir, dest_dir):
+    found = []
+    for root, _, files in os.walk(static_dir):
+        for name in sorted(files):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                src = os.path.join(root, name)
+                found.append((src, os.path.join(dest_dir, os.path.relpath(src, static_dir))))
+    found.sort()
+    return found
+
+
+def process_images(static_dir, dest_dir, manifest=None, jobs=1, widths=IMAGE_WIDTHS, cache_dir=IMAGE_CACHE_DIR):
+    # Reads every image under static_dir (from the cache when its content is unchanged), copies its
+    # variants next to the copied original in dest_dir and returns an ImageIndex for the pages
+    work = []
+    for src, dest in find_images(static_dir, dest_dir):
+        digest = manifest.stat_hash(src) if manifest is not None else hash_file(src)
+        key = hash_bytes(f'{pipeline_key(widths)}:{digest}'.encode())
+        work.append((src, dest, key))
+
+    if jobs <= 1 or len(work) <= 1:
+        results = [process_image(src, key, cache_dir, widths) for src, _, key in work]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [executor.submit(process_image, src, key, cache_dir, widths) for src, _, key in work]
+            results = [future.result() for future in futures]
+
+    index = ImageIndex(dest_dir, key=pipeline_key(widths))
+    for (src, dest, key), (data, cached) in zip(work, results):
+        if data is None:
+            logger.debug(f'Unknown image format: {src}')
+            count("images", "unreadable")
+            continue
+        count("images", "cached" if cached else "processed")
+        info = ImageInfo.from_dict(data)
+        index.images[site_url(dest, dest_dir)] = info
+        for width, name in info.variants:
+            cached_variant = os.path.join(cache_dir, key, name)
+            variant_dest = variant_name(dest, width)
+            inputs = {"key": key}
+            if manifest is not None and manifest.is_fresh("images", cached_variant, inputs, variant_dest):
+                continue
+            copy_file(cached_variant, variant_dest)
+            count("images", "variants")
+            if manifest is not None:
+                manifest.record("images", cached_variant, inputs, variant_dest)
+    return index
@@ -1,16 +1,83 @@
 import re
 
-from textnode import TextNode, TextType
+from textnode import INLINE_HANDLERS, TextNode, TextType
 
 
 
+# One alternation covering every inline construct; the leftmost match wins, so a
+# span's contents (code, link URLs, ...) are never re-scanned for other delimiters.
+BUILTIN_INLINE_PATTERNS = (
+    r'!\[(?P<image_alt>[^\[\]]*)\]\((?P<image_url>[^\(\)]*)\)',
+    r'\[(?P<link_text>[^\[\]]*)\]\((?P<link_url>[^\(\)]*)\)',
+    r'\*\*(?P<bold>.*?)\*\*',
+    r'_(?P<italic>[^_]*)_',
+    r'`(?P<code>[^`]*)`',
+    r'(?P<unclosed>\*\*|_|`)',
+)
+
+DELIMITED_TYPES = {
+    "bold": TextType.BOLD,
+    "italic": TextType.ITALIC,
+    "code": TextType.CODE,
+}
+
+CUSTOM_INLINE_TYPES = [] # [(text type, pattern), ...] in registration order, see register_inline_type
+
+
+def compile_inline_pattern():
+    # Custom syntax is tried before the built-in constructs when several start at the same position.
+    # Returns the pattern and match group name -> (text type, number of the group holding the text).
+    alternatives = []
+    for number, (text_type, pattern) in enumerate(CUSTOM_INLINE_TYPES):
+        alternatives.append(f'(?P<custom_{number}>{pattern})')
+    alternatives.extend(BUILTIN_INLINE_PATTERNS)
+    compiled = re.compile("|".join(alternatives))
+    groups = {kind: (text_type, compiled.groupindex[kind]) for kind, text_type in DELIMITED_TYPES.items()}
+    for number, (text_type, _) in enumerate(CUSTOM_INLINE_TYPES):
+        groups[f'custom_{number}'] = (text_type, compiled.groupindex[f'custom_{number}'] + 1)
+    return compiled, groups
+
+
+INLINE_PATTERN, INLINE_GROUPS = compile_inline_pattern()
+
+
+def register_inline_type(text_type, pattern, handler):
+    # Adds inline syntax, e.g. register_inline_type(Footnote.REF, r'\[\^([^\]]+)\]', footnote_ref_handler).
+    # pattern must have exactly one capturing group, the node's text; handler(text_node, resolve_url)
+    # returns its LeafNode. The combined pattern is recompiled here, so parsing costs nothing extra per node.
+    # Register at import time, before pages are rendered on worker processes.
+    global INLINE_PATTERN, INLINE_GROUPS
+    if re.compile(pattern).groups != 1:
+        raise ValueError("Inline syntax patterns must have exactly one capturing group")
+    CUSTOM_INLINE_TYPES.append((text_type, pattern))
+    INLINE_HANDLERS[text_type] = handler
+    INLINE_PATTERN, INLINE_GROUPS = compile_inline_pattern()
+
+
 def text_to_textnodes(text):
-    nodes = [TextNode(text, TextType.TEXT)]
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
+    nodes = []
+    position = 0
+    for match in INLINE_PATTERN.finditer(text):
+        start = match.start()
+        if start > position:
+            nodes.append(TextNode(text[position:start], TextType.TEXT))
+        position = match.end()
+
+        kind = match.lastgroup
+        if kind == "image_url":
+            nodes.append(TextNode(match.group("image_alt"), TextType.IMAGE, match.group("image_url")))
+        elif kind == "link_url":
+            nodes.append(TextNode(match.group("link_text"), TextType.LINK, match.group("link_url")))
+        elif kind == "unclosed":
+            raise ValueError("Invalid Markdown syntax: Closing delimiter missing")
+        else:
+            text_type, group = INLINE_GROUPS[kind]
+            value = match.group(group)
+            if value != "":
+                nodes.append(TextNode(value, text_type))
+
+    if position < len(text):
+        nodes.append(TextNode(text[position:], TextType.TEXT))
     return nodes
 
 
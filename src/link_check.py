@@ -0,0 +1,69 @@
+import os
+
+from dep_graph import canonical_url, site_directory, site_url
+from page import parse_page
+
+
+
+class BrokenLink:
+    def __init__(self, src, line, kind, url):
+        self.src = src
+        self.line = line
+        self.kind = kind # "link" or "image"
+        self.url = url # as written in the markdown
+
+    def __str__(self):
+        return f'{self.src}:{self.line}: broken {self.kind} {self.url}'
+
+    def __repr__(self):
+        return f'BrokenLink({self.src!r}, {self.line}, {self.kind!r}, {self.url!r})'
+
+
+def build_link_index(outputs, dest_dir, static_dir):
+    # Site URL of every page output and static file. Only discovery and a static tree walk are
+    # needed, so the index exists before any page has rendered.
+    index = {site_url(dest, dest_dir) for dest in outputs}
+    for root, _, files in os.walk(static_dir):
+        for name in files:
+            index.add(site_url(os.path.join(root, name), static_dir))
+    return index
+
+
+class LinkChecker:
+    def __init__(self, index, dest_dir):
+        self.index = index # set of site URLs, see build_link_index
+        self.dest_dir = dest_dir
+        self.checked = 0
+        self.broken = [] # BrokenLink, in the order pages were checked
+        self.pages = set() # sources checked so far
+        self._resolved = {} # (directory, url) -> canonical URL; navigation links repeat on every page
+
+    def check_page(self, src, dest, page):
+        # Usable as the on_page hook of generate_pages_recursive; page only needs links and images
+        self.pages.add(src)
+        directory = site_directory(dest, self.dest_dir)
+        resolved = self._resolved
+        for kind, references in (("link", page.links), ("image", page.images)):
+            for url, line in references:
+                key = (directory, url)
+                if key in resolved:
+                    target = resolved[key]
+                else:
+                    target = resolved[key] = canonical_url(url, directory)
+                if target is None:
+                    continue
+                self.checked += 1
+                if target not in self.index:
+                    self.broken.append(BrokenLink(src, line, kind, url))
+
+    def check_remaining(self, pages, cache=None, basepath="/"):
+        # Checks the (source, destination) pairs that no on_page hook handed over, i.e. pages an
+        # incremental build left alone: their links come from the parse cache when the page is in
+        # it, otherwise the markdown is parsed (not rendered) again
+        for src, dest in pages:
+            if src in self.pages:
+                continue
+            with open(src) as f:
+                source = f.read()
+            page = None if cache is None else cache.get(cache.key(source, basepath))
+            self.check_page(src, dest, page if page is not None else parse_page(source))
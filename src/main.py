@@ -1,21 +1,283 @@
-import os, shutil, sys
+import argparse, cProfile, os, shutil, sys
+import block_markdown, page, profiler
 
+from build_log import BuildLogging, counters, logger
+from compress import MIN_COMPRESS_SIZE, compress_outputs
 from copy_static import copy_src_to_dest
-from page_generator import generate_pages_recursive
+from dep_graph import site_url
+from dev_server import DevSite, serve
+from fingerprint import fingerprint_assets
+from images import IMAGE_WIDTHS, process_images
+from link_check import LinkChecker, build_link_index
+from manifest import MANIFEST_SECTIONS, Manifest
+from minify import minify_css_file
+from page_generator import discover_pages, generate_pages_recursive
+from parse_cache import CACHE_DIR, DEFAULT_MAX_BYTES, ParseCache
+from profiler import BuildProfiler
+from sections import SECTION_PAGE_SIZE, generate_section_pages, plan_sections
+from site_files import SiteFiles
 
 
 
-def main():
-    basepath = sys.argv[1] if len(sys.argv) > 1 and sys.argv[1] != "" else "/"
+MANIFEST_PATH = "./.build/manifest.json"
 
-    print("Deleting existing docs directory...")
-    if os.path.exists("docs"):
-        shutil.rmtree("docs")
 
-    print("Copying static files to new docs directory...")
-    copy_src_to_dest("./static", "./docs")
+def add_logging_arguments(parser):
+    parser.add_argument("-v", "--verbose", action="count", default=0, help="log every page and file (repeatable)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="only log warnings and errors")
+    parser.add_argument("--log-file", help="also write the build log to this file")
 
-    generate_pages_recursive("./content", "./template.html", "./docs", basepath)
 
+def parse_widths(value):
+    return tuple(int(width) for width in value.split(",") if width.strip() != "")
 
-main()
\ No newline at end of file
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the static site from ./content into ./docs (see also: main.py serve --help, main.py check-links, main.py cache --help)")
+    parser.add_argument("basepath", nargs="?", default="/", help="URL prefix for root-relative links (default: /)")
+    parser.add_argument("--incremental", action="store_true", help="only rebuild pages and assets whose inputs changed since the last build")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="render pages on N worker processes (0 = one per CPU)")
+    parser.add_argument("--copy-jobs", type=int, default=8, help="threads used to copy changed static files and to compress outputs (default: 8)")
+    parser.add_argument("--hash-static", action="store_true", help="compare static files by content hash as well as size and mtime")
+    parser.add_argument("--link-static", action="store_true", help="hard-link static files into docs instead of copying them where possible")
+    parser.add_argument("--fingerprint", action="store_true", help="also copy static files to name.<hash>.ext and point pages and the template at those copies")
+    parser.add_argument("--minify", action="store_true", help="minify page HTML (from the node tree and the compiled template) and CSS files")
+    parser.add_argument("--compress", action="store_true", help="write precompressed .gz (and .br with the brotli package) siblings of text outputs")
+    parser.add_argument("--compress-min-size", type=int, default=MIN_COMPRESS_SIZE, metavar="BYTES", help=f'skip outputs smaller than this (default: {MIN_COMPRESS_SIZE})')
+    parser.add_argument("--image-widths", type=parse_widths, default=IMAGE_WIDTHS, metavar="W,W,...", help="widths of the WebP variants listed in img srcset; needs Pillow, empty to disable (default: 480,960,1440)")
+    parser.add_argument("--site-url", metavar="URL", help="absolute URL the site is served from (before the basepath); writes sitemap.xml and feed.xml")
+    parser.add_argument("--search-index", action="store_true", help="write a sharded search index to docs/search")
+    parser.add_argument("--section-index", action="store_true", help="write paginated listings of the pages in content directories that have no index.md")
+    parser.add_argument("--section-page-size", type=int, default=SECTION_PAGE_SIZE, metavar="N", help=f'pages listed per listing page (default: {SECTION_PAGE_SIZE})')
+    parser.add_argument("--check-links", action="store_true", help="fail the build on links and images that point at no page or static file")
+    parser.add_argument("--no-cache", action="store_true", help="parse every page from scratch instead of reusing parsed pages from ./.build/cache")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_MAX_BYTES >> 20, metavar="MB", help=f'evict least recently used parsed pages beyond this size (default: {DEFAULT_MAX_BYTES >> 20})')
+    add_logging_arguments(parser)
+    parser.add_argument("--profile", action="store_true", help="time each build phase per page and print a report")
+    parser.add_argument("--profile-top", type=int, default=10, metavar="N", help="number of slowest pages listed in the profile report (default: 10)")
+    parser.add_argument("--profile-pstats", metavar="PATH", help="also run the build under cProfile and dump pstats data to PATH")
+    parser.add_argument("--profile-trace", metavar="PATH", help="write the phase timings as Chrome trace-event JSON to PATH")
+    args = parser.parse_args(argv)
+    if args.profile_pstats or args.profile_trace:
+        args.profile = True
+    if args.jobs <= 0:
+        args.jobs = os.cpu_count() or 1
+    if args.basepath == "":
+        args.basepath = "/"
+    if args.section_page_size < 1:
+        parser.error("--section-page-size must be at least 1")
+    return args
+
+
+def build(args):
+    basepath = args.basepath
+    counters.reset()
+
+    if args.incremental:
+        manifest = Manifest.load(MANIFEST_PATH)
+    else:
+        logger.info("Deleting existing docs directory...")
+        if os.path.exists("docs"):
+            shutil.rmtree("docs")
+        manifest = Manifest(MANIFEST_PATH)
+    manifest.basepath = basepath
+
+    logger.info("Copying static files to docs directory...")
+    with profiler.phase("copy_static"):
+        transforms = {".css": minify_css_file} if args.minify else None
+        static_stats = copy_src_to_dest("./static", "./docs", manifest, args.copy_jobs, args.hash_static, args.link_static, transforms)
+    changed_urls = [site_url(path, "./docs") for path in static_stats.changed] if args.incremental else ()
+
+    assets = None
+    if args.fingerprint:
+        with profiler.phase("fingerprint"):
+            assets = fingerprint_assets("./static", "./docs", manifest, args.link_static)
+
+    logger.info("Processing images...")
+    with profiler.phase("images"):
+        images = process_images("./static", "./docs", manifest, args.jobs, args.image_widths)
+        if assets is not None:
+            images.add_aliases(assets)
+
+    section_pages = []
+    if args.section_index:
+        # Planned from frontmatter and title lines before rendering, so the link checker knows the listings
+        with profiler.phase("sections"):
+            section_pages = plan_sections(discover_pages("./content", "./docs"), "./content", "./docs", args.section_page_size)
+
+    checker = None
+    if args.check_links:
+        # Rendered pages are checked as they finish; the ones an incremental build skips afterwards
+        outputs = [dest for _, dest in discover_pages("./content", "./docs")] + [section_page.dest for section_page in section_pages]
+        checker = LinkChecker(build_link_index(outputs, "./docs", "./static"), "./docs")
+
+    site_files = None
+    if args.site_url or args.search_index:
+        site_files = SiteFiles("./content", "./docs", manifest, search=args.search_index)
+    hooks = [hook for hook in (None if checker is None else checker.check_page, None if site_files is None else site_files.record_page) if hook is not None]
+    def on_page(src, dest, page):
+        for hook in hooks:
+            hook(src, dest, page)
+
+    cache = None if args.no_cache else ParseCache(CACHE_DIR, args.cache_size << 20)
+    logger.info("Generating pages...")
+    try:
+        generate_pages_recursive(
+            "./content", "./template.html", "./docs", basepath, manifest, args.jobs, cache, changed_urls,
+            on_page if hooks else None, images, assets, args.minify, args.search_index,
+        )
+    finally:
+        if cache is not None:
+            with profiler.phase("cache"):
+                counters.add("cache", "evicted", cache.evict())
+
+    if args.section_index:
+        logger.info("Generating section listings...")
+        with profiler.phase("sections"):
+            generate_section_pages(section_pages, "./template.html", basepath, manifest, assets, args.minify)
+
+    if site_files is not None:
+        logger.info("Writing sitemap, feed and search index...")
+        with profiler.phase("site_files"):
+            site_files.write(discover_pages("./content", "./docs"), args.site_url, basepath, section_pages)
+
+    # Stale outputs go before compressing, so no .gz/.br is made (and kept) for them; the compressed
+    # siblings are pruned last, once compress_outputs has seen the ones still wanted
+    with profiler.phase("manifest"):
+        prune(manifest, [section for section in MANIFEST_SECTIONS if section != "compress"])
+
+    if args.compress:
+        logger.info("Compressing outputs...")
+        with profiler.phase("compress"):
+            compress_outputs("./docs", manifest, args.copy_jobs, args.compress_min_size)
+
+    with profiler.phase("manifest"):
+        prune(manifest, ["compress"])
+        manifest.save()
+
+    if checker is not None:
+        with profiler.phase("check_links"):
+            checker.check_remaining(discover_pages("./content", "./docs"), cache, basepath)
+        counters.add("links", "checked", checker.checked)
+        counters.add("links", "broken", len(checker.broken))
+        for broken in checker.broken:
+            logger.error(str(broken))
+
+    for line in counters.summary():
+        logger.info(line)
+    if checker is not None and checker.broken:
+        logger.error(f'Found {len(checker.broken)} broken link(s)')
+        return False
+    return True
+
+
+def prune(manifest, sections):
+    for path in manifest.prune("./docs", sections):
+        logger.debug(f'Removed stale output {path}')
+        counters.add("prune", "removed")
+
+
+def check_links(content_dir, dest_dir, static_dir, section_page_size=None):
+    # Parses every page (no rendering) and returns the broken links across the whole site.
+    # With a section_page_size, the listings --section-index would write are part of the site too.
+    pages = discover_pages(content_dir, dest_dir)
+    outputs = [dest for _, dest in pages]
+    if section_page_size is not None:
+        outputs.extend(section_page.dest for section_page in plan_sections(pages, content_dir, dest_dir, section_page_size))
+    checker = LinkChecker(build_link_index(outputs, dest_dir, static_dir), dest_dir)
+    checker.check_remaining(pages)
+    return checker
+
+
+def parse_serve_args(argv=None):
+    parser = argparse.ArgumentParser(prog="main.py serve", description="Serve ./docs locally, optionally rebuilding on every change")
+    parser.add_argument("basepath", nargs="?", default="/", help="URL prefix for root-relative links (default: /)")
+    parser.add_argument("--watch", action="store_true", help="rebuild changed pages in memory and live-reload the browser")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument("--poll", action="store_true", help="watch by polling file mtimes instead of inotify")
+    parser.add_argument("--interval", type=float, default=0.05, help="polling interval in seconds (default: 0.05)")
+    add_logging_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.basepath == "":
+        args.basepath = "/"
+    return args
+
+
+def parse_check_links_args(argv=None):
+    parser = argparse.ArgumentParser(prog="main.py check-links", description="Report links and images in ./content that point at no page or static file")
+    parser.add_argument("--section-index", action="store_true", help="count the section listings written by a --section-index build as pages")
+    parser.add_argument("--section-page-size", type=int, default=SECTION_PAGE_SIZE, metavar="N", help=f'pages listed per listing page (default: {SECTION_PAGE_SIZE})')
+    args = parser.parse_args(argv)
+    if args.section_page_size < 1:
+        parser.error("--section-page-size must be at least 1")
+    return args
+
+
+def parse_cache_args(argv=None):
+    parser = argparse.ArgumentParser(prog="main.py cache", description="Manage the parsed-page cache in ./.build/cache")
+    parser.add_argument("action", choices=["clear"])
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["check-links"]:
+        args = parse_check_links_args(argv[1:])
+        checker = check_links("./content", "./docs", "./static", args.section_page_size if args.section_index else None)
+        for broken in checker.broken:
+            print(broken)
+        print(f'{checker.checked} links checked, {len(checker.broken)} broken')
+        sys.exit(1 if checker.broken else 0)
+    if argv[:1] == ["cache"]:
+        args = parse_cache_args(argv[1:])
+        if args.action == "clear":
+            ParseCache(CACHE_DIR).clear()
+        return
+    if argv[:1] == ["serve"]:
+        args = parse_serve_args(argv[1:])
+        site = DevSite("./content", "./static", "./template.html", "./docs", args.basepath)
+        with BuildLogging(0 if args.quiet else 1 + args.verbose, args.log_file):
+            serve(site, args.host, args.port, args.watch, args.poll, args.interval)
+        return
+
+    args = parse_args(argv)
+    verbosity = 0 if args.quiet else 1 + args.verbose
+    with BuildLogging(verbosity, args.log_file):
+        succeeded = profile_build(args) if args.profile else build(args)
+    if not succeeded:
+        sys.exit(1)
+
+
+def profile_build(args):
+    if args.jobs > 1:
+        logger.warning("--profile renders pages in a single process so per-page timings can be collected")
+        args.jobs = 1
+
+    build_profiler = BuildProfiler()
+    build_profiler.instrument(page, "block_to_html_node")
+    for name in ("block_to_block_type", "text_to_textnodes"):
+        build_profiler.instrument(block_markdown, name)
+    profiler.active = build_profiler
+    cprofile = cProfile.Profile() if args.profile_pstats else None
+    try:
+        if cprofile is not None:
+            cprofile.enable()
+        succeeded = build(args)
+    finally:
+        if cprofile is not None:
+            cprofile.disable()
+            cprofile.dump_stats(args.profile_pstats)
+        profiler.active = None
+        build_profiler.uninstrument()
+
+    for line in build_profiler.report(args.profile_top):
+        logger.info(line)
+    if args.profile_trace:
+        build_profiler.write_trace(args.profile_trace)
+        logger.info(f'Wrote trace events to {args.profile_trace}')
+    return succeeded
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import hashlib, json, os
+
+from dep_graph import DependencyGraph, page_node
+
+
+
+MANIFEST_VERSION = 1
+MANIFEST_SECTIONS = ("pages", "static", "images", "compress", "fingerprint", "sections")
+
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Manifest:
+    def __init__(self, path):
+        self.path = path # location of the manifest JSON file
+        self.basepath = None # basepath used for the last build
+        self.templates = {} # template path -> content hash
+        self.entries = {section: {} for section in MANIFEST_SECTIONS} # section -> {source path: {"inputs": ..., "output": ...}}
+        self.seen = {section: set() for section in MANIFEST_SECTIONS} # sources visited during the current build
+        self.graph = DependencyGraph() # what each page was built from, for cross-page invalidation
+        self._hashes = {} # per-build memo of file hashes
+        self.digests = {} # path -> {"size", "mtime_ns", "hash"} from earlier builds, see stat_hash
+        self.used_digests = {} # the same for files hashed by this build; only these are saved
+
+    @classmethod
+    def load(cls, path):
+        manifest = cls(path)
+        if not os.path.exists(path):
+            return manifest
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return manifest
+        if data.get("version") != MANIFEST_VERSION:
+            return manifest
+        manifest.basepath = data.get("basepath")
+        manifest.templates = data.get("templates", {})
+        manifest.graph = DependencyGraph(data.get("graph", {}))
+        manifest.digests = data.get("digests", {})
+        for section, entries in data.get("entries", {}).items():
+            manifest.entries.setdefault(section, {}).update(entries)
+            manifest.seen.setdefault(section, set())
+        return manifest
+
+    def save(self):
+        data = {
+            "version": MANIFEST_VERSION,
+            "basepath": self.basepath,
+            "templates": self.templates,
+            "entries": self.entries,
+            "graph": self.graph.to_dict(),
+            "digests": self.used_digests,
+        }
+        directory = os.path.dirname(self.path)
+        if directory != "":
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def file_hash(self, path):
+        path = os.path.normpath(path)
+        if path not in self._hashes:
+            self._hashes[path] = hash_file(path)
+        return self._hashes[path]
+
+    def stat_hash(self, path):
+        # Content hash of a large input that is only read again when its size or mtime changed,
+        # the same test copy_static uses to skip unchanged files
+        path = os.path.normpath(path)
+        stat = os.stat(path)
+        entry = self.digests.get(path)
+        if entry is None or entry["size"] != stat.st_size or entry["mtime_ns"] != stat.st_mtime_ns:
+            entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": self.file_hash(path)}
+            self.digests[path] = entry
+        self.used_digests[path] = entry
+        return entry["hash"]
+
+    def template_hash(self, template_path):
+        digest = self.file_hash(template_path)
+        self.templates[os.path.normpath(template_path)] = digest
+        return digest
+
+    def is_fresh(self, section, src, inputs, output):
+        src = os.path.normpath(src)
+        self.seen[section].add(src)
+        entry = self.entries[section].get(src)
+        if entry is None:
+            return False
+        return entry["inputs"] == inputs and entry["output"] == os.path.normpath(output) and os.path.exists(output)
+
+    def previous_inputs(self, section, src):
+        entry = self.entries[section].get(os.path.normpath(src))
+        return None if entry is None else entry["inputs"]
+
+    def record(self, section, src, inputs, output):
+        src = os.path.normpath(src)
+        self.seen[section].add(src)
+        self.entries[section][src] = {"inputs": inputs, "output": os.path.normpath(output)}
+
+    def prune(self, root=None, sections=None):
+        # An output can move between sections (a listing replaced by a content/<dir>/index.md page and
+        # back), so files still claimed by an entry seen this build are kept. Directories left empty
+        # are removed as well, up to (not including) root. sections limits pruning to those sections.
+        removed = []
+        live = {entry["output"] for section, entries in self.entries.items() for src, entry in entries.items() if src in self.seen[section]}
+        for section, entries in self.entries.items():
+            if sections is not None and section not in sections:
+                continue
+            for src in sorted(set(entries) - self.seen[section]):
+                output = entries.pop(src)["output"]
+                if section == "pages":
+                    self.graph.remove(page_node(src))
+                if output not in live and os.path.isfile(output):
+                    os.remove(output)
+                    removed.append(output)
+                    if root is not None:
+                        remove_empty_parents(output, root)
+        return removed
+
+
+def remove_empty_parents(path, root):
+    root = os.path.abspath(root)
+    directory = os.path.dirname(os.path.abspath(path))
+    while directory != root and directory.startswith(root + os.sep):
+        try:
+            os.rmdir(directory)
+        except OSError: # not empty
+            return
+        directory = os.path.dirname(directory)
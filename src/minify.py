@@ -0,0 +1,191 @@
+import re
+
+from build_log import count
+from htmlnode import ParentNode
+
+
+
+# Whitespace between these tags and their neighbours never renders, so it is dropped rather than
+# collapsed to one space. Everything else (inline markup, text) keeps a single space.
+BLOCK_TAGS = frozenset((
+    "html", "head", "body", "title", "meta", "link", "script", "style", "base",
+    "div", "p", "article", "section", "header", "footer", "nav", "main", "aside",
+    "h1", "h2", "h3", "h4", "h5", "h6", "ul", "ol", "li", "pre", "blockquote", "hr", "br",
+    "table", "thead", "tbody", "tfoot", "tr", "td", "th", "figure", "figcaption", "form",
+))
+VOID_TAGS = frozenset(("area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"))
+
+COMMENT_PATTERN = re.compile(r'<!--(?!\[if).*?-->', re.S) # conditional comments are kept
+TAG_SPLIT_PATTERN = re.compile(r'(<[^>]*>)')
+RAW_ELEMENT_PATTERN = re.compile(r'(<(pre|textarea|script|style)\b[^>]*>)(.*?)</\2\s*>', re.S | re.I) # contents left as written
+TAG_PATTERN = re.compile(r'<(/?)([A-Za-z][\w:-]*)(.*?)(/?)>$', re.S)
+ATTRIBUTE_PATTERN = re.compile(r'([^\s"\'>/=]+)(?:\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'=<>`]+)))?')
+UNQUOTED_VALUE = re.compile(r'[^\s"\'=<>`]+') # attribute values that are valid without quotes
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+CSS_STRING = r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\''
+CSS_COMMENT_PATTERN = re.compile(rf'({CSS_STRING})|/\*.*?\*/', re.S)
+CSS_SPACE_PATTERN = re.compile(rf'({CSS_STRING})|\s*([{{}};,>])\s*|(:)\s+|\s+')
+CSS_LAST_SEMICOLON_PATTERN = re.compile(rf'({CSS_STRING})|;(?=\}})')
+
+
+def minify_attributes(props):
+    # (attributes as HTML, bytes saved by leaving quotes off)
+    if not props:
+        return "", 0
+    parts = []
+    saved = 0
+    for key, value in props.items():
+        value = str(value)
+        if UNQUOTED_VALUE.fullmatch(value):
+            parts.append(f' {key}={value}')
+            saved += 2
+        else:
+            parts.append(f' {key}="{value}"')
+    return "".join(parts), saved
+
+
+def minify_tag(tag):
+    match = TAG_PATTERN.match(tag)
+    if match is None: # <!doctype html>, <?xml ...?>, ...
+        return WHITESPACE_PATTERN.sub(" ", tag)
+    closing, name, attributes, self_closing = match.groups()
+    if closing:
+        return f'</{name}>'
+    props = {}
+    for attribute in ATTRIBUTE_PATTERN.finditer(attributes):
+        value = next((group for group in attribute.groups()[1:] if group is not None), None)
+        props[attribute.group(1)] = value
+    parts = [f'<{name}']
+    for key, value in props.items():
+        if value is None:
+            parts.append(f' {key}')
+        else:
+            parts.append(minify_attributes({key: value})[0])
+    if self_closing and name.lower() not in VOID_TAGS:
+        parts.append(" /") # a space keeps the slash out of an unquoted last value
+    parts.append(">")
+    return "".join(parts)
+
+
+def tag_name(token):
+    match = TAG_PATTERN.match(token)
+    return None if match is None else match.group(2).lower()
+
+
+def minify_html(html):
+    # For templates: compiled once per build, so a simple tokenizer is plenty fast. Drops comments,
+    # collapses whitespace (outside <pre>, <textarea>, <script> and <style>) and unneeded quotes.
+    html = COMMENT_PATTERN.sub("", html)
+    tokens = [] # text at even positions, tags (or whole raw-text elements) at odd positions
+    raw = {} # position in tokens -> match of a raw-text element
+    position = 0
+    for match in RAW_ELEMENT_PATTERN.finditer(html):
+        tokens.extend(TAG_SPLIT_PATTERN.split(html[position:match.start()]))
+        raw[len(tokens)] = match
+        tokens.append(match.group(0))
+        position = match.end()
+    tokens.extend(TAG_SPLIT_PATTERN.split(html[position:]))
+
+    output = []
+    for i, token in enumerate(tokens):
+        if i in raw:
+            open_tag, name, content = raw[i].groups()
+            output.append(minify_tag(open_tag))
+            output.append(minify_css(content) if name.lower() == "style" else content)
+            output.append(f'</{name}>')
+        elif i % 2:
+            output.append(minify_tag(token))
+        else:
+            text = WHITESPACE_PATTERN.sub(" ", token)
+            if text.startswith(" ") and (i == 0 or tag_name(tokens[i - 1]) in BLOCK_TAGS or tokens[i - 1].startswith("<!")):
+                text = text[1:]
+            if text.endswith(" ") and (i == len(tokens) - 1 or tag_name(tokens[i + 1]) in BLOCK_TAGS):
+                text = text[:-1]
+            output.append(text)
+    return "".join(output)
+
+
+def minify_css(css):
+    # Drops comments and whitespace that is not needed to separate tokens; strings are left untouched.
+    # Spaces before ":" are kept since they are significant in selectors ("a :hover").
+    def space(match):
+        if match.group(1) is not None:
+            return match.group(1)
+        if match.group(2) is not None:
+            return match.group(2)
+        if match.group(3) is not None:
+            return ":"
+        return " "
+    css = CSS_COMMENT_PATTERN.sub(lambda match: match.group(1) or "", css)
+    css = CSS_SPACE_PATTERN.sub(space, css)
+    css = CSS_LAST_SEMICOLON_PATTERN.sub(lambda match: match.group(1) or "", css)
+    return css.strip()
+
+
+def minify_css_file(data):
+    # Static file transform for copy_src_to_dest: bytes in, bytes out
+    minified = minify_css(data.decode("utf-8")).encode("utf-8")
+    count("minify", "css_bytes_saved", len(data) - len(minified))
+    return minified
+
+
+class MinifiedTree:
+    # Wraps a page's node tree for Template.write: serializes it with collapsed whitespace and
+    # unquoted attributes straight from the nodes, without re-parsing the rendered HTML.
+    def __init__(self, node):
+        self.node = node
+        self.saved = 0 # bytes saved compared to node.write_html, known once written
+
+    def text(self, value):
+        # The substring checks skip the regex for the common case of text that is already collapsed
+        if "  " not in value and "\n" not in value and "\t" not in value and "\r" not in value:
+            return value
+        collapsed = WHITESPACE_PATTERN.sub(" ", value)
+        self.saved += len(value) - len(collapsed)
+        return collapsed
+
+    def leaf_html(self, node, preformatted):
+        value = node.value
+        if not value:
+            raise ValueError("All leaf nodes must have a value")
+        if not preformatted and node.tag != "code":
+            value = self.text(value)
+        tag = node.tag
+        if not tag:
+            return value
+        if not node.props:
+            return f'<{tag}>{value}</{tag}>'
+        attributes, saved = minify_attributes(node.props)
+        self.saved += saved
+        return f'<{tag}{attributes}>{value}</{tag}>'
+
+    def open_tag(self, node):
+        if not node.tag or not node.children:
+            node.open_tag() # raises the same errors as the unminified serializer
+        if not node.props:
+            return f'<{node.tag}>'
+        attributes, saved = minify_attributes(node.props)
+        self.saved += saved
+        return f'<{node.tag}{attributes}>'
+
+    def write_html(self, buf):
+        # Same explicit-stack walk as ParentNode.iter_html, tracking whether we are inside a <pre>
+        write = buf.write
+        node = self.node
+        if not isinstance(node, ParentNode):
+            write(self.leaf_html(node, False))
+            return
+        write(self.open_tag(node))
+        stack = [(node.tag, iter(node.children), node.tag == "pre")]
+        while stack:
+            tag, children, preformatted = stack[-1]
+            for child in children:
+                if isinstance(child, ParentNode):
+                    write(self.open_tag(child))
+                    stack.append((child.tag, iter(child.children), preformatted or child.tag == "pre"))
+                    break
+                write(self.leaf_html(child, preformatted))
+            else:
+                stack.pop()
+                write(f'</{tag}>')
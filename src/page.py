@@ -0,0 +1,181 @@
+import re
+
+from block_markdown import CUSTOM_BLOCK_TYPES, HEADER_TAGS, block_to_html_node, iter_numbered_blocks
+from collections import Counter
+from htmlnode import ParentNode
+from inline_markdown import CUSTOM_INLINE_TYPES
+
+
+
+PARSER_VERSION = 5 # bump whenever parse_page output changes for the same markdown; invalidates cached pages
+FRONTMATTER_FENCE = "---"
+FRONTMATTER_LINE = re.compile(r'^([A-Za-z_][\w-]*)\s*:\s*(.*)$')
+TERM_PATTERN = re.compile(r'[^\W_]{2,}') # search terms: runs of two or more letters/digits within a word
+
+
+def parser_version():
+    # PARSER_VERSION plus the registered block and inline syntax, which also decides what the same markdown parses to
+    custom = [str(block_type) for block_type in CUSTOM_BLOCK_TYPES]
+    custom.extend(f'{text_type}={pattern}' for text_type, pattern in CUSTOM_INLINE_TYPES)
+    return f'{PARSER_VERSION}:{",".join(custom)}' if custom else str(PARSER_VERSION)
+
+
+class Page:
+    def __init__(self, node, title, metadata, headings, word_count, links, images, body_line, resolved=None, words=None):
+        self.node = node # ParentNode("div", ...) for the page body
+        self.title = title # frontmatter title, else the first line of the first h1
+        self.metadata = metadata # dict parsed from the frontmatter header
+        self.headings = headings # [(level, text), ...] in document order
+        self.word_count = word_count
+        self.links = links # [(URL as written in the markdown, line), ...] before basepath resolution
+        self.images = images # [(URL as written in the markdown, line), ...]
+        self.body_line = body_line # 1-based line number where the markdown body starts
+        self.resolved = resolved or {} # URL as written -> URL emitted in the tree, for every resolved link/image
+        self.words = words # lower-cased word -> occurrences in the body text, only on summaries that asked for them
+
+    @property
+    def template(self):
+        return self.metadata.get("template")
+
+    def resolves_like(self, resolve_url):
+        # True when resolve_url would emit the same URLs as the ones baked into this page's tree
+        for url, resolved in self.resolved.items():
+            if (url if resolve_url is None else resolve_url(url)) != resolved:
+                return False
+        return True
+
+    def count_words(self):
+        # {"hobbit's": 2, "tale,": 1, ...} over the body text; see search_terms
+        texts = []
+        stack = [self.node]
+        while stack:
+            current = stack.pop()
+            if current.children:
+                stack.extend(current.children)
+            elif current.value and current.tag != "img":
+                texts.append(current.value)
+        return dict(Counter(" ".join(texts).lower().split()))
+
+    def summary(self, words=False):
+        # Everything but the body tree, cheap to send back from worker processes. Counting words
+        # costs about a third of a parse, so it only happens for callers that need them.
+        return Page(None, self.title, self.metadata, self.headings, self.word_count, self.links, self.images, self.body_line, self.resolved, self.count_words() if words else self.words)
+
+    def __repr__(self):
+        return f'Page({self.title!r}, {len(self.headings)} headings, {self.word_count} words)'
+
+
+def search_terms(words):
+    # {"hobbit's": 2, "tale,": 1} -> {"hobbit": 2, "tale": 1}: runs of two or more letters/digits, summed
+    terms = {}
+    for word, occurrences in words.items():
+        for term in TERM_PATTERN.findall(word):
+            terms[term] = terms.get(term, 0) + occurrences
+    return terms
+
+
+def parse_scalar(value):
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    if value.startswith("[") and value.endswith("]"):
+        return [parse_scalar(item) for item in value[1:-1].split(",") if item.strip() != ""]
+    if value in ("true", "false"):
+        return value == "true"
+    return value
+
+
+def read_frontmatter(lines):
+    # Consumes the frontmatter header from a line iterator and returns (metadata, lines consumed)
+    first = next(lines, None)
+    if first is None or first.rstrip("\r\n") != FRONTMATTER_FENCE:
+        return None, first
+    metadata = {}
+    consumed = 1
+    for line in lines:
+        consumed += 1
+        line = line.rstrip("\r\n")
+        if line == FRONTMATTER_FENCE:
+            return metadata, consumed
+        match = FRONTMATTER_LINE.match(line)
+        if match is not None:
+            metadata[match.group(1)] = parse_scalar(match.group(2))
+        elif line.strip() != "" and not line.lstrip().startswith("#"):
+            raise ValueError(f'Invalid frontmatter line {consumed}: expected "key: value"')
+    raise ValueError("Invalid frontmatter: closing '---' missing")
+
+
+def split_frontmatter(lines):
+    lines = iter(lines)
+    metadata, head = read_frontmatter(lines)
+    if metadata is None:
+        body = lines if head is None else _prepend(head, lines)
+        return {}, body, 1
+    return metadata, lines, head + 1
+
+
+def _prepend(first, lines):
+    yield first
+    yield from lines
+
+
+def text_of(node):
+    # Plain text of a node tree, in document order
+    parts = []
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if current.children:
+            stack.extend(reversed(current.children))
+        elif current.value and current.tag != "img":
+            parts.append(current.value)
+    return "".join(parts)
+
+
+def parse_page(source, resolve_url=None):
+    lines = source.split("\n") if isinstance(source, str) else source
+    metadata, body, body_line = split_frontmatter(lines)
+
+    raw_urls = {} # emitted URL -> URL as written, so links/images are reported in source form
+    resolved_urls = {} # URL as written -> emitted URL, so cached trees can be checked against the current resolver
+    def recording_resolver(url):
+        resolved = url if resolve_url is None else resolve_url(url)
+        raw_urls[resolved] = url
+        resolved_urls[url] = resolved
+        return resolved
+
+    nodes = []
+    headings = []
+    links = []
+    images = []
+    word_count = 0
+    title = metadata.get("title")
+    if not isinstance(title, str) or title.strip() == "":
+        title = None # "title: [a, b]" or an empty title: the first h1 is used instead
+    for number, block in iter_numbered_blocks(body):
+        node = block_to_html_node(block, recording_resolver)
+        nodes.append(node)
+        if node.tag in HEADER_TAGS:
+            text = text_of(node)
+            headings.append((int(node.tag[1]), text))
+            if title is None and node.tag == "h1":
+                title = text.split("\n", 1)[0].strip()
+
+        stack = [node]
+        position = 0 # links and images are met in source order, so each is searched for after the last
+        while stack:
+            current = stack.pop()
+            if current.children:
+                stack.extend(reversed(current.children))
+            elif current.tag == "a" or current.tag == "img":
+                resolved = current.props["href" if current.tag == "a" else "src"]
+                url = raw_urls.get(resolved, resolved)
+                found = block.find(f'({url}', position)
+                if found != -1:
+                    position = found
+                line = body_line - 1 + number + block.count("\n", 0, position)
+                (links if current.tag == "a" else images).append((url, line))
+            if current.value and current.tag != "img":
+                word_count += len(current.value.split())
+
+    return Page(ParentNode("div", nodes), title, metadata, headings, word_count, links, images, body_line, resolved_urls)
@@ -1,41 +1,226 @@
-import os, sys
+import os, profiler, tempfile
 
-from block_markdown import markdown_to_html_node, extract_title
+from build_log import count, logger
+from concurrent.futures import ProcessPoolExecutor
+from dep_graph import canonical_url, page_node, site_directory, site_url, template_node, url_node
+from minify import MinifiedTree
+from page import parse_page, read_frontmatter
 from pathlib import Path
+from template import load_template, template_path_for
+from textnode import basepath_resolver
 
 
 
-def generate_page(from_path, template_path, dest_path, basepath):
-    print(f'Generating page from {from_path} to {dest_path} using {template_path}')
+def generate_page(from_path, template_path, dest_path, basepath, cache=None, images=None, assets=None, minify=False):
+    # Returns the parsed page, whether it came from the cache and the bytes minification saved
+    logger.debug(f'Generating page from {from_path} to {dest_path} using {template_path}')
 
+    with profiler.phase("read"):
+        with open(from_path) as f:
+            from_content = f.read()
+    resolve_url = basepath_resolver(basepath, None if assets is None else assets.urls)
+    page = None
+    if cache is not None:
+        with profiler.phase("cache_read"):
+            key = cache.key(from_content, basepath)
+            page = cache.get(key)
+            if page is not None and not page.resolves_like(resolve_url):
+                page = None # parsed before a fingerprinted asset it links to changed
+    cache_hit = page is not None
+    if not cache_hit:
+        page = render_markdown(from_content, resolve_url)
+        if cache is not None:
+            with profiler.phase("cache_write"):
+                try:
+                    cache.put(key, page)
+                except Exception as e:
+                    logger.debug(f'Not caching {from_path}: {type(e).__name__}: {e}')
+    if images is not None:
+        # After the cache write: image sizes come from the images, not the markdown
+        with profiler.phase("annotate_images"):
+            images.annotate(page.node, dest_path, basepath)
+    with profiler.phase("load_template"):
+        template = load_template(template_path_for(template_path, page.template), basepath, assets, minify)
+    if not minify:
+        write_page(template, page.title, page.node, dest_path)
+        return page, cache_hit, 0
+    tree = MinifiedTree(page.node)
+    write_page(template, page.title, tree, dest_path)
+    saved = template.saved + tree.saved
+    logger.debug(f'Minified {dest_path}: {saved} bytes saved')
+    return page, cache_hit, saved
+
+
+def render_markdown(from_content, resolve_url=None):
+    # One parse pass yields the body tree, the title and the rest of the page metadata
+    with profiler.phase("parse_page"):
+        page = parse_page(from_content, resolve_url)
+    if page.title is None:
+        raise ValueError("No title found: Markdown must contain a block starting with '# ' to be used as title")
+    return page
+
+
+def select_template_path(from_path, template_path):
+    # Only the frontmatter header is read; the body is left for the render pass
     with open(from_path) as f:
-        from_content = f.read()
-    with open(template_path) as f:
-        template_content = f.read()
-    
-    from_html_node = markdown_to_html_node(from_content)
-    from_html = from_html_node.to_html()
-    from_title = extract_title(from_content)
+        metadata, _ = read_frontmatter(f)
+    return template_path_for(template_path, None if metadata is None else metadata.get("template"))
 
-    full_content = template_content.replace("{{ Title }}", from_title).replace("{{ Content }}", from_html)
-    full_content = full_content.replace('href="/', f'href="{basepath}').replace('src="/', f'src="{basepath}')
 
+def write_page(template, from_title, from_html, dest_path):
+    # from_html is either a rendered string or a node tree; trees are serialized straight into the
+    # file so the full page never exists as one string. The temp file + rename keeps the old page
+    # in place if rendering fails part-way.
     dest_dir_path = os.path.dirname(dest_path)
-    if not os.path.exists(dest_dir_path) and os.path.dirname(dest_dir_path) != "":
-        os.makedirs(dest_dir_path)
-    
-    with open(dest_path, "w") as f:
-        f.write(full_content)
+    if dest_dir_path != "":
+        os.makedirs(dest_dir_path, exist_ok=True)
+
+    with profiler.phase("write"):
+        fd, tmp_path = tempfile.mkstemp(dir=dest_dir_path or ".", prefix=".", suffix=".tmp")
+        try:
+            with open(fd, "w", buffering=64 * 1024) as f:
+                template.write(f, Title=from_title, Content=from_html)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, dest_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
 
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath):
-    for item in os.listdir(dir_path_content):
+def discover_pages(dir_path_content, dest_dir_path):
+    pages = []
+    for item in sorted(os.listdir(dir_path_content)):
         src_item = os.path.join(dir_path_content, item)
         dest_item = os.path.join(dest_dir_path, item)
 
         if os.path.isdir(src_item):
-            generate_pages_recursive(src_item, template_path, dest_item, basepath)
-        
+            pages.extend(discover_pages(src_item, dest_item))
+
         elif os.path.isfile(src_item) and src_item.endswith(".md"):
-            dest_item = Path(dest_item).with_suffix(".html")
-            generate_page(src_item, template_path, dest_item, basepath)
+            pages.append((src_item, str(Path(dest_item).with_suffix(".html"))))
+    return pages
+
+
+def render_batch(batch, template_path, basepath, cache=None, images=None, assets=None, minify=False, words=False):
+    # One (source path, error or None, cache hit, page summary or None, bytes saved by minification) result per page
+    results = []
+    for from_path, dest_path in batch:
+        try:
+            with profiler.page(from_path):
+                page, cache_hit, saved = generate_page(from_path, template_path, dest_path, basepath, cache, images, assets, minify)
+            results.append((from_path, None, cache_hit, page.summary(words), saved))
+        except Exception as e:
+            results.append((from_path, f'{type(e).__name__}: {e}', False, None, 0))
+    return results
+
+
+def render_pages(pages, template_path, basepath, jobs=1, cache=None, images=None, assets=None, minify=False, words=False):
+    # Yields render_batch results in page order, each batch as soon as it is done, so callers can
+    # work on finished pages while the remaining batches are still rendering
+    if jobs <= 1 or len(pages) <= 1:
+        yield from render_batch(pages, template_path, basepath, cache, images, assets, minify, words)
+        return
+
+    chunk_size = max(1, min(64, len(pages) // (jobs * 4)))
+    batches = [pages[i:i + chunk_size] for i in range(0, len(pages), chunk_size)]
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(render_batch, batch, template_path, basepath, cache, images, assets, minify, words) for batch in batches]
+        for future in futures:
+            yield from future.result()
+
+
+def page_dependencies(page, template_path, dest_path, dest_dir_path):
+    directory = site_directory(dest_path, dest_dir_path)
+    dependencies = {template_node(template_path_for(template_path, page.template))}
+    for url, _ in page.links + page.images:
+        url = canonical_url(url, directory)
+        if url is not None:
+            dependencies.add(url_node(url))
+    return dependencies
+
+
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath, manifest=None, jobs=1, cache=None, changed_urls=(), on_page=None, images=None, assets=None, minify=False, words=False):
+    # changed_urls are site URLs of static files written by this build; pages referencing them are rebuilt.
+    # on_page(src, dest, page summary) is called for each rendered page while later pages still render.
+    # images is an ImageIndex used to add sizes and srcsets to img tags; assets an AssetMap of fingerprinted URLs.
+    # minify writes pages through the minified template and node serializer; words adds word counts to the summaries.
+    errors = []
+    with profiler.phase("discover"):
+        discovered = discover_pages(dir_path_content, dest_dir_path)
+        inputs_by_src = {}
+        stale = set()
+        failed = set()
+        changed = {url_node(url) for url in changed_urls}
+        for src_item, dest_item in discovered:
+            if manifest is None:
+                stale.add(src_item)
+                continue
+
+            try:
+                page_template_path = select_template_path(src_item, template_path)
+                inputs = {
+                    "source": manifest.file_hash(src_item),
+                    "template": manifest.template_hash(page_template_path),
+                    "basepath": basepath,
+                }
+                if assets is not None:
+                    # Fingerprints of the assets the template itself references
+                    inputs["assets"] = assets.digest(load_template(page_template_path, basepath, assets).asset_urls)
+            except Exception as e:
+                # Reported with the render failures, so one bad header does not hide the others
+                errors.append(f'{src_item}: {type(e).__name__}: {e}')
+                failed.add(src_item)
+                count("pages", "failed")
+                continue
+            if images is not None and images.key is not None:
+                # Widths and variants listed in srcset; pages must not keep pointing at pruned variants
+                inputs["images"] = images.key
+            if minify:
+                inputs["minify"] = True
+            inputs_by_src[src_item] = inputs
+            previous = manifest.previous_inputs("pages", src_item)
+            if previous is None or previous.get("source") != inputs["source"]:
+                changed.add(url_node(site_url(dest_item, dest_dir_path)))
+            if not manifest.is_fresh("pages", src_item, inputs, dest_item):
+                stale.add(src_item)
+
+        dependents = set()
+        if manifest is not None:
+            known = {os.path.normpath(src_item) for src_item, _ in discovered}
+            for src_item, entry in manifest.entries["pages"].items():
+                if src_item not in known:
+                    changed.add(url_node(site_url(entry["output"], dest_dir_path)))
+            dependents = manifest.graph.rebuild_set(changed)
+
+        work = []
+        for src_item, dest_item in discovered:
+            if src_item in failed:
+                continue
+            if src_item in stale:
+                work.append((src_item, dest_item))
+            elif page_node(src_item) in dependents:
+                work.append((src_item, dest_item))
+                count("pages", "dependents")
+            else:
+                count("pages", "unchanged")
+
+    destinations = dict(work)
+    for src_item, error, cache_hit, page, saved in render_pages(work, template_path, basepath, jobs, cache, images, assets, minify, words):
+        dest_item = destinations[src_item]
+        if cache is not None and error is None:
+            count("cache", "hit" if cache_hit else "miss")
+        if error is not None:
+            errors.append(f'{src_item}: {error}')
+            count("pages", "failed")
+            continue
+        count("pages", "rendered")
+        if minify:
+            count("minify", "pages")
+            count("minify", "bytes_saved", saved)
+        if manifest is not None:
+            manifest.record("pages", src_item, inputs_by_src[src_item], dest_item)
+            manifest.graph.set_dependencies(page_node(src_item), page_dependencies(page, template_path, dest_item, dest_dir_path))
+        if on_page is not None:
+            on_page(src_item, dest_item, page)
+    if errors:
+        raise ValueError(f'Failed to generate {len(errors)} page(s):\n' + "\n".join(errors))
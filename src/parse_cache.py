@@ -0,0 +1,91 @@
+import hashlib, os, pickle, shutil, tempfile
+
+from build_log import logger
+from page import parser_version
+
+
+
+CACHE_DIR = "./.build/cache"
+DEFAULT_MAX_BYTES = 256 << 20
+ENTRY_SUFFIX = ".pickle"
+
+
+class ParseCache:
+    # Parsed pages on disk, one pickle per entry under <directory>/<key[:2]>/<key[2:]>.pickle.
+    # A hit bumps the entry's mtime, so eviction by oldest mtime is least-recently-used.
+    def __init__(self, directory=CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def key(self, source, basepath):
+        # The basepath is part of the key because it is resolved into link and image URLs while parsing
+        digest = hashlib.sha256(f'{parser_version()}\0{basepath}\0'.encode())
+        digest.update(source.encode())
+        return digest.hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.directory, key[:2], key[2:] + ENTRY_SUFFIX)
+
+    def get(self, key):
+        path = self.path_for(key)
+        try:
+            with open(path, "rb") as f:
+                page = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.debug(f'Ignoring unreadable cache entry {path}: {type(e).__name__}: {e}')
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return page
+
+    def put(self, key, page):
+        path = self.path_for(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        data = pickle.dumps(page, protocol=pickle.HIGHEST_PROTOCOL)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+        try:
+            with open(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def entries(self):
+        # [(mtime_ns, size, path), ...] oldest first
+        found = []
+        if not os.path.isdir(self.directory):
+            return found
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(ENTRY_SUFFIX):
+                    stat = entry.stat()
+                    found.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        found.sort()
+        return found
+
+    def evict(self):
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        if os.path.exists(self.directory):
+            shutil.rmtree(self.directory)
@@ -0,0 +1,125 @@
+import functools, json, math, time
+
+from contextlib import contextmanager, nullcontext
+
+
+
+active = None # the BuildProfiler collecting timings, if --profile is on
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+class BuildProfiler:
+    def __init__(self):
+        self.pages = {} # page path -> {phase: exclusive seconds}
+        self.build_phases = {} # phases outside any page (static copy, prune, ...) -> seconds
+        self.events = [] # (phase, page, start, duration) for the trace-event export
+        self.current_page = None
+        self._stack = [] # [phase, start, time spent in nested phases]
+        self._origin = time.perf_counter()
+        self._patched = []
+
+    @contextmanager
+    def page(self, path):
+        self.current_page = str(path)
+        self.pages.setdefault(self.current_page, {})
+        try:
+            yield
+        finally:
+            self.current_page = None
+
+    @contextmanager
+    def phase(self, name):
+        frame = [name, time.perf_counter(), 0.0]
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            duration = time.perf_counter() - frame[1]
+            if self._stack:
+                self._stack[-1][2] += duration
+            target = self.build_phases if self.current_page is None else self.pages[self.current_page]
+            target[name] = target.get(name, 0.0) + duration - frame[2]
+            self.events.append((name, self.current_page, frame[1] - self._origin, duration))
+
+    def instrument(self, module, name):
+        # Wraps a hot module-level function only while profiling, so normal builds pay nothing
+        original = getattr(module, name)
+
+        @functools.wraps(original)
+        def timed(*args, **kwargs):
+            with self.phase(name):
+                return original(*args, **kwargs)
+
+        setattr(module, name, timed)
+        self._patched.append((module, name, original))
+
+    def uninstrument(self):
+        for module, name, original in reversed(self._patched):
+            setattr(module, name, original)
+        self._patched.clear()
+
+    def phase_totals(self):
+        totals = dict(self.build_phases)
+        for phases in self.pages.values():
+            for name, seconds in phases.items():
+                totals[name] = totals.get(name, 0.0) + seconds
+        return totals
+
+    def report(self, top=10):
+        totals = self.phase_totals()
+        grand_total = sum(totals.values()) or 1.0
+        lines = [f'{"phase":<24}{"total ms":>12}{"share":>8}{"p50 ms":>10}{"p95 ms":>10}{"max ms":>10}']
+        for name, seconds in sorted(totals.items(), key=lambda item: item[1], reverse=True):
+            line = f'{name:<24}{seconds * 1e3:>12.2f}{seconds / grand_total:>8.1%}'
+            per_page = sorted(phases[name] for phases in self.pages.values() if name in phases)
+            if per_page:
+                line += f'{percentile(per_page, 0.5) * 1e3:>10.3f}{percentile(per_page, 0.95) * 1e3:>10.3f}{per_page[-1] * 1e3:>10.3f}'
+            lines.append(line)
+
+        page_totals = sorted(((sum(phases.values()), page) for page, phases in self.pages.items()), reverse=True)
+        if page_totals:
+            ordered = sorted(seconds for seconds, _ in page_totals)
+            lines.append(
+                f'{len(page_totals)} pages: p50 {percentile(ordered, 0.5) * 1e3:.3f} ms, '
+                f'p95 {percentile(ordered, 0.95) * 1e3:.3f} ms, p99 {percentile(ordered, 0.99) * 1e3:.3f} ms'
+            )
+            lines.append(f'Slowest {min(top, len(page_totals))} pages:')
+            for seconds, page in page_totals[:top]:
+                lines.append(f'  {seconds * 1e3:10.3f} ms  {page}')
+        return lines
+
+    def write_trace(self, path):
+        trace = [
+            {
+                "name": name,
+                "cat": page or "build",
+                "ph": "X",
+                "ts": round(start * 1e6, 3),
+                "dur": round(duration * 1e6, 3),
+                "pid": 1,
+                "tid": 1,
+                "args": {"page": page} if page else {},
+            }
+            for name, page, start, duration in self.events
+        ]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+
+
+def phase(name):
+    if active is None:
+        return nullcontext()
+    return active.phase(name)
+
+
+def page(path):
+    if active is None:
+        return nullcontext()
+    return active.page(path)
@@ -0,0 +1,220 @@
+import itertools, json, os
+
+from build_log import count, logger
+from collections import Counter
+from htmlnode import LeafNode, ParentNode
+from inline_markdown import text_to_textnodes
+from manifest import hash_bytes
+from minify import MinifiedTree
+from page import read_frontmatter
+from page_generator import write_page
+from site_files import output_url, parse_date
+from template import load_template
+from textnode import basepath_resolver
+
+
+
+SECTION_PAGE_SIZE = 10
+PAGINATION_DIR = "page" # page n > 1 of a section is written to <section>/page/<n>/index.html
+
+
+class PageEntry:
+    # A page as section listings show it, read from its frontmatter and title line only
+    def __init__(self, src, url, title, date=None, summary=None):
+        self.src = src
+        self.url = url # site URL, see output_url
+        self.title = title
+        self.date = date # frontmatter date as written, or None
+        self.summary = summary # frontmatter summary, or None
+
+    def sort_key(self):
+        # Newest first, undated pages last, then by title
+        published = parse_date(self.date)
+        return (published is None, -published.timestamp() if published is not None else 0, self.title)
+
+    def to_dict(self):
+        return {"url": self.url, "title": self.title, "date": self.date, "summary": self.summary}
+
+    def __repr__(self):
+        return f'PageEntry({self.url!r}, {self.title!r})'
+
+
+def first_heading(lines):
+    # Plain text of the first "# " line that starts a block outside code fences, like parse_page's title
+    in_fence = False
+    previous_blank = True
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if line.strip().startswith("```"):
+            in_fence = not in_fence
+        elif not in_fence and previous_blank and line.startswith("# "):
+            return "".join(node.text for node in text_to_textnodes(line[2:])).strip()
+        previous_blank = line.strip() == ""
+    return None
+
+
+def read_entry(src, dest, dest_dir):
+    with open(src) as f:
+        metadata, first = read_frontmatter(f)
+        if metadata is None:
+            metadata = {}
+            lines = f if first is None else itertools.chain([first], f)
+        else:
+            lines = f
+        title = metadata.get("title")
+        if not isinstance(title, str):
+            title = first_heading(lines)
+    date = metadata.get("date")
+    summary = metadata.get("summary")
+    title = title or os.path.splitext(os.path.basename(src))[0]
+    return PageEntry(src, output_url(dest, dest_dir), title, date if isinstance(date, str) else None, summary if isinstance(summary, str) else None)
+
+
+def section_of(src, content_dir):
+    # content/blog/tom/index.md and content/blog/post.md are both listed by content/blog
+    directory = os.path.dirname(os.path.normpath(src))
+    if os.path.basename(src) == "index.md":
+        directory = os.path.dirname(directory)
+    relative = os.path.relpath(directory or ".", content_dir)
+    return None if relative == ".." or relative.startswith(".." + os.sep) else directory
+
+
+class SectionPage:
+    # One page of a section listing
+    def __init__(self, section, title, number, count, entries, dest, url):
+        self.section = section # content directory listed
+        self.title = title
+        self.number = number # 1-based
+        self.count = count # pages in the section
+        self.entries = entries # PageEntry list for this page, in listing order
+        self.dest = dest
+        self.url = url
+        self.previous_url = None
+        self.next_url = None
+
+    @property
+    def key(self):
+        # Manifest key: pages of a section that stop existing are pruned like removed sources
+        return os.path.join(self.section, PAGINATION_DIR, str(self.number))
+
+    def to_dict(self):
+        return {
+            "title": self.title,
+            "entries": [entry.to_dict() for entry in self.entries],
+            "previous": self.previous_url,
+            "next": self.next_url,
+        }
+
+    def lastmod(self):
+        # Newest date listed, for the sitemap
+        dates = [published for published in (parse_date(entry.date) for entry in self.entries) if published is not None]
+        return max(dates).date().isoformat() if dates else None
+
+    def count_words(self):
+        # Same shape as Page.count_words, over the text the listing shows
+        texts = [self.title]
+        for entry in self.entries:
+            texts.append(entry.title)
+            if entry.summary:
+                texts.append(entry.summary)
+        return dict(Counter(" ".join(texts).lower().split()))
+
+    def to_node(self, resolve_url=None):
+        resolve = resolve_url or (lambda url: url)
+        items = []
+        for entry in self.entries:
+            children = [LeafNode("a", entry.title, {"href": resolve(entry.url)})]
+            if entry.date is not None:
+                children.append(LeafNode(None, " "))
+                children.append(LeafNode("time", entry.date, {"datetime": entry.date}))
+            if entry.summary:
+                children.append(LeafNode(None, f' - {entry.summary}'))
+            items.append(ParentNode("li", children))
+        nodes = [LeafNode("h1", self.title)]
+        if items:
+            nodes.append(ParentNode("ul", items))
+        navigation = []
+        if self.previous_url is not None:
+            navigation.append(LeafNode("a", "Newer", {"href": resolve(self.previous_url), "rel": "prev"}))
+        if self.next_url is not None:
+            if navigation:
+                navigation.append(LeafNode(None, " "))
+            navigation.append(LeafNode("a", "Older", {"href": resolve(self.next_url), "rel": "next"}))
+        if navigation:
+            nodes.append(ParentNode("nav", navigation))
+        return ParentNode("div", nodes)
+
+    def __repr__(self):
+        return f'SectionPage({self.url!r}, {len(self.entries)} entries)'
+
+
+def section_title(section, number):
+    title = os.path.basename(section).replace("-", " ").replace("_", " ").title()
+    return title if number == 1 else f'{title} (page {number})'
+
+
+def plan_sections(pages, content_dir, dest_dir, page_size=SECTION_PAGE_SIZE):
+    # Listing pages for every content directory that has pages below it but no index.md of its own.
+    # Only the frontmatter and title line of member pages are read; all entries are sorted once and
+    # then split by section, which keeps each section's order.
+    has_index = {os.path.dirname(os.path.normpath(src)) for src, _ in pages if os.path.basename(src) == "index.md"}
+    entries = []
+    for src, dest in pages:
+        section = section_of(src, content_dir)
+        if section is None or section in has_index:
+            continue
+        try:
+            entries.append((section, read_entry(src, dest, dest_dir)))
+        except (OSError, ValueError) as e:
+            # Left out of the listing; rendering the page reports the same error as a failed page
+            logger.warning(f'Not listing {src}: {type(e).__name__}: {e}')
+            count("sections", "failed")
+    entries.sort(key=lambda item: item[1].sort_key())
+
+    by_section = {}
+    for section, entry in entries:
+        by_section.setdefault(section, []).append(entry)
+
+    planned = []
+    for section in sorted(by_section):
+        members = by_section[section]
+        section_dest = os.path.join(dest_dir, os.path.relpath(section, content_dir))
+        count_ = (len(members) + page_size - 1) // page_size
+        section_pages = []
+        for number in range(1, count_ + 1):
+            if number == 1:
+                dest = os.path.join(section_dest, "index.html")
+            else:
+                dest = os.path.join(section_dest, PAGINATION_DIR, str(number), "index.html")
+            chunk = members[(number - 1) * page_size:number * page_size]
+            section_pages.append(SectionPage(section, section_title(section, number), number, count_, chunk, dest, output_url(dest, dest_dir)))
+        for previous, following in zip(section_pages, section_pages[1:]):
+            previous.next_url = following.url
+            following.previous_url = previous.url
+        planned.extend(section_pages)
+    return planned
+
+
+def generate_section_pages(section_pages, template_path, basepath, manifest=None, assets=None, minify=False):
+    # Writes the planned listing pages through the default template. A page is only rewritten when
+    # what it shows changed, so editing one post regenerates the one page listing it (or, if its
+    # date moved it, the pages between its old and new position).
+    resolve_url = basepath_resolver(basepath, None if assets is None else assets.urls)
+    template = load_template(template_path, basepath, assets, minify)
+    for section_page in section_pages:
+        inputs = {"listing": hash_bytes(json.dumps(section_page.to_dict(), sort_keys=True).encode()), "basepath": basepath}
+        if manifest is not None:
+            inputs["template"] = manifest.template_hash(template_path)
+            if assets is not None:
+                inputs["assets"] = assets.digest(template.asset_urls)
+            if minify:
+                inputs["minify"] = True
+            if manifest.is_fresh("sections", section_page.key, inputs, section_page.dest):
+                count("sections", "unchanged")
+                continue
+        logger.debug(f'Generating section page {section_page.dest}')
+        node = section_page.to_node(resolve_url)
+        write_page(template, section_page.title, MinifiedTree(node) if minify else node, section_page.dest)
+        count("sections", "rendered")
+        if manifest is not None:
+            manifest.record("sections", section_page.key, inputs, section_page.dest)
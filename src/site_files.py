@@ -0,0 +1,307 @@
+import heapq, json, os, shutil
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from xml.sax.saxutils import escape
+
+from build_log import count, logger
+from manifest import hash_bytes, hash_file
+from page import parse_page, search_terms
+
+
+
+RECORDS_DIR = "./.build/records"
+SITEMAP_MAX_URLS = 50000 # per file, the limit of the sitemaps protocol
+FEED_SECTION = "blog" # content directory whose pages make up feed.xml
+FEED_LIMIT = 20
+SEARCH_DIR = "search"
+SEARCH_INDEX_VERSION = 1
+SEARCH_FLUSH_POSTINGS = 100000 # postings buffered in memory before they are spilled to shard files
+
+
+def output_url(dest_path, dest_dir):
+    # URL a page is served at: docs/blog/tom/index.html -> /blog/tom/, docs/about.html -> /about.html
+    relative = os.path.relpath(dest_path, dest_dir).replace(os.sep, "/")
+    if relative == "index.html":
+        return "/"
+    if relative.endswith("/index.html"):
+        return "/" + relative[:-len("index.html")]
+    return "/" + relative
+
+
+def parse_date(value):
+    # Frontmatter dates are YYYY-MM-DD (or a full ISO timestamp); anything else is ignored
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo is not None else parsed.replace(tzinfo=timezone.utc)
+
+
+class PageRecord:
+    # What the sitemap, feed and search index need from a page; small enough to keep one per page on disk
+    def __init__(self, source, url, title, date=None, summary=None, terms=None):
+        self.source = source # content hash of the markdown the record was made from
+        self.url = url # site URL, see output_url
+        self.title = title
+        self.date = date # frontmatter date as written, or None
+        self.summary = summary # frontmatter summary, or None
+        self.terms = terms # search term -> occurrences, or None when the page's words were not counted
+
+    def to_dict(self):
+        return {"source": self.source, "url": self.url, "title": self.title, "date": self.date, "summary": self.summary, "terms": self.terms}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["source"], data["url"], data["title"], data["date"], data["summary"], data["terms"])
+
+    @classmethod
+    def from_page(cls, source, url, page):
+        date = page.metadata.get("date")
+        summary = page.metadata.get("summary")
+        terms = None if page.words is None else search_terms(page.words)
+        return cls(source, url, page.title, date if isinstance(date, str) else None, summary if isinstance(summary, str) else None, terms)
+
+    def __repr__(self):
+        return f'PageRecord({self.url!r}, {self.title!r})'
+
+
+class RecordStore:
+    # One JSON record per page under <directory>/<key[:2]>/<key[2:]>.json, keyed by source path
+    def __init__(self, directory=RECORDS_DIR):
+        self.directory = directory
+
+    def path_for(self, src):
+        key = hash_bytes(os.path.normpath(src).encode())
+        return os.path.join(self.directory, key[:2], key[2:] + ".json")
+
+    def get(self, src):
+        try:
+            with open(self.path_for(src)) as f:
+                return PageRecord.from_dict(json.load(f))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logger.debug(f'Ignoring unreadable record for {src}: {type(e).__name__}: {e}')
+            return None
+
+    def put(self, src, record):
+        path = self.path_for(src)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "w") as f:
+            json.dump(record.to_dict(), f)
+        os.replace(path + ".tmp", path)
+
+    def prune(self, sources):
+        # Removes the records of pages that no longer exist
+        keep = {self.path_for(src) for src in sources}
+        removed = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                if path not in keep:
+                    os.remove(path)
+                    removed += 1
+        return removed
+
+
+class SitemapWriter:
+    # Streams <url> entries into sitemap-1.xml, sitemap-2.xml, ... of at most max_urls each. A single
+    # file becomes sitemap.xml; several are listed by a sitemap.xml index.
+    def __init__(self, dest_dir, base_url, max_urls=SITEMAP_MAX_URLS):
+        self.dest_dir = dest_dir
+        self.base_url = base_url
+        self.max_urls = max_urls
+        self.files = [] # sitemap-N.xml names, in order
+        self.file = None
+        self.urls = 0 # entries in the open file
+        self.total = 0
+
+    def add(self, url, lastmod=None):
+        if self.file is None or self.urls == self.max_urls:
+            self.close_file()
+            self.files.append(f'sitemap-{len(self.files) + 1}.xml')
+            self.file = open(os.path.join(self.dest_dir, self.files[-1]), "w")
+            self.file.write('<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+            self.urls = 0
+        entry = f'<url><loc>{escape(self.base_url + url)}</loc>'
+        if lastmod is not None:
+            entry += f'<lastmod>{lastmod}</lastmod>'
+        self.file.write(entry + "</url>\n")
+        self.urls += 1
+        self.total += 1
+
+    def close_file(self):
+        if self.file is not None:
+            self.file.write("</urlset>\n")
+            self.file.close()
+            self.file = None
+
+    def close(self):
+        # Returns the files written, sitemap.xml first
+        self.close_file()
+        count("site_files", "sitemap_urls", self.total)
+        sitemap_path = os.path.join(self.dest_dir, "sitemap.xml")
+        for name in os.listdir(self.dest_dir):
+            if name.startswith("sitemap-") and name.endswith(".xml") and name not in self.files:
+                os.remove(os.path.join(self.dest_dir, name)) # left over from a build with more pages
+        if len(self.files) <= 1:
+            if self.files:
+                os.replace(os.path.join(self.dest_dir, self.files[0]), sitemap_path)
+            else:
+                with open(sitemap_path, "w") as f:
+                    f.write('<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n</urlset>\n')
+            return ["sitemap.xml"]
+        with open(sitemap_path, "w") as f:
+            f.write('<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+            for name in self.files:
+                f.write(f'<sitemap><loc>{escape(self.base_url)}/{name}</loc></sitemap>\n')
+            f.write("</sitemapindex>\n")
+        return ["sitemap.xml"] + self.files
+
+
+def write_feed(path, base_url, title, records):
+    # RSS 2.0; records are newest first
+    with open(path, "w") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<rss version="2.0">\n<channel>\n')
+        f.write(f'<title>{escape(title)}</title>\n<link>{escape(base_url)}/</link>\n<description>{escape(title)}</description>\n')
+        for record in records:
+            link = escape(base_url + record.url)
+            f.write(f'<item><title>{escape(record.title)}</title><link>{link}</link><guid>{link}</guid>')
+            published = parse_date(record.date)
+            if published is not None:
+                f.write(f'<pubDate>{format_datetime(published)}</pubDate>')
+            if record.summary:
+                f.write(f'<description>{escape(record.summary)}</description>')
+            f.write("</item>\n")
+        f.write("</channel>\n</rss>\n")
+
+
+def shard_name(term):
+    # Terms are sharded by their first character, so a client only fetches the shards of its query terms
+    first = term[0]
+    return first if first.isascii() and first.isalnum() else "_"
+
+
+class SearchIndexWriter:
+    # Builds search/index.json (document list and shard names) and search/<shard>.json, each mapping
+    # term -> [document, occurrences, document, occurrences, ...]. Postings are spilled to per-shard
+    # files as they come in, so only one shard is ever held in memory as a whole.
+    def __init__(self, directory, flush_postings=SEARCH_FLUSH_POSTINGS):
+        self.directory = directory
+        self.flush_postings = flush_postings
+        self.documents = [] # [url, title] per document id
+        self.pending = {} # shard -> buffered "term document occurrences" lines
+        self.buffered = 0
+        if os.path.exists(directory):
+            shutil.rmtree(directory)
+        os.makedirs(directory)
+
+    def add(self, url, title, terms):
+        document = len(self.documents)
+        self.documents.append([url, title])
+        for term, occurrences in terms.items():
+            self.pending.setdefault(shard_name(term), []).append(f'{term} {document} {occurrences}\n')
+        self.buffered += len(terms)
+        if self.buffered >= self.flush_postings:
+            self.flush()
+
+    def flush(self):
+        for shard, lines in self.pending.items():
+            with open(os.path.join(self.directory, f'{shard}.postings'), "a") as f:
+                f.writelines(lines)
+        self.pending = {}
+        self.buffered = 0
+
+    def close(self):
+        self.flush()
+        shards = []
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(".postings"):
+                continue
+            postings = {}
+            with open(os.path.join(self.directory, name)) as f:
+                for line in f:
+                    term, document, occurrences = line.split()
+                    postings.setdefault(term, []).extend((int(document), int(occurrences)))
+            shard = name[:-len(".postings")]
+            with open(os.path.join(self.directory, f'{shard}.json'), "w") as f:
+                json.dump(postings, f, separators=(",", ":"), sort_keys=True)
+            os.remove(os.path.join(self.directory, name))
+            shards.append(shard)
+        with open(os.path.join(self.directory, "index.json"), "w") as f:
+            json.dump({"version": SEARCH_INDEX_VERSION, "documents": self.documents, "shards": shards}, f, separators=(",", ":"))
+        count("search", "documents", len(self.documents))
+        count("search", "shards", len(shards))
+
+
+class SiteFiles:
+    # Post-render stage writing sitemap.xml, feed.xml and the search index in one pass over the pages.
+    # record_page is the on_page hook of generate_pages_recursive: rendered pages hand over their
+    # records there; pages skipped by an incremental build reuse the record stored by an earlier build.
+    # With search, pages must be rendered with words=True so their summaries carry word counts.
+    def __init__(self, content_dir, dest_dir, manifest=None, store=None, feed_section=FEED_SECTION, search=False):
+        self.content_dir = content_dir
+        self.dest_dir = dest_dir
+        self.manifest = manifest
+        self.store = store or RecordStore()
+        self.feed_section = os.path.normpath(os.path.join(content_dir, feed_section))
+        self.search = search
+
+    def source_hash(self, src):
+        return self.manifest.file_hash(src) if self.manifest is not None else hash_file(src)
+
+    def record_page(self, src, dest, page):
+        self.store.put(src, PageRecord.from_page(self.source_hash(src), output_url(dest, self.dest_dir), page))
+
+    def record_for(self, src, dest):
+        digest = self.source_hash(src)
+        record = self.store.get(src)
+        if record is not None and record.source == digest and (record.terms is not None or not self.search):
+            return record
+        # No usable record (new page, edited page, or no terms yet): parse it, without rendering
+        with open(src) as f:
+            page = parse_page(f.read())
+        record = PageRecord.from_page(digest, output_url(dest, self.dest_dir), page.summary(self.search))
+        self.store.put(src, record)
+        count("site_files", "parsed")
+        return record
+
+    def write(self, pages, base_url=None, basepath="/", listings=()):
+        # pages are the (source, destination) pairs of every page on the site, in discovery order;
+        # listings the generated section pages (see sections.plan_sections), which have no source.
+        # The sitemap and feed need absolute URLs and are only written when base_url is given.
+        prefix = None if base_url is None else base_url.rstrip("/") + basepath.rstrip("/")
+        sitemap = None if prefix is None else SitemapWriter(self.dest_dir, prefix)
+        index = SearchIndexWriter(os.path.join(self.dest_dir, SEARCH_DIR)) if self.search else None
+        newest = [] # heap of the FEED_LIMIT newest feed records
+        home_title = None
+        for position, (src, dest) in enumerate(pages):
+            record = self.record_for(src, dest)
+            published = parse_date(record.date)
+            if record.url == "/":
+                home_title = record.title
+            if sitemap is not None:
+                sitemap.add(record.url, None if published is None else published.date().isoformat())
+            if index is not None:
+                index.add(basepath.rstrip("/") + record.url, record.title, record.terms)
+            if prefix is not None and os.path.normpath(src).startswith(self.feed_section + os.sep):
+                # Undated pages sort before every dated one and so are the first to be dropped
+                key = (published is not None, published or datetime.min.replace(tzinfo=timezone.utc), -position)
+                item = (key, position, record)
+                if len(newest) < FEED_LIMIT:
+                    heapq.heappush(newest, item)
+                elif key > newest[0][0]:
+                    heapq.heapreplace(newest, item)
+        for listing in listings:
+            if sitemap is not None:
+                sitemap.add(listing.url, listing.lastmod())
+            if index is not None:
+                index.add(basepath.rstrip("/") + listing.url, listing.title, search_terms(listing.count_words()))
+        if sitemap is not None:
+            sitemap.close()
+            write_feed(os.path.join(self.dest_dir, "feed.xml"), prefix, home_title or "Feed", [record for _, _, record in sorted(newest, reverse=True)])
+        if index is not None:
+            index.close()
+        count("site_files", "pruned", self.store.prune([src for src, _ in pages]))
@@ -0,0 +1,88 @@
+import os, re
+
+from minify import minify_html
+from textnode import basepath_resolver
+
+
+
+PLACEHOLDER_PATTERN = re.compile(r'\{\{ (\w+) \}\}')
+URL_ATTRIBUTE_PATTERN = re.compile(r'\b(href|src)="([^"]*)"')
+TEMPLATE_DIR = "templates" # named templates live next to the default template, in templates/<name>.html
+
+_compiled = {} # (template path, basepath, asset map key, minify) -> (mtime_ns, Template)
+
+
+def split_placeholders(source):
+    segments = []
+    slots = []
+    position = 0
+    for match in PLACEHOLDER_PATTERN.finditer(source):
+        segments.append(source[position:match.start()])
+        slots.append(match.group(1))
+        position = match.end()
+    segments.append(source[position:])
+    return segments, slots
+
+
+class Template:
+    def __init__(self, source, basepath="/", rewrites=None, minify=False):
+        self.asset_urls = set() # root-relative URLs in href/src attributes, before rewriting
+        self.saved = 0 # bytes minification removed from the static HTML of each rendered page
+        resolve_url = basepath_resolver(basepath, rewrites)
+        segments, self.slots = split_placeholders(source) # slots[i] is rendered between segments[i] and segments[i + 1]
+        self.segments = [self.rewrite_urls(segment, resolve_url) for segment in segments] # static HTML, basepath and asset rewrites applied
+        if minify:
+            # After rewriting, which only matches quoted attributes; placeholders are put back so
+            # whitespace around them is judged by the tags they sit between
+            rendered = self.render()
+            minified = minify_html(rendered)
+            self.segments, self.slots = split_placeholders(minified)
+            self.saved = len(rendered) - len(minified)
+
+    def rewrite_urls(self, text, resolve_url):
+        def rewrite(match):
+            url = match.group(2)
+            if url.startswith("/") and not url.startswith("//"):
+                self.asset_urls.add(re.split(r'[?#]', url, 1)[0])
+            if resolve_url is None:
+                return match.group(0)
+            return f'{match.group(1)}="{resolve_url(url)}"'
+        return URL_ATTRIBUTE_PATTERN.sub(rewrite, text)
+
+    def render(self, **values):
+        parts = [self.segments[0]]
+        for name, segment in zip(self.slots, self.segments[1:]):
+            parts.append(values.get(name, f'{{{{ {name} }}}}'))
+            parts.append(segment)
+        return "".join(parts)
+
+    def write(self, buf, **values):
+        # Values may be strings or HTML nodes; nodes are streamed into buf without building a string
+        write = buf.write
+        write(self.segments[0])
+        for name, segment in zip(self.slots, self.segments[1:]):
+            value = values.get(name, f'{{{{ {name} }}}}')
+            if isinstance(value, str):
+                write(value)
+            else:
+                value.write_html(buf)
+            write(segment)
+
+
+def load_template(template_path, basepath="/", assets=None, minify=False):
+    # assets is the AssetMap of fingerprinted static files, if any
+    key = (template_path, basepath, None if assets is None else assets.key, minify)
+    mtime = os.stat(template_path).st_mtime_ns
+    cached = _compiled.get(key)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with open(template_path) as f:
+        template = Template(f.read(), basepath, None if assets is None else assets.urls, minify)
+    _compiled[key] = (mtime, template)
+    return template
+
+
+def template_path_for(template_path, name):
+    if name is None:
+        return template_path
+    return os.path.join(os.path.dirname(template_path), TEMPLATE_DIR, f'{name}.html')
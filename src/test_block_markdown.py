@@ -1,6 +1,11 @@
+import io
 import unittest
+from enum import Enum
 
-from block_markdown import BlockType, markdown_to_blocks, block_to_block_type, markdown_to_html_node, extract_title
+import block_markdown
+from htmlnode import ParentNode
+from textnode import basepath_resolver
+from block_markdown import BlockType, iter_blocks, markdown_to_blocks, block_to_block_type, markdown_to_html_node, write_markdown_html, extract_title, register_block_type, text_to_children
 
 class TestMarkdownToBlocks(unittest.TestCase):
     def test_markdown_to_blocks(self):
@@ -59,6 +64,26 @@ This is a paragraph with multiple newlines around it
         blocks = markdown_to_blocks(md)
         self.assertEqual(blocks, ["This is a paragraph with multiple newlines around it"])
 
+    def test_markdown_to_blocks_fence_with_blank_lines(self):
+        md = """
+Intro
+
+```
+first
+
+second
+```
+After the fence
+"""
+        blocks = markdown_to_blocks(md)
+        self.assertEqual(blocks, ["Intro", "```\nfirst\n\nsecond\n```", "After the fence"])
+
+    def test_iter_blocks_from_file_object(self):
+        f = io.StringIO("# Title\n\n- one\n- two\n\nEnd\n")
+        blocks = iter_blocks(f)
+        self.assertEqual(next(blocks), "# Title")
+        self.assertEqual(list(blocks), ["- one\n- two", "End"])
+
 
 class TestBlockToBlockType(unittest.TestCase):
     def test_block_to_block_type_header(self):
@@ -85,6 +110,53 @@ class TestBlockToBlockType(unittest.TestCase):
         block = "This is a paragraph"
         self.assertEqual(block_to_block_type(block), BlockType.PARAGRAPH)
 
+    def test_block_to_block_type_every_line_checked(self):
+        self.assertEqual(block_to_block_type("> quote\n> more"), BlockType.QUOTE)
+        self.assertEqual(block_to_block_type("> quote\nnot quoted"), BlockType.PARAGRAPH)
+        self.assertEqual(block_to_block_type("- one\n-two"), BlockType.PARAGRAPH)
+        self.assertEqual(block_to_block_type("1. one\n3. three"), BlockType.PARAGRAPH)
+        self.assertEqual(block_to_block_type("\n".join(f'{i}. item' for i in range(1, 13))), BlockType.ORDERED_LIST)
+        self.assertEqual(block_to_block_type("```\nunclosed"), BlockType.PARAGRAPH)
+        self.assertEqual(block_to_block_type("####### seven"), BlockType.PARAGRAPH)
+
+
+class Table(Enum):
+    TABLE = "table"
+
+
+def table_to_html_node(block, resolve_url):
+    rows = []
+    for line in block.split("\n"):
+        cells = [ParentNode("td", text_to_children(cell.strip(), resolve_url)) for cell in line.strip("|").split("|")]
+        rows.append(ParentNode("tr", cells))
+    return ParentNode("table", rows)
+
+
+class TestRegisterBlockType(unittest.TestCase):
+    def setUp(self):
+        classifiers = {char: list(entries) for char, entries in block_markdown.BLOCK_CLASSIFIERS.items()}
+        handlers = dict(block_markdown.BLOCK_HANDLERS)
+        def restore():
+            block_markdown.BLOCK_CLASSIFIERS.clear()
+            block_markdown.BLOCK_CLASSIFIERS.update(classifiers)
+            block_markdown.BLOCK_HANDLERS.clear()
+            block_markdown.BLOCK_HANDLERS.update(handlers)
+            block_markdown.CUSTOM_BLOCK_TYPES.clear()
+        self.addCleanup(restore)
+        register_block_type(Table.TABLE, "|", lambda block: block.count("\n") == block.count("\n|"), table_to_html_node)
+
+    def test_custom_block_type(self):
+        self.assertEqual(block_to_block_type("| a | b |\n| c | d |"), Table.TABLE)
+        self.assertEqual(block_to_block_type("| a |\nb"), BlockType.PARAGRAPH)
+        self.assertEqual(block_to_block_type("# Title"), BlockType.HEADER)
+        html = markdown_to_html_node("# Title\n\n| **a** | [b](/b) |").to_html()
+        self.assertEqual(html, '<div><h1>Title</h1><table><tr><td><b>a</b></td><td><a href="/b">b</a></td></tr></table></div>')
+
+    def test_custom_block_type_checked_before_builtin(self):
+        register_block_type(Table.TABLE, "-", lambda block: block.startswith("---"), table_to_html_node)
+        self.assertEqual(block_to_block_type("---"), Table.TABLE)
+        self.assertEqual(block_to_block_type("- item"), BlockType.UNORDERED_LIST)
+
 
 class TestMarkdownToHtmlNode(unittest.TestCase):
     def test_paragraphs(self):
@@ -156,6 +228,38 @@ the **same** even with inline stuff
             "<div><ol><li>Item 1 with <b>bold</b> text</li><li>Item 2 with <i>italic</i> text</li><li>Item 3 with <code>code</code> text</li></ol></div>",
         )
     
+    def test_links_resolved_but_code_untouched(self):
+        md = """
+See [tom](/blog/tom) and ![tom](/images/tom.png)
+
+```
+<a href="/blog/tom">raw</a>
+```
+"""
+        node = markdown_to_html_node(md, basepath_resolver("/site/"))
+        html = node.to_html()
+        self.assertEqual(
+            html,
+            '<div><p>See <a href="/site/blog/tom">tom</a> and <img src="/site/images/tom.png">tom</img></p><pre><code><a href="/blog/tom">raw</a>\n</code></pre></div>',
+        )
+
+    def test_codeblock_with_blank_lines(self):
+        md = """
+```
+def f():
+
+    return 1
+```
+"""
+        node = markdown_to_html_node(md)
+        self.assertEqual(node.to_html(), "<div><pre><code>def f():\n\n    return 1\n</code></pre></div>")
+
+    def test_write_markdown_html_streams_same_output(self):
+        md = "# Title\n\nSome **bold** text\n\n> quote\n\n1. one\n2. two\n"
+        buf = io.StringIO()
+        write_markdown_html(io.StringIO(md), buf)
+        self.assertEqual(buf.getvalue(), markdown_to_html_node(md).to_html())
+
     def test_malformed_codeblock(self):
         md = """```
 This is a code block without a closing tag
@@ -0,0 +1,77 @@
+import contextlib
+import io
+import multiprocessing
+import os
+import tempfile
+import threading
+import unittest
+
+from build_log import BuildLogging, PhaseCounters, logger
+
+
+def log_from_worker(message):
+    logger.warning(message)
+
+
+class TestBuildLogging(unittest.TestCase):
+    def run_logging(self, verbosity, log_file=None, worker_message=None):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            with BuildLogging(verbosity, log_file):
+                logger.debug("debug record")
+                logger.info("info record")
+                logger.warning("warning record")
+                if worker_message is not None:
+                    process = multiprocessing.get_context("fork").Process(target=log_from_worker, args=(worker_message,))
+                    process.start()
+                    process.join()
+        return output.getvalue()
+
+    def test_quiet(self):
+        self.assertEqual(self.run_logging(0), "warning record\n")
+
+    def test_default(self):
+        self.assertEqual(self.run_logging(1), "info record\nwarning record\n")
+
+    def test_verbose(self):
+        self.assertEqual(self.run_logging(2), "debug record\ninfo record\nwarning record\n")
+        self.assertEqual(self.run_logging(5), "debug record\ninfo record\nwarning record\n")
+
+    def test_log_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "build.log")
+            self.run_logging(1, path)
+            with open(path) as f:
+                lines = f.read().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].endswith(" - INFO - info record"))
+        self.assertTrue(lines[1].endswith(" - WARNING - warning record"))
+
+    @unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(), "needs fork")
+    def test_records_from_worker_processes(self):
+        self.assertEqual(self.run_logging(0, worker_message="from a worker"), "warning record\nfrom a worker\n")
+
+    def test_logger_restored_after_stop(self):
+        level, propagate = logger.level, logger.propagate
+        handlers = list(logger.handlers)
+        self.run_logging(2)
+        self.assertEqual((logger.level, logger.propagate), (level, propagate))
+        self.assertEqual(logger.handlers, handlers)
+
+
+class TestPhaseCounters(unittest.TestCase):
+    def test_concurrent_adds(self):
+        counters = PhaseCounters()
+        def add():
+            for _ in range(20000):
+                counters.add("minify", "css_bytes_saved", 3)
+        threads = [threading.Thread(target=add) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(counters.get("minify", "css_bytes_saved"), 8 * 20000 * 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
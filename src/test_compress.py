@@ -0,0 +1,67 @@
+import gzip
+import os
+import unittest
+
+from build_log import counters
+from compress import compress_outputs
+from manifest import Manifest
+from test_helpers import TempDirTestCase
+
+
+class TestCompressOutputs(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.docs = os.path.join(self.tmp.name, "docs")
+        os.makedirs(os.path.join(self.docs, "blog"))
+        self.page = os.path.join(self.docs, "blog", "index.html")
+        self.write(self.page, "<p>Tolkien</p>" * 200)
+        self.write(os.path.join(self.docs, "small.css"), "body {}")
+        self.write(os.path.join(self.docs, "image.png"), "x" * 5000)
+        self.manifest = Manifest(os.path.join(self.tmp.name, "manifest.json"))
+
+    def test_compresses_text_outputs_above_threshold(self):
+        counters.reset()
+        compress_outputs(self.docs, self.manifest, jobs=2, use_brotli=False)
+        self.assertEqual(counters.get("compress", "bytes_in"), len("<p>Tolkien</p>" * 200))
+        with gzip.open(self.page + ".gz", "rt") as f:
+            self.assertEqual(f.read(), "<p>Tolkien</p>" * 200)
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "small.css.gz")))
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "image.png.gz")))
+
+    def test_only_changed_content_is_recompressed(self):
+        compress_outputs(self.docs, self.manifest, use_brotli=False)
+        counters.reset()
+        self.write(self.page, "<p>Tolkien</p>" * 200) # rewritten with the same content
+        compress_outputs(self.docs, self.manifest, use_brotli=False)
+        self.assertEqual(counters.get("compress", "written"), 0)
+        self.assertEqual(counters.get("compress", "unchanged"), 1)
+
+        self.write(self.page, "<p>Bombadil</p>" * 200)
+        compress_outputs(self.docs, self.manifest, use_brotli=False)
+        self.assertEqual(counters.get("compress", "written"), 1)
+        with gzip.open(self.page + ".gz", "rt") as f:
+            self.assertEqual(f.read(), "<p>Bombadil</p>" * 200)
+
+    def test_siblings_of_pruned_outputs_removed(self):
+        # The order main.build uses: prune outputs, compress, then prune compressed siblings
+        def build(pages):
+            manifest = Manifest.load(self.manifest.path)
+            for page in pages:
+                manifest.record("pages", page, {}, page)
+            manifest.prune(self.docs, ["pages"])
+            compress_outputs(self.docs, manifest, use_brotli=False)
+            manifest.prune(self.docs, ["compress"])
+            manifest.save()
+
+        other = os.path.join(self.docs, "other.html")
+        self.write(other, "<p>Bombadil</p>" * 200)
+        build([self.page, other])
+        self.assertTrue(os.path.exists(other + ".gz"))
+        build([self.page])
+        self.assertFalse(os.path.exists(other))
+        self.assertFalse(os.path.exists(other + ".gz"))
+        self.assertTrue(os.path.exists(self.page + ".gz"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import os
+import unittest
+
+from copy_static import copy_src_to_dest, fast_copy, kernel_copy
+from manifest import Manifest
+from test_helpers import TempDirTestCase
+
+
+class TestCopySrcToDest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.src = os.path.join(self.tmp.name, "static")
+        self.dest = os.path.join(self.tmp.name, "docs")
+        os.makedirs(os.path.join(self.src, "images"))
+        self.write(os.path.join(self.src, "index.css"), "body {}")
+        self.write(os.path.join(self.src, "images", "a.png"), "png bytes")
+
+    def test_copies_tree(self):
+        stats = copy_src_to_dest(self.src, self.dest)
+        self.assertEqual(stats.copied_files, 2)
+        self.assertEqual(stats.copied_bytes, len("body {}") + len("png bytes"))
+        with open(os.path.join(self.dest, "images", "a.png")) as f:
+            self.assertEqual(f.read(), "png bytes")
+
+    def test_skips_unchanged_files(self):
+        copy_src_to_dest(self.src, self.dest)
+        self.write(os.path.join(self.src, "index.css"), "body { margin: 0 }")
+        stats = copy_src_to_dest(self.src, self.dest, jobs=1)
+        self.assertEqual(stats.copied_files, 1)
+        self.assertEqual(stats.skipped_files, 1)
+        with open(os.path.join(self.dest, "index.css")) as f:
+            self.assertEqual(f.read(), "body { margin: 0 }")
+
+    def test_hash_detects_same_size_and_mtime_edit(self):
+        copy_src_to_dest(self.src, self.dest)
+        dest_file = os.path.join(self.dest, "index.css")
+        stat = os.stat(dest_file)
+        self.write(dest_file, "body {!")
+        os.utime(dest_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertEqual(copy_src_to_dest(self.src, self.dest).copied_files, 0)
+        self.assertEqual(copy_src_to_dest(self.src, self.dest, use_hash=True).copied_files, 1)
+
+    def test_deleted_sources_pruned_through_manifest(self):
+        manifest = Manifest(os.path.join(self.tmp.name, "manifest.json"))
+        copy_src_to_dest(self.src, self.dest, manifest)
+        manifest.save()
+
+        os.remove(os.path.join(self.src, "images", "a.png"))
+        manifest = Manifest.load(manifest.path)
+        copy_src_to_dest(self.src, self.dest, manifest)
+        manifest.prune()
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "images", "a.png")))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.css")))
+
+    def test_link_mode(self):
+        copy_src_to_dest(self.src, self.dest, link=True)
+        source_stat = os.stat(os.path.join(self.src, "index.css"))
+        dest_stat = os.stat(os.path.join(self.dest, "index.css"))
+        self.assertEqual(source_stat.st_size, dest_stat.st_size)
+        self.assertEqual(copy_src_to_dest(self.src, self.dest, link=True).copied_files, 0)
+
+    def test_transforms_tracked_through_manifest(self):
+        manifest_path = os.path.join(self.tmp.name, "manifest.json")
+        def strip_spaces(data):
+            return data.replace(b" ", b"")
+        for expected in (1, 0):
+            manifest = Manifest.load(manifest_path)
+            stats = copy_src_to_dest(self.src, self.dest, manifest, transforms={".css": strip_spaces})
+            manifest.save()
+            self.assertEqual(stats.copied_files, expected + 1 if expected else 0)
+        with open(os.path.join(self.dest, "index.css")) as f:
+            self.assertEqual(f.read(), "body{}")
+        # Without the transform the plain copy comes back
+        copy_src_to_dest(self.src, self.dest, Manifest.load(manifest_path))
+        with open(os.path.join(self.dest, "index.css")) as f:
+            self.assertEqual(f.read(), "body {}")
+
+
+class TestFastCopy(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.src = os.path.join(self.tmp.name, "src.bin")
+        self.dest = os.path.join(self.tmp.name, "dest.bin")
+        self.data = os.urandom(3 << 20)
+        with open(self.src, "wb") as f:
+            f.write(self.data)
+
+    def read_dest(self):
+        with open(self.dest, "rb") as f:
+            return f.read()
+
+    def test_fast_copy(self):
+        fast_copy(self.src, self.dest)
+        self.assertEqual(self.read_dest(), self.data)
+
+    @unittest.skipUnless(hasattr(os, "sendfile"), "no os.sendfile")
+    def test_sendfile_in_chunks(self):
+        with open(self.src, "rb") as fsrc, open(self.dest, "wb") as fdst:
+            copy = lambda offset, count: os.sendfile(fdst.fileno(), fsrc.fileno(), offset, min(count, 1 << 20))
+            self.assertTrue(kernel_copy(copy, fsrc, fdst))
+        self.assertEqual(self.read_dest(), self.data)
+
+    def test_unsupported_call_leaves_destination_empty(self):
+        def copy(offset, count):
+            if offset:
+                raise OSError("not supported")
+            os.write(fdst.fileno(), self.data[:100])
+            return 100
+        with open(self.src, "rb") as fsrc, open(self.dest, "wb") as fdst:
+            self.assertFalse(kernel_copy(copy, fsrc, fdst))
+            self.assertEqual(fsrc.tell(), 0)
+        self.assertEqual(self.read_dest(), b"")
+
+
+if __name__ == "__main__":
+    unittest.main()
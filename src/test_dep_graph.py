@@ -0,0 +1,53 @@
+import os
+import unittest
+
+from dep_graph import DependencyGraph, canonical_url, page_node, site_url, template_node, url_node
+
+
+class TestUrls(unittest.TestCase):
+    def test_site_url(self):
+        self.assertEqual(site_url(os.path.join("docs", "blog", "tom", "index.html"), "./docs"), "/blog/tom")
+        self.assertEqual(site_url(os.path.join("docs", "index.html"), "docs"), "/")
+        self.assertEqual(site_url(os.path.join("docs", "blog", "post.html"), "docs"), "/blog/post")
+        self.assertEqual(site_url(os.path.join("docs", "images", "a.png"), "docs"), "/images/a.png")
+
+    def test_canonical_url(self):
+        self.assertEqual(canonical_url("/blog/tom/", "/"), "/blog/tom")
+        self.assertEqual(canonical_url("/blog/tom/index.html#top", "/"), "/blog/tom")
+        self.assertEqual(canonical_url("../majesty?x=1", "/blog/tom"), "/blog/majesty")
+        self.assertEqual(canonical_url("images/a.png", "/blog"), "/blog/images/a.png")
+        self.assertIsNone(canonical_url("https://example.com/a", "/"))
+        self.assertIsNone(canonical_url("//cdn.example.com/a.js", "/"))
+        self.assertIsNone(canonical_url("#section", "/"))
+
+
+class TestDependencyGraph(unittest.TestCase):
+    def setUp(self):
+        self.graph = DependencyGraph()
+        self.graph.set_dependencies(page_node("content/index.md"), [template_node("template.html"), url_node("/blog/tom")])
+        self.graph.set_dependencies(page_node("content/blog/tom/index.md"), [template_node("template.html"), url_node("/images/tom.png")])
+
+    def test_rebuild_set(self):
+        self.assertEqual(
+            self.graph.rebuild_set({url_node("/blog/tom")}),
+            {page_node("content/index.md")},
+        )
+        self.assertEqual(
+            self.graph.rebuild_set({url_node("/images/tom.png"), page_node("content/contact.md")}),
+            {page_node("content/blog/tom/index.md"), page_node("content/contact.md")},
+        )
+        self.assertEqual(len(self.graph.rebuild_set({template_node("./template.html")})), 2)
+
+    def test_not_transitive(self):
+        # index.md links to tom, tom references the image: an image change does not reach index.md
+        self.assertNotIn(page_node("content/index.md"), self.graph.rebuild_set({url_node("/images/tom.png")}))
+
+    def test_remove_and_round_trip(self):
+        self.graph.remove(page_node("content/index.md"))
+        self.assertEqual(self.graph.rebuild_set({url_node("/blog/tom")}), set())
+        restored = DependencyGraph(self.graph.to_dict())
+        self.assertEqual(restored.dependencies, self.graph.dependencies)
+
+
+if __name__ == "__main__":
+    unittest.main()
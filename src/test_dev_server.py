@@ -0,0 +1,85 @@
+import os
+import unittest
+
+from dev_server import DevSite
+from test_helpers import TempDirTestCase
+
+
+class TestDevSite(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.static = os.path.join(root, "static")
+        self.template = os.path.join(root, "template.html")
+        self.docs = os.path.join(root, "docs")
+        os.makedirs(os.path.join(self.content, "blog"))
+        os.makedirs(self.static)
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome\n")
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n\nBody\n")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.site = DevSite(self.content, self.static, self.template, self.docs)
+        self.site.build()
+
+    def write(self, path, text):
+        super().write(path, text)
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    def read(self, *parts):
+        with open(os.path.join(self.docs, *parts)) as f:
+            return f.read()
+
+    def test_build(self):
+        self.assertEqual(self.read("index.html"), "<title>Home</title><div><h1>Home</h1><p>Welcome</p></div>")
+        self.assertEqual(self.read("index.css"), "body {}")
+
+    def test_content_change_rebuilds_only_that_page(self):
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n\nEdited\n")
+        self.assertEqual(self.site.update(), 1)
+        self.assertIn("Edited", self.read("blog", "post.html"))
+        self.assertEqual(self.site.version, 1)
+
+    def test_template_change_rewraps_cached_bodies(self):
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.assertEqual(self.site.update(), 2)
+        self.assertEqual(self.read("index.html"), "<h1>Home</h1><div><h1>Home</h1><p>Welcome</p></div>")
+
+    def test_deleted_page_removed(self):
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        self.site.update()
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog", "post.html")))
+
+    def test_static_change_synced_per_file(self):
+        self.write(os.path.join(self.static, "index.css"), "body { margin: 0 }")
+        self.write(os.path.join(self.static, "broken.css"), "p {}")
+        os.makedirs(os.path.join(self.docs, "broken.css")) # cannot be replaced by a file
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n\nEdited\n")
+        with self.assertLogs("ssg", "ERROR") as logs:
+            self.assertEqual(self.site.update(), 1)
+        self.assertIn("broken.css", logs.output[0])
+        self.assertEqual(self.read("index.css"), "body { margin: 0 }")
+        self.assertIn("Edited", self.read("blog", "post.html"))
+
+        os.remove(os.path.join(self.static, "index.css"))
+        self.site.update()
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "index.css")))
+
+    def test_missing_template_is_logged(self):
+        os.remove(self.template)
+        with self.assertLogs("ssg", "ERROR") as logs:
+            self.assertEqual(self.site.rewrap(os.path.normpath(self.template)), 0) # deleted after the rescan saw it
+        self.assertIn("template.html", logs.output[0])
+        self.assertEqual(self.site.update(), 0)
+
+    def test_no_change_keeps_version(self):
+        self.assertEqual(self.site.update(), 0)
+        self.assertEqual(self.site.version, 0)
+
+    def test_candidates_outside_roots_ignored(self):
+        self.assertEqual(self.site.update({os.path.join(self.docs, "index.html")}), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
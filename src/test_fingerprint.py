@@ -0,0 +1,62 @@
+import os
+import unittest
+
+from copy_static import copy_src_to_dest
+from fingerprint import AssetMap, fingerprint_assets, fingerprint_name
+from manifest import Manifest
+from test_helpers import TempDirTestCase
+
+
+class TestFingerprint(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.docs = os.path.join(self.tmp.name, "docs")
+        os.makedirs(os.path.join(self.static, "images"))
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "tom.png"), "png")
+        self.manifest_path = os.path.join(self.tmp.name, "manifest.json")
+
+    def fingerprint(self, transforms=None):
+        # One build: file hashes are memoized per manifest, so each build loads its own
+        manifest = Manifest.load(self.manifest_path)
+        copy_src_to_dest(self.static, self.docs, manifest, transforms=transforms)
+        assets = fingerprint_assets(self.static, self.docs, manifest)
+        manifest.save()
+        return assets
+
+    def test_fingerprint_name(self):
+        self.assertEqual(fingerprint_name(os.path.join("docs", "index.css"), "0123456789abcdef"), os.path.join("docs", "index.0123456789.css"))
+
+    def test_rewrite_map_is_stable(self):
+        first = self.fingerprint()
+        self.assertEqual(sorted(first.urls), ["/images/tom.png", "/index.css"])
+        self.assertTrue(os.path.exists(os.path.join(self.docs, first.urls["/index.css"][1:])))
+        second = self.fingerprint()
+        self.assertEqual(first.urls, second.urls)
+        self.assertEqual(first.key, second.key)
+
+    def test_changed_asset_gets_new_name(self):
+        first = self.fingerprint()
+        self.write(os.path.join(self.static, "index.css"), "body { color: red }")
+        second = self.fingerprint()
+        self.assertNotEqual(first.urls["/index.css"], second.urls["/index.css"])
+        self.assertEqual(first.urls["/images/tom.png"], second.urls["/images/tom.png"])
+        self.assertFalse(os.path.exists(os.path.join(self.docs, first.urls["/index.css"][1:])))
+        self.assertNotEqual(first.digest(["/index.css"]), second.digest(["/index.css"]))
+        self.assertEqual(first.digest(["/images/tom.png"]), second.digest(["/images/tom.png"]))
+
+    def test_fingerprints_transformed_copy(self):
+        plain = self.fingerprint()
+        minified = self.fingerprint({".css": lambda data: data.replace(b" ", b"")})
+        with open(os.path.join(self.docs, minified.urls["/index.css"][1:])) as f:
+            self.assertEqual(f.read(), "body{}")
+        self.assertNotEqual(plain.urls["/index.css"], minified.urls["/index.css"])
+
+    def test_asset_map_digest(self):
+        assets = AssetMap({"/a.css": "/a.1.css"})
+        self.assertEqual(assets.digest(["/a.css"]), AssetMap({"/a.css": "/a.1.css", "/b.css": "/b.2.css"}).digest(["/a.css"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,4 @@
+import io
 import unittest
 
 from htmlnode import HTMLNode, LeafNode, ParentNode
@@ -102,6 +103,36 @@ class TestParentNode(unittest.TestCase):
         with self.assertRaises(ValueError):
             parent_node.to_html()
 
+    def test_write_html_matches_to_html(self):
+        grandchild_node = LeafNode("b", "grandchild", {"style": "color: red;"})
+        child_node = ParentNode("span", [LeafNode(None, "text "), grandchild_node], {"class": "child"})
+        parent_node = ParentNode("div", [child_node, LeafNode("i", "tail")], {"id": "parent"})
+        buf = io.StringIO()
+        parent_node.write_html(buf)
+        self.assertEqual(buf.getvalue(), parent_node.to_html())
+        self.assertEqual("".join(parent_node.iter_html()), parent_node.to_html())
+
+    def test_to_html_deeply_nested(self):
+        node = LeafNode("b", "deep")
+        for _ in range(5000):
+            node = ParentNode("span", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span><span>"))
+        self.assertTrue(html.endswith("</span></span>"))
+        self.assertEqual(html.count("<span>"), 5000)
+
+    def test_nodes_have_no_instance_dict(self):
+        leaf = LeafNode("b", "bold")
+        parent = ParentNode("p", [leaf])
+        self.assertFalse(hasattr(leaf, "__dict__"))
+        self.assertFalse(hasattr(parent, "__dict__"))
+        self.assertEqual(repr(parent), "ParentNode(p, [HTMLNode(b, bold, None)], None)")
+
+    def test_to_html_with_empty_grandchildren(self):
+        parent_node = ParentNode("div", [ParentNode("span", [])])
+        with self.assertRaises(ValueError):
+            parent_node.to_html()
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
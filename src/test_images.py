@@ -0,0 +1,101 @@
+import os
+import struct
+import tempfile
+import unittest
+
+from build_log import counters
+from htmlnode import LeafNode, ParentNode
+from images import Image, ImageIndex, ImageInfo, image_size, process_images
+
+
+def png_bytes(width, height):
+    return b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + struct.pack(">II", width, height) + b"\x08\x02\x00\x00\x00"
+
+
+def jpeg_bytes(width, height):
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + b"\x00" * 9
+    sof0 = b"\xff\xc0" + struct.pack(">HBHH", 17, 8, height, width) + b"\x00" * 10
+    return b"\xff\xd8" + app0 + sof0
+
+
+class TestImageSize(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def size_of(self, data):
+        path = os.path.join(self.tmp.name, "image")
+        with open(path, "wb") as f:
+            f.write(data)
+        return image_size(path)
+
+    def test_formats(self):
+        self.assertEqual(self.size_of(png_bytes(1344, 896)), (1344, 896))
+        self.assertEqual(self.size_of(b"GIF89a" + struct.pack("<HH", 32, 16) + b"\x00" * 20), (32, 16))
+        self.assertEqual(self.size_of(jpeg_bytes(640, 480)), (640, 480))
+        vp8x = b"RIFF\x00\x00\x00\x00WEBPVP8X" + b"\x00" * 8 + (799).to_bytes(3, "little") + (599).to_bytes(3, "little")
+        self.assertEqual(self.size_of(vp8x), (800, 600))
+        vp8l = b"RIFF\x00\x00\x00\x00WEBPVP8L" + b"\x00" * 5 + struct.pack("<I", (100 - 1) | ((50 - 1) << 14)) + b"\x00" * 5
+        self.assertEqual(self.size_of(vp8l), (100, 50))
+
+    def test_unknown_format(self):
+        self.assertIsNone(self.size_of(b"not an image at all"))
+
+
+class TestProcessImages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.docs = os.path.join(self.tmp.name, "docs")
+        self.cache_dir = os.path.join(self.tmp.name, "cache")
+        os.makedirs(os.path.join(self.static, "images"))
+        with open(os.path.join(self.static, "images", "tom.png"), "wb") as f:
+            f.write(png_bytes(928, 468))
+        with open(os.path.join(self.static, "index.css"), "w") as f:
+            f.write("body {}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_index_and_cache(self):
+        index = process_images(self.static, self.docs, widths=(), cache_dir=self.cache_dir)
+        self.assertEqual(list(index.images), ["/images/tom.png"])
+        self.assertEqual((index.images["/images/tom.png"].width, index.images["/images/tom.png"].height), (928, 468))
+        counters.reset()
+        index = process_images(self.static, self.docs, widths=(), cache_dir=self.cache_dir)
+        self.assertEqual(counters.get("images", "cached"), 1)
+        self.assertEqual(index.images["/images/tom.png"].width, 928)
+
+    @unittest.skipIf(Image is None, "Pillow is not installed")
+    def test_variants(self):
+        Image.new("RGB", (1000, 500)).save(os.path.join(self.static, "images", "big.png"))
+        index = process_images(self.static, self.docs, widths=(480, 2000), cache_dir=self.cache_dir)
+        self.assertEqual([width for width, _ in index.images["/images/big.png"].variants], [480])
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "images", "big.480w.webp")))
+
+
+class TestAnnotate(unittest.TestCase):
+    def test_sizes_and_srcset(self):
+        index = ImageIndex("docs", {
+            "/images/tom.png": ImageInfo(928, 468),
+            "/blog/big.png": ImageInfo(1000, 500, [(480, "480w.webp")]),
+        })
+        node = ParentNode("div", [
+            ParentNode("p", [LeafNode("img", "Tom", {"src": "/site/images/tom.png"})]),
+            LeafNode("img", "Big", {"src": "big.png"}),
+            LeafNode("img", "Elsewhere", {"src": "https://example.com/a.png"}),
+        ])
+        index.annotate(node, os.path.join("docs", "blog", "index.html"), "/site/")
+        self.assertEqual(
+            node.to_html(),
+            '<div><p><img src="/site/images/tom.png" width="928" height="468">Tom</img></p>'
+            '<img src="big.png" width="1000" height="500" srcset="/site/blog/big.480w.webp 480w, big.png 1000w"'
+            ' sizes="(max-width: 1000px) 100vw, 1000px">Big</img>'
+            '<img src="https://example.com/a.png">Elsewhere</img></div>',
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
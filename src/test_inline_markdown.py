@@ -1,8 +1,11 @@
 import unittest
 import re
+from enum import Enum
 
-from textnode import TextNode, TextType
-from inline_markdown import split_nodes_delimiter, extract_markdown_images, extract_markdown_links, split_nodes_image, split_nodes_link, text_to_textnodes
+import inline_markdown
+from htmlnode import LeafNode
+from textnode import INLINE_HANDLERS, TextNode, TextType, text_node_to_html_node
+from inline_markdown import split_nodes_delimiter, extract_markdown_images, extract_markdown_links, split_nodes_image, split_nodes_link, text_to_textnodes, register_inline_type
 
 class TestSplitNodesDelimiter(unittest.TestCase):
     def test_no_delimiter(self):
@@ -342,6 +345,70 @@ class TestTextToTextnodes(unittest.TestCase):
             nodes,
         )
 
+    def test_text_to_textnodes_code_protects_delimiters(self):
+        text = "Call `snake_case_name` and **bold_name**"
+        nodes = text_to_textnodes(text)
+        self.assertListEqual(
+            [
+                TextNode("Call ", TextType.TEXT),
+                TextNode("snake_case_name", TextType.CODE),
+                TextNode(" and ", TextType.TEXT),
+                TextNode("bold_name", TextType.BOLD),
+            ],
+            nodes,
+        )
+
+    def test_text_to_textnodes_link_url_with_underscores(self):
+        text = "See [the docs](https://www.test.com/some_page_here) now"
+        nodes = text_to_textnodes(text)
+        self.assertListEqual(
+            [
+                TextNode("See ", TextType.TEXT),
+                TextNode("the docs", TextType.LINK, "https://www.test.com/some_page_here"),
+                TextNode(" now", TextType.TEXT),
+            ],
+            nodes,
+        )
+
+    def test_text_to_textnodes_empty_spans_dropped(self):
+        nodes = text_to_textnodes("a****b")
+        self.assertListEqual([TextNode("a", TextType.TEXT), TextNode("b", TextType.TEXT)], nodes)
+
+    def test_text_to_textnodes_unclosed_delimiter(self):
+        with self.assertRaises(ValueError):
+            text_to_textnodes("This is **bold text with missing closing delimiter")
+        with self.assertRaises(ValueError):
+            text_to_textnodes("This is `code with missing closing delimiter")
+
+
+
+class Footnote(Enum):
+    REF = "footnote_ref"
+
+
+class TestRegisterInlineType(unittest.TestCase):
+    def setUp(self):
+        def restore():
+            inline_markdown.CUSTOM_INLINE_TYPES.clear()
+            INLINE_HANDLERS.pop(Footnote.REF, None)
+            inline_markdown.INLINE_PATTERN, inline_markdown.INLINE_GROUPS = inline_markdown.compile_inline_pattern()
+        self.addCleanup(restore)
+        register_inline_type(Footnote.REF, r'\[\^([^\]]+)\]', lambda node, resolve_url: LeafNode("sup", node.text, {"id": f'ref-{node.text}'}))
+
+    def test_custom_inline_type(self):
+        nodes = text_to_textnodes("See **this**[^1] and [a link](/x)")
+        self.assertEqual(nodes, [
+            TextNode("See ", TextType.TEXT),
+            TextNode("this", TextType.BOLD),
+            TextNode("1", Footnote.REF),
+            TextNode(" and ", TextType.TEXT),
+            TextNode("a link", TextType.LINK, "/x"),
+        ])
+        self.assertEqual(text_node_to_html_node(nodes[2]).to_html(), '<sup id="ref-1">1</sup>')
+
+    def test_pattern_needs_one_group(self):
+        with self.assertRaises(ValueError):
+            register_inline_type(Footnote.REF, r'\[\^[^\]]+\]', None)
 
 
 if __name__ == "__main__":
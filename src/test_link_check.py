@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+
+from link_check import LinkChecker, build_link_index
+from page import parse_page
+from parse_cache import ParseCache
+
+
+class TestLinkCheck(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.docs = os.path.join(self.tmp.name, "docs")
+        os.makedirs(os.path.join(self.static, "images"))
+        with open(os.path.join(self.static, "images", "tom.png"), "wb") as f:
+            f.write(b"png")
+        outputs = [
+            os.path.join(self.docs, "index.html"),
+            os.path.join(self.docs, "blog", "tom", "index.html"),
+            os.path.join(self.docs, "contact.html"),
+        ]
+        self.index = build_link_index(outputs, self.docs, self.static)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_index(self):
+        self.assertEqual(self.index, {"/", "/blog/tom", "/contact", "/images/tom.png"})
+
+    def test_broken_links_reported_with_line(self):
+        checker = LinkChecker(self.index, self.docs)
+        page = parse_page(
+            "# Tom\n\n"
+            "[home](/) [contact](/contact.html) [up](../../contact)\n\n"
+            "[gone](/blog/gone) ![tom](/images/tom.png)\n"
+            "![missing](images/none.png) [ext](https://example.com) [top](#top)\n"
+        )
+        checker.check_page("content/blog/tom/index.md", os.path.join(self.docs, "blog", "tom", "index.html"), page)
+        self.assertEqual(checker.checked, 6)
+        self.assertEqual(
+            [str(broken) for broken in checker.broken],
+            [
+                "content/blog/tom/index.md:5: broken link /blog/gone",
+                "content/blog/tom/index.md:6: broken image images/none.png",
+            ],
+        )
+
+    def test_remaining_pages_checked_from_cache_or_source(self):
+        content = os.path.join(self.tmp.name, "content")
+        os.makedirs(content)
+        pages = []
+        for name, text in (("index", "# Home\n\n[gone](/gone)\n"), ("contact", "# Contact\n\n[tom](/blog/tom)\n"), ("about", "# About\n\n[old](/old)\n")):
+            with open(os.path.join(content, f'{name}.md'), "w") as f:
+                f.write(text)
+            pages.append((os.path.join(content, f'{name}.md'), os.path.join(self.docs, f'{name}.html')))
+        cache = ParseCache(os.path.join(self.tmp.name, "cache"))
+        cache.put(cache.key("# About\n\n[old](/old)\n", "/"), parse_page("# About\n\n\n[cached](/cached)\n"))
+
+        checker = LinkChecker(self.index, self.docs)
+        checker.check_page(pages[0][0], pages[0][1], parse_page("# Home\n"))
+        checker.check_remaining(pages, cache)
+        self.assertEqual(checker.checked, 2) # index.md was handed over already
+        self.assertEqual([str(broken) for broken in checker.broken], [f'{pages[2][0]}:4: broken link /cached'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import os
+import tempfile
+import unittest
+
+from manifest import Manifest
+
+
+class TestManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.path = os.path.join(self.root, "manifest.json")
+        self.output = os.path.join(self.root, "out.html")
+        with open(self.output, "w") as f:
+            f.write("<p>hi</p>")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_fresh_after_reload(self):
+        manifest = Manifest(self.path)
+        manifest.record("pages", "content/index.md", {"source": "abc"}, self.output)
+        manifest.save()
+
+        reloaded = Manifest.load(self.path)
+        self.assertTrue(reloaded.is_fresh("pages", "content/index.md", {"source": "abc"}, self.output))
+
+    def test_changed_inputs_are_stale(self):
+        manifest = Manifest(self.path)
+        manifest.record("pages", "content/index.md", {"source": "abc", "basepath": "/"}, self.output)
+        self.assertFalse(manifest.is_fresh("pages", "content/index.md", {"source": "abc", "basepath": "/blog/"}, self.output))
+
+    def test_missing_output_is_stale(self):
+        manifest = Manifest(self.path)
+        manifest.record("pages", "content/index.md", {"source": "abc"}, self.output)
+        os.remove(self.output)
+        self.assertFalse(manifest.is_fresh("pages", "content/index.md", {"source": "abc"}, self.output))
+
+    def test_prune_removes_unseen_outputs(self):
+        manifest = Manifest(self.path)
+        manifest.record("pages", "content/gone.md", {"source": "abc"}, self.output)
+        manifest.save()
+
+        reloaded = Manifest.load(self.path)
+        removed = reloaded.prune()
+        self.assertEqual(removed, [os.path.normpath(self.output)])
+        self.assertFalse(os.path.exists(self.output))
+        self.assertEqual(reloaded.entries["pages"], {})
+
+    def test_prune_removes_emptied_directories(self):
+        docs = os.path.join(self.root, "docs")
+        majesty = os.path.join(docs, "blog", "majesty", "index.html")
+        tom = os.path.join(docs, "blog", "tom", "index.html")
+        for output in (majesty, tom):
+            os.makedirs(os.path.dirname(output))
+            with open(output, "w") as f:
+                f.write("<p>hi</p>")
+        manifest = Manifest(self.path)
+        manifest.record("pages", "content/blog/majesty/index.md", {"source": "abc"}, majesty)
+        manifest.save()
+
+        reloaded = Manifest.load(self.path)
+        reloaded.record("pages", "content/blog/tom/index.md", {"source": "def"}, tom)
+        reloaded.prune(docs)
+        reloaded.save()
+        self.assertEqual(os.listdir(os.path.join(docs, "blog")), ["tom"])
+
+        Manifest.load(self.path).prune(docs)
+        self.assertEqual(os.listdir(docs), []) # docs itself is kept
+
+    def test_prune_keeps_outputs_claimed_by_another_section(self):
+        manifest = Manifest(self.path)
+        manifest.record("sections", "content/blog/page/1", {"listing": "abc"}, self.output)
+        manifest.save()
+
+        # content/blog/index.md now writes the page the listing used to
+        reloaded = Manifest.load(self.path)
+        reloaded.record("pages", "content/blog/index.md", {"source": "def"}, self.output)
+        self.assertEqual(reloaded.prune(), [])
+        self.assertTrue(os.path.exists(self.output))
+        self.assertEqual(reloaded.entries["sections"], {})
+
+    def test_stat_hash_reused_until_file_changes(self):
+        manifest = Manifest(self.path)
+        digest = manifest.stat_hash(self.output)
+        manifest.save()
+
+        reloaded = Manifest.load(self.path)
+        reloaded.file_hash = None # must not be read again
+        self.assertEqual(reloaded.stat_hash(self.output), digest)
+
+        with open(self.output, "w") as f:
+            f.write("<p>changed</p>")
+        reloaded = Manifest.load(self.path)
+        self.assertNotEqual(reloaded.stat_hash(self.output), digest)
+
+        # Files no build asked about are dropped
+        Manifest.load(self.path).save()
+        self.assertEqual(Manifest.load(self.path).digests, {})
+
+    def test_corrupt_manifest_starts_empty(self):
+        with open(self.path, "w") as f:
+            f.write("{not json")
+        manifest = Manifest.load(self.path)
+        self.assertEqual(manifest.entries["pages"], {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import io
+import unittest
+
+from htmlnode import LeafNode, ParentNode
+from minify import MinifiedTree, minify_css, minify_html
+from template import Template
+
+
+class TestMinifyHtml(unittest.TestCase):
+    def test_template(self):
+        html = (
+            '<!doctype html>\n<html>\n  <head>\n    <meta charset="utf-8" />\n'
+            '    <link href="/index.css" rel="stylesheet" />\n  </head>\n'
+            '  <!-- navigation -->\n  <body>\n    <article>{{ Content }}</article>\n  </body>\n</html>\n'
+        )
+        self.assertEqual(
+            minify_html(html),
+            '<!doctype html><html><head><meta charset=utf-8><link href=/index.css rel=stylesheet></head>'
+            '<body><article>{{ Content }}</article></body></html>',
+        )
+
+    def test_inline_whitespace_kept_as_one_space(self):
+        self.assertEqual(minify_html('<p>a  <b>b</b>\n <i>c</i> </p>'), '<p>a <b>b</b> <i>c</i></p>')
+
+    def test_raw_elements_untouched(self):
+        html = '<pre>  x\n   y</pre>\n<script>if (a  <  b) {}</script><style>a  { color: red ; }</style>'
+        self.assertEqual(minify_html(html), '<pre>  x\n   y</pre><script>if (a  <  b) {}</script><style>a{color:red}</style>')
+
+    def test_quotes_kept_when_needed(self):
+        self.assertEqual(
+            minify_html('<a href="/a/" title="two words" data-x="" hidden>x</a><svg><path d="M0"/></svg>'),
+            '<a href=/a/ title="two words" data-x="" hidden>x</a><svg><path d=M0 /></svg>',
+        )
+
+    def test_template_minified_after_url_rewrites(self):
+        template = Template('<head>\n  <link href="/index.css" />\n</head>\n<body>{{ Content }}</body>', "/site/", minify=True)
+        self.assertEqual(template.render(Content="x"), '<head><link href=/site/index.css></head><body>x</body>')
+        self.assertEqual(template.saved, len('<head>\n  <link href="/site/index.css" />\n</head>\n<body>{{ Content }}</body>') - len('<head><link href=/site/index.css></head><body>{{ Content }}</body>'))
+
+
+class TestMinifyCss(unittest.TestCase):
+    def test_minify_css(self):
+        css = '/* theme */\nbody {\n  color: red;\n  font-family: "A  B", serif;\n}\n\na :hover, p > b { margin: 0 auto; }\n'
+        self.assertEqual(minify_css(css), 'body{color:red;font-family:"A  B",serif}a :hover,p>b{margin:0 auto}')
+
+    def test_comment_markers_in_strings_kept(self):
+        self.assertEqual(minify_css('a { content: "/* x */"; }'), 'a{content:"/* x */"}')
+
+
+class TestMinifiedTree(unittest.TestCase):
+    def test_matches_tree_with_whitespace_collapsed(self):
+        node = ParentNode("div", [
+            ParentNode("p", [LeafNode(None, "two  spaces\nand a newline "), LeafNode("a", "link", {"href": "/blog"})]),
+            ParentNode("pre", [ParentNode("code", [LeafNode(None, "keep\n    indent")])]),
+            LeafNode("img", "alt", {"src": "/a.png", "srcset": "/a.480w.webp 480w, /a.png 960w"}),
+        ])
+        buf = io.StringIO()
+        tree = MinifiedTree(node)
+        tree.write_html(buf)
+        self.assertEqual(
+            buf.getvalue(),
+            '<div><p>two spaces and a newline <a href=/blog>link</a></p><pre><code>keep\n    indent</code></pre>'
+            '<img src=/a.png srcset="/a.480w.webp 480w, /a.png 960w">alt</img></div>',
+        )
+        self.assertEqual(tree.saved, len(node.to_html()) - len(buf.getvalue()))
+
+    def test_same_errors_as_tree(self):
+        with self.assertRaises(ValueError):
+            MinifiedTree(ParentNode("div", [LeafNode("b", "")])).write_html(io.StringIO())
+        with self.assertRaises(ValueError):
+            MinifiedTree(ParentNode("div", [])).write_html(io.StringIO())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+
+from page import parse_page, search_terms
+from textnode import basepath_resolver
+
+
+class TestParsePage(unittest.TestCase):
+    def test_single_pass_metadata(self):
+        page = parse_page(
+            "# Tolkien **Fan** Club\n\n"
+            "## Books\n\n"
+            "Read [the post](/blog/tom) and ![logo](/images/logo.png) now\n\n"
+            "```\ncode words here\n```"
+        )
+        self.assertEqual(page.title, "Tolkien Fan Club")
+        self.assertEqual(page.headings, [(1, "Tolkien Fan Club"), (2, "Books")])
+        self.assertEqual(page.links, [("/blog/tom", 5)])
+        self.assertEqual(page.images, [("/images/logo.png", 5)])
+        self.assertEqual(page.word_count, 12)
+        self.assertEqual(page.metadata, {})
+        self.assertIsNone(page.template)
+        self.assertTrue(page.node.to_html().startswith("<div><h1>Tolkien <b>Fan</b> Club</h1><h2>Books</h2>"))
+
+    def test_search_terms(self):
+        page = parse_page("# The Hobbit\n\nA hobbit's tale, the [map](/map.png) and `code_name`.")
+        self.assertIsNone(page.summary().words)
+        words = page.summary(words=True).words
+        self.assertEqual(words["hobbit's"], 1)
+        self.assertEqual(search_terms(words), {"the": 2, "hobbit": 2, "tale": 1, "map": 1, "and": 1, "code": 1, "name": 1})
+
+    def test_title_missing(self):
+        self.assertIsNone(parse_page("## Not a title\n\ntext").title)
+
+    def test_title_first_line_of_h1(self):
+        self.assertEqual(parse_page("# Title\nmore").title, "Title")
+
+    def test_links_reported_as_written(self):
+        page = parse_page("[a](/blog) [b](https://example.com)", basepath_resolver("/site/"))
+        self.assertEqual(page.links, [("/blog", 1), ("https://example.com", 1)])
+        self.assertIn('href="/site/blog"', page.node.to_html())
+
+    def test_resolves_like(self):
+        page = parse_page("![logo](/logo.png)", basepath_resolver("/", {"/logo.png": "/logo.1.png"}))
+        self.assertIn('src="/logo.1.png"', page.node.to_html())
+        self.assertTrue(page.resolves_like(basepath_resolver("/", {"/logo.png": "/logo.1.png"})))
+        self.assertFalse(page.resolves_like(basepath_resolver("/", {"/logo.png": "/logo.2.png"})))
+        self.assertFalse(page.resolves_like(None))
+
+    def test_frontmatter(self):
+        page = parse_page(
+            "---\n"
+            "title: \"Custom: title\"\n"
+            "template: blog\n"
+            "tags: [tolkien, books]\n"
+            "draft: false\n"
+            "---\n"
+            "# Heading\n"
+        )
+        self.assertEqual(page.title, "Custom: title")
+        self.assertEqual(page.template, "blog")
+        self.assertEqual(page.metadata["tags"], ["tolkien", "books"])
+        self.assertIs(page.metadata["draft"], False)
+        self.assertEqual(page.body_line, 7)
+        self.assertEqual(page.node.to_html(), "<div><h1>Heading</h1></div>")
+
+    def test_link_lines(self):
+        page = parse_page(
+            "---\ntitle: x\n---\n"
+            "# Title\n\n"
+            "- [one](/a)\n"
+            "- [two](/b) and [one](/a)\n\n"
+            "> ![img](/i.png)\n"
+        )
+        self.assertEqual(page.links, [("/a", 6), ("/b", 7), ("/a", 7)])
+        self.assertEqual(page.images, [("/i.png", 9)])
+
+    def test_frontmatter_title_must_be_text(self):
+        for value in ("[a, b]", "", "\"  \""):
+            self.assertEqual(parse_page(f'---\ntitle: {value}\n---\n# Heading\n').title, "Heading")
+        self.assertIsNone(parse_page("---\ntitle:\n---\ntext\n").title)
+
+    def test_frontmatter_unclosed(self):
+        with self.assertRaises(ValueError):
+            parse_page("---\ntitle: x\n# Heading\n")
+
+    def test_frontmatter_only_at_start(self):
+        page = parse_page("# Title\n\n---\n\ntext")
+        self.assertEqual(page.metadata, {})
+        self.assertEqual(page.title, "Title")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,182 @@
+import os
+import tempfile
+import unittest
+
+from build_log import counters
+from htmlnode import LeafNode, ParentNode
+from images import ImageIndex
+from manifest import Manifest
+from page_generator import discover_pages, generate_pages_recursive, render_pages, select_template_path, write_page
+from parse_cache import ParseCache
+from template import Template
+
+
+class TestWritePage(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dest = os.path.join(self.tmp.name, "blog", "index.html")
+        self.template = Template("<title>{{ Title }}</title>{{ Content }}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_write_page_streams_tree(self):
+        write_page(self.template, "Hi", ParentNode("div", [LeafNode("p", "Body")]), self.dest)
+        with open(self.dest) as f:
+            self.assertEqual(f.read(), "<title>Hi</title><div><p>Body</p></div>")
+
+    def test_failed_render_keeps_previous_page(self):
+        write_page(self.template, "Hi", "<p>old</p>", self.dest)
+        broken = ParentNode("div", [LeafNode("p", "ok"), LeafNode("p", "")])
+        with self.assertRaises(ValueError):
+            write_page(self.template, "Hi", broken, self.dest)
+        with open(self.dest) as f:
+            self.assertEqual(f.read(), "<title>Hi</title><p>old</p>")
+        self.assertEqual(os.listdir(os.path.dirname(self.dest)), ["index.html"])
+
+
+class TestGeneratePages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.docs = os.path.join(self.tmp.name, "docs")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        os.makedirs(os.path.join(self.content, "blog"))
+        with open(os.path.join(self.content, "index.md"), "w") as f:
+            f.write("# Home\n\n[post](/blog/post)\n")
+        with open(os.path.join(self.content, "blog", "post.md"), "w") as f:
+            f.write("# Post\n")
+        with open(self.template, "w") as f:
+            f.write('<link href="/index.css" />{{ Content }}')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_discover_pages_sorted(self):
+        pages = discover_pages(self.content, self.docs)
+        self.assertEqual(
+            pages,
+            [
+                (os.path.join(self.content, "blog", "post.md"), os.path.join(self.docs, "blog", "post.html")),
+                (os.path.join(self.content, "index.md"), os.path.join(self.docs, "index.html")),
+            ],
+        )
+
+    def test_generate_pages_with_basepath(self):
+        generate_pages_recursive(self.content, self.template, self.docs, "/site/")
+        with open(os.path.join(self.docs, "index.html")) as f:
+            self.assertEqual(
+                f.read(),
+                '<link href="/site/index.css" /><div><h1>Home</h1><p><a href="/site/blog/post">post</a></p></div>',
+            )
+
+    def test_errors_collected_per_page(self):
+        with open(os.path.join(self.content, "blog", "bad.md"), "w") as f:
+            f.write("no title here\n")
+        with self.assertRaises(ValueError) as context:
+            generate_pages_recursive(self.content, self.template, self.docs, "/")
+        self.assertIn("bad.md", str(context.exception))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "index.html")))
+
+    def test_parallel_render_keeps_discovery_order(self):
+        for i in range(10):
+            with open(os.path.join(self.content, "blog", f'p{i}.md'), "w") as f:
+                f.write(f'# Post {i}\n' if i % 4 else "no title here\n") # p0, p4 and p8 fail, in different batches
+        pages = discover_pages(self.content, self.docs)
+        results = list(render_pages(pages, self.template, "/", jobs=2)) # 12 pages -> batches of one page
+        self.assertEqual([src for src, *_ in results], [src for src, _ in pages])
+        failed = [os.path.basename(src) for src, error, *_ in results if error is not None]
+        self.assertEqual(failed, ["p0.md", "p4.md", "p8.md"])
+        self.assertEqual(results[2][3].title, "Post 2")
+
+        with self.assertRaises(ValueError) as context:
+            generate_pages_recursive(self.content, self.template, self.docs, "/", jobs=2)
+        message = str(context.exception)
+        self.assertIn("Failed to generate 3 page(s)", message)
+        for name in ("p0.md", "p4.md", "p8.md"):
+            self.assertIn(f'{os.path.join(self.content, "blog", name)}: ValueError: No title found', message)
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "blog", "p9.html")))
+
+    def test_frontmatter_errors_collected_per_page(self):
+        for name in ("bad.md", "worse.md"):
+            with open(os.path.join(self.content, "blog", name), "w") as f:
+                f.write("---\nnot frontmatter\n---\n# Bad\n")
+        manifest = Manifest(os.path.join(self.tmp.name, "manifest.json"))
+        with self.assertRaises(ValueError) as context:
+            generate_pages_recursive(self.content, self.template, self.docs, "/", manifest)
+        message = str(context.exception)
+        self.assertIn("Failed to generate 2 page(s)", message)
+        self.assertIn(f'{os.path.join(self.content, "blog", "bad.md")}: ValueError: Invalid frontmatter line 2', message)
+        self.assertIn("worse.md", message)
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "index.html")))
+
+    def test_frontmatter_selects_template(self):
+        os.makedirs(os.path.join(self.tmp.name, "templates"))
+        with open(os.path.join(self.tmp.name, "templates", "blog.html"), "w") as f:
+            f.write("<main>{{ Title }}</main>")
+        with open(os.path.join(self.content, "blog", "post.md"), "w") as f:
+            f.write("---\ntemplate: blog\ntitle: From frontmatter\n---\n# Post\n")
+        self.assertEqual(
+            select_template_path(os.path.join(self.content, "blog", "post.md"), self.template),
+            os.path.join(self.tmp.name, "templates", "blog.html"),
+        )
+        generate_pages_recursive(self.content, self.template, self.docs, "/")
+        with open(os.path.join(self.docs, "blog", "post.html")) as f:
+            self.assertEqual(f.read(), "<main>From frontmatter</main>")
+
+    def test_template_change_reuses_parsed_pages(self):
+        cache = ParseCache(os.path.join(self.tmp.name, "cache"))
+        counters.reset()
+        generate_pages_recursive(self.content, self.template, self.docs, "/", cache=cache)
+        self.assertEqual(counters.get("cache", "miss"), 2)
+
+        with open(self.template, "w") as f:
+            f.write("<main>{{ Content }}</main>")
+        counters.reset()
+        generate_pages_recursive(self.content, self.template, self.docs, "/", cache=cache)
+        self.assertEqual(counters.get("cache", "hit"), 2)
+        with open(os.path.join(self.docs, "blog", "post.html")) as f:
+            self.assertEqual(f.read(), "<main><div><h1>Post</h1></div></main>")
+
+    def test_image_pipeline_change_rebuilds_pages(self):
+        manifest = Manifest(os.path.join(self.tmp.name, "manifest.json"))
+        generate_pages_recursive(self.content, self.template, self.docs, "/", manifest, images=ImageIndex(self.docs, key="1:[480]"))
+        counters.reset()
+        generate_pages_recursive(self.content, self.template, self.docs, "/", manifest, images=ImageIndex(self.docs, key="1:[480]"))
+        self.assertEqual(counters.get("pages", "unchanged"), 2)
+        counters.reset()
+        generate_pages_recursive(self.content, self.template, self.docs, "/", manifest, images=ImageIndex(self.docs, key="1:[480, 960]"))
+        self.assertEqual(counters.get("pages", "rendered"), 2)
+
+    def test_incremental_rebuilds_linking_pages(self):
+        with open(os.path.join(self.content, "about.md"), "w") as f:
+            f.write("# About\n")
+        manifest = Manifest(os.path.join(self.tmp.name, "manifest.json"))
+        generate_pages_recursive(self.content, self.template, self.docs, "/", manifest)
+        manifest.save()
+
+        with open(os.path.join(self.content, "blog", "post.md"), "w") as f:
+            f.write("# Post, edited\n")
+        manifest = Manifest.load(manifest.path)
+        counters.reset()
+        generate_pages_recursive(self.content, self.template, self.docs, "/", manifest)
+        self.assertEqual(counters.get("pages", "rendered"), 2) # post.md and index.md, which links to it
+        self.assertEqual(counters.get("pages", "dependents"), 1)
+        self.assertEqual(counters.get("pages", "unchanged"), 1)
+
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        manifest.save()
+        manifest = Manifest.load(manifest.path)
+        counters.reset()
+        generate_pages_recursive(self.content, self.template, self.docs, "/", manifest)
+        self.assertEqual(counters.get("pages", "dependents"), 1)
+
+        manifest.save()
+        manifest = Manifest.load(manifest.path)
+        counters.reset()
+        generate_pages_recursive(self.content, self.template, self.docs, "/", manifest, changed_urls=["/blog/post"])
+        self.assertEqual(counters.get("pages", "rendered"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+
+import block_markdown
+from page import parse_page
+from parse_cache import ParseCache
+
+
+class TestParseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = ParseCache(os.path.join(self.tmp.name, "cache"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        page = parse_page("# Title\n\nSome **bold** [link](/a)")
+        key = self.cache.key("source", "/")
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, page)
+        cached = self.cache.get(key)
+        self.assertEqual(cached.title, "Title")
+        self.assertEqual(cached.links, [("/a", 3)])
+        self.assertEqual(cached.node.to_html(), page.node.to_html())
+
+    def test_key_depends_on_source_and_basepath(self):
+        key = self.cache.key("# Title", "/")
+        self.assertEqual(key, self.cache.key("# Title", "/"))
+        self.assertNotEqual(key, self.cache.key("# Title!", "/"))
+        self.assertNotEqual(key, self.cache.key("# Title", "/site/"))
+
+    def test_key_depends_on_registered_syntax(self):
+        key = self.cache.key("# Title", "/")
+        block_markdown.CUSTOM_BLOCK_TYPES.append("table")
+        self.addCleanup(block_markdown.CUSTOM_BLOCK_TYPES.clear)
+        self.assertNotEqual(key, self.cache.key("# Title", "/"))
+
+    def test_corrupt_entry_is_a_miss(self):
+        key = self.cache.key("source", "/")
+        self.cache.put(key, parse_page("# Title"))
+        with open(self.cache.path_for(key), "wb") as f:
+            f.write(b"not a pickle")
+        self.assertIsNone(self.cache.get(key))
+
+    def test_evicts_least_recently_used(self):
+        keys = [self.cache.key(str(i), "/") for i in range(3)]
+        for i, key in enumerate(keys):
+            self.cache.put(key, parse_page(f'# Page {i}'))
+            os.utime(self.cache.path_for(key), ns=(i * 10**9, i * 10**9))
+        self.cache.get(keys[0]) # a hit makes the oldest entry the most recent
+        size = os.path.getsize(self.cache.path_for(keys[1]))
+        self.cache.max_bytes = size * 2
+        self.assertEqual(self.cache.evict(), 1)
+        self.assertIsNone(self.cache.get(keys[1]))
+        self.assertIsNotNone(self.cache.get(keys[0]))
+        self.assertIsNotNone(self.cache.get(keys[2]))
+
+    def test_clear(self):
+        self.cache.put(self.cache.key("source", "/"), parse_page("# Title"))
+        self.cache.clear()
+        self.assertEqual(self.cache.entries(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
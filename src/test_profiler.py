@@ -0,0 +1,55 @@
+import time
+import types
+import unittest
+
+from profiler import BuildProfiler, percentile
+
+
+class TestPercentile(unittest.TestCase):
+    def test_nearest_rank(self):
+        values = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
+        self.assertEqual(percentile(values, 0.5), 5)
+        self.assertEqual(percentile(values, 0.95), 10)
+        self.assertEqual(percentile([], 0.5), 0.0)
+
+
+class TestBuildProfiler(unittest.TestCase):
+    def test_nested_phases_are_exclusive(self):
+        build_profiler = BuildProfiler()
+        with build_profiler.page("a.md"):
+            with build_profiler.phase("outer"):
+                time.sleep(0.01)
+                with build_profiler.phase("inner"):
+                    time.sleep(0.1)
+        phases = build_profiler.pages["a.md"]
+        self.assertGreaterEqual(phases["inner"], 0.1)
+        self.assertLess(phases["outer"], 0.1) # inclusive timing would be at least 0.11
+
+    def test_build_phases_outside_pages(self):
+        build_profiler = BuildProfiler()
+        with build_profiler.phase("copy_static"):
+            pass
+        self.assertIn("copy_static", build_profiler.build_phases)
+        self.assertEqual(build_profiler.pages, {})
+
+    def test_instrument_and_restore(self):
+        module = types.SimpleNamespace(work=lambda x: x * 2)
+        original = module.work
+        build_profiler = BuildProfiler()
+        build_profiler.instrument(module, "work")
+        with build_profiler.page("a.md"):
+            self.assertEqual(module.work(2), 4)
+        self.assertIn("work", build_profiler.pages["a.md"])
+        build_profiler.uninstrument()
+        self.assertIs(module.work, original)
+
+    def test_report_lists_slowest_pages(self):
+        build_profiler = BuildProfiler()
+        build_profiler.pages = {"fast.md": {"to_html": 0.001}, "slow.md": {"to_html": 0.5}}
+        report = build_profiler.report(top=1)
+        self.assertIn("Slowest 1 pages:", report)
+        self.assertTrue(report[-1].endswith("slow.md"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import os
+import unittest
+
+from manifest import Manifest
+from sections import first_heading, generate_section_pages, plan_sections, read_entry, section_of
+from test_helpers import TempDirTestCase
+
+
+class TestReadEntry(TempDirTestCase):
+    def test_frontmatter(self):
+        src = self.write("content/blog/a.md", "---\ntitle: Hello\ndate: 2024-05-01\nsummary: First\n---\n# Ignored\n")
+        entry = read_entry(src, "docs/blog/a.html", "docs")
+        self.assertEqual((entry.url, entry.title, entry.date, entry.summary), ("/blog/a.html", "Hello", "2024-05-01", "First"))
+
+    def test_heading_without_frontmatter(self):
+        src = self.write("content/blog/tom/index.md", "# Tom **Bombadil**\n\ntext\n")
+        entry = read_entry(src, "docs/blog/tom/index.html", "docs")
+        self.assertEqual((entry.url, entry.title, entry.date), ("/blog/tom/", "Tom Bombadil", None))
+
+    def test_first_heading_skips_code(self):
+        self.assertEqual(first_heading(["```\n", "# not a title\n", "```\n", "\n", "# Title\n"]), "Title")
+        self.assertIsNone(first_heading(["text\n", "# continues the paragraph\n"]))
+
+    def test_section_of(self):
+        self.assertEqual(section_of("content/blog/tom/index.md", "content"), "content/blog")
+        self.assertEqual(section_of("content/blog/post.md", "content"), "content/blog")
+        self.assertIsNone(section_of("content/index.md", "content"))
+
+
+class TestSections(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        with open("template.html", "w") as f:
+            f.write("<title>{{ Title }}</title><body>{{ Content }}</body>")
+        os.makedirs("content/blog")
+        for day in range(1, 6):
+            self.post(day, f'Post {day}')
+        with open("content/index.md", "w") as f:
+            f.write("# Home\n")
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+
+    def post(self, day, title):
+        with open(f'content/blog/p{day}.md', "w") as f:
+            f.write(f'---\ndate: 2024-01-0{day}\n---\n# {title}\n')
+
+    def pages(self):
+        return [
+            ("content/index.md", "docs/index.html"),
+            *((f'content/blog/p{day}.md', f'docs/blog/p{day}.html') for day in range(1, 6)),
+        ]
+
+    def build(self, page_size=2):
+        manifest = Manifest.load("manifest.json")
+        section_pages = plan_sections(self.pages(), "content", "docs", page_size)
+        mtimes = {}
+        generate_section_pages(section_pages, "template.html", "/site/", manifest)
+        for section_page in section_pages:
+            mtimes[section_page.dest] = os.stat(section_page.dest).st_mtime_ns
+        manifest.prune()
+        manifest.save()
+        return section_pages, mtimes
+
+    def test_plan(self):
+        section_pages = plan_sections(self.pages(), "content", "docs", 2)
+        self.assertEqual([page.dest for page in section_pages], ["docs/blog/index.html", "docs/blog/page/2/index.html", "docs/blog/page/3/index.html"])
+        self.assertEqual([[entry.title for entry in page.entries] for page in section_pages], [["Post 5", "Post 4"], ["Post 3", "Post 2"], ["Post 1"]])
+        self.assertEqual((section_pages[0].title, section_pages[1].title), ("Blog", "Blog (page 2)"))
+        self.assertEqual((section_pages[1].previous_url, section_pages[1].next_url), ("/blog/", "/blog/page/3/"))
+        self.assertIsNone(section_pages[0].previous_url)
+
+    def test_invalid_frontmatter_is_not_listed(self):
+        with open("content/blog/p3.md", "w") as f:
+            f.write("---\nnot frontmatter\n---\n# Bad\n")
+        with self.assertLogs("ssg", "WARNING") as logs:
+            section_pages = plan_sections(self.pages(), "content", "docs", 10)
+        self.assertEqual([entry.title for entry in section_pages[0].entries], ["Post 5", "Post 4", "Post 2", "Post 1"])
+        self.assertIn("content/blog/p3.md", logs.output[0])
+
+    def test_directory_with_index_is_not_listed(self):
+        pages = self.pages() + [("content/blog/index.md", "docs/blog/index.html")]
+        self.assertEqual(plan_sections(pages, "content", "docs"), [])
+
+    def test_render(self):
+        self.build()
+        with open("docs/blog/page/2/index.html") as f:
+            html = f.read()
+        self.assertIn("<title>Blog (page 2)</title>", html)
+        self.assertIn('<li><a href="/site/blog/p3.html">Post 3</a> <time datetime="2024-01-03">2024-01-03</time></li>', html)
+        self.assertIn('<a href="/site/blog/" rel="prev">Newer</a> <a href="/site/blog/page/3/" rel="next">Older</a>', html)
+
+    def test_only_affected_pages_regenerate(self):
+        _, before = self.build()
+        self.post(2, "Post two")
+        _, after = self.build()
+        changed = sorted(dest for dest in before if before[dest] != after[dest])
+        self.assertEqual(changed, ["docs/blog/page/2/index.html"])
+
+        # Fewer posts: the listing page that no longer exists is removed
+        os.remove("content/blog/p1.md")
+        os.remove("content/blog/p2.md")
+        self.pages = lambda: [(f'content/blog/p{day}.md', f'docs/blog/p{day}.html') for day in range(3, 6)]
+        self.build()
+        self.assertFalse(os.path.exists("docs/blog/page/3/index.html"))
+        self.assertTrue(os.path.exists("docs/blog/page/2/index.html"))
+
+    def test_listing_and_index_page_replace_each_other(self):
+        # Writes what main.build does for content/blog: an index.md page when there is one, else the listing
+        def build():
+            manifest = Manifest.load("manifest.json")
+            pages = self.pages()
+            if os.path.exists("content/blog/index.md"):
+                pages.append(("content/blog/index.md", "docs/blog/index.html"))
+                with open("docs/blog/index.html", "w") as f:
+                    f.write("index page")
+                manifest.record("pages", "content/blog/index.md", {"source": "index"}, "docs/blog/index.html")
+            generate_section_pages(plan_sections(pages, "content", "docs", 10), "template.html", "/", manifest)
+            manifest.prune()
+            manifest.save()
+
+        build()
+        with open("content/blog/index.md", "w") as f:
+            f.write("# Blog\n")
+        build()
+        with open("docs/blog/index.html") as f:
+            self.assertEqual(f.read(), "index page")
+
+        os.remove("content/blog/index.md")
+        build()
+        with open("docs/blog/index.html") as f:
+            self.assertIn("<title>Blog</title>", f.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+import json
+import os
+import tempfile
+import unittest
+
+from page import parse_page
+from sections import plan_sections
+from site_files import PageRecord, RecordStore, SearchIndexWriter, SiteFiles, SitemapWriter, output_url
+from test_helpers import TempDirTestCase
+
+
+class TestSitemapWriter(TempDirTestCase):
+    def read(self, name):
+        with open(os.path.join(self.tmp.name, name)) as f:
+            return f.read()
+
+    def test_single_file(self):
+        sitemap = SitemapWriter(self.tmp.name, "https://example.com/site")
+        sitemap.add("/", "2024-01-02")
+        sitemap.add("/blog/a&b/")
+        self.assertEqual(sitemap.close(), ["sitemap.xml"])
+        text = self.read("sitemap.xml")
+        self.assertIn("<url><loc>https://example.com/site/</loc><lastmod>2024-01-02</lastmod></url>", text)
+        self.assertIn("<loc>https://example.com/site/blog/a&amp;b/</loc>", text)
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, "sitemap-1.xml")))
+
+    def test_split_with_index(self):
+        sitemap = SitemapWriter(self.tmp.name, "https://example.com", max_urls=2)
+        for i in range(5):
+            sitemap.add(f'/p{i}/')
+        self.assertEqual(sitemap.close(), ["sitemap.xml", "sitemap-1.xml", "sitemap-2.xml", "sitemap-3.xml"])
+        self.assertIn("<sitemapindex", self.read("sitemap.xml"))
+        self.assertIn("<loc>https://example.com/sitemap-3.xml</loc>", self.read("sitemap.xml"))
+        self.assertEqual(self.read("sitemap-3.xml").count("<url>"), 1)
+
+        # A later, smaller site leaves no stale parts behind
+        sitemap = SitemapWriter(self.tmp.name, "https://example.com", max_urls=2)
+        sitemap.add("/")
+        sitemap.close()
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ["sitemap.xml"])
+
+
+class TestSearchIndexWriter(unittest.TestCase):
+    def test_sharded_postings(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            directory = os.path.join(tmp, "search")
+            index = SearchIndexWriter(directory, flush_postings=2) # spills after every page
+            index.add("/a/", "A", {"tolkien": 2, "hobbit": 1, "1954": 1})
+            index.add("/b/", "B", {"tolkien": 1})
+            index.close()
+            with open(os.path.join(directory, "index.json")) as f:
+                self.assertEqual(json.load(f), {"version": 1, "documents": [["/a/", "A"], ["/b/", "B"]], "shards": ["1", "h", "t"]})
+            with open(os.path.join(directory, "t.json")) as f:
+                self.assertEqual(json.load(f), {"tolkien": [0, 2, 1, 1]})
+            self.assertEqual(sorted(os.listdir(directory)), ["1.json", "h.json", "index.json", "t.json"])
+
+
+class TestSiteFiles(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.docs = os.path.join(self.tmp.name, "docs")
+        os.makedirs(os.path.join(self.content, "blog"))
+        os.makedirs(self.docs)
+        self.write("index.md", "# Home\n\nWelcome home")
+        self.write(os.path.join("blog", "old.md"), "---\ndate: 2023-05-01\nsummary: The old one\n---\n# Old post\n\nHobbits")
+        self.write(os.path.join("blog", "new.md"), "---\ndate: 2024-02-03\n---\n# New post\n\nHobbits & elves")
+        self.write(os.path.join("blog", "undated.md"), "# Undated\n\ntext")
+        self.pages = [
+            (os.path.join(self.content, "blog", "new.md"), os.path.join(self.docs, "blog", "new.html")),
+            (os.path.join(self.content, "blog", "old.md"), os.path.join(self.docs, "blog", "old.html")),
+            (os.path.join(self.content, "blog", "undated.md"), os.path.join(self.docs, "blog", "undated.html")),
+            (os.path.join(self.content, "index.md"), os.path.join(self.docs, "index.html")),
+        ]
+        self.store = RecordStore(os.path.join(self.tmp.name, "records"))
+
+    def write(self, name, text):
+        return super().write(os.path.join(self.content, name), text)
+
+    def test_output_url(self):
+        self.assertEqual(output_url(os.path.join("docs", "index.html"), "docs"), "/")
+        self.assertEqual(output_url(os.path.join("docs", "blog", "tom", "index.html"), "docs"), "/blog/tom/")
+        self.assertEqual(output_url(os.path.join("docs", "about.html"), "docs"), "/about.html")
+
+    def test_sitemap_feed_and_search(self):
+        site_files = SiteFiles(self.content, self.docs, store=self.store, search=True)
+        site_files.write(self.pages, "https://example.com/", "/site/")
+        with open(os.path.join(self.docs, "feed.xml")) as f:
+            feed = f.read()
+        self.assertIn("<title>Home</title>", feed)
+        titles = [part.split("</title>")[0] for part in feed.split("<item><title>")[1:]]
+        self.assertEqual(titles, ["New post", "Old post", "Undated"])
+        self.assertIn("<link>https://example.com/site/blog/new.html</link><guid>https://example.com/site/blog/new.html</guid><pubDate>Sat, 03 Feb 2024 00:00:00 +0000</pubDate>", feed)
+        self.assertIn("<description>The old one</description>", feed)
+        with open(os.path.join(self.docs, "sitemap.xml")) as f:
+            self.assertIn("<loc>https://example.com/site/blog/old.html</loc><lastmod>2023-05-01</lastmod>", f.read())
+        with open(os.path.join(self.docs, "search", "h.json")) as f:
+            self.assertEqual(json.load(f)["hobbits"], [0, 1, 1, 1])
+
+    def test_section_listings(self):
+        listings = plan_sections(self.pages, self.content, self.docs, 2)
+        site_files = SiteFiles(self.content, self.docs, store=self.store, search=True)
+        site_files.write(self.pages, "https://example.com/", "/site/", listings)
+        with open(os.path.join(self.docs, "sitemap.xml")) as f:
+            sitemap = f.read()
+        self.assertIn("<loc>https://example.com/site/blog/</loc><lastmod>2024-02-03</lastmod>", sitemap)
+        self.assertIn("<url><loc>https://example.com/site/blog/page/2/</loc></url>", sitemap) # only the undated page
+        with open(os.path.join(self.docs, "search", "index.json")) as f:
+            documents = json.load(f)["documents"]
+        self.assertEqual(documents[-2:], [["/site/blog/", "Blog"], ["/site/blog/page/2/", "Blog (page 2)"]])
+        with open(os.path.join(self.docs, "search", "o.json")) as f:
+            self.assertEqual(json.load(f)["old"], [1, 1, 4, 2]) # old.md, and its title and summary on the listing
+
+    def test_rendered_pages_hand_over_records(self):
+        site_files = SiteFiles(self.content, self.docs, store=self.store, search=True)
+        src, dest = self.pages[0]
+        with open(src) as f:
+            site_files.record_page(src, dest, parse_page(f.read()).summary(words=True))
+        self.assertEqual(self.store.get(src).title, "New post")
+        self.assertEqual(self.store.get(src).terms, {"new": 1, "post": 1, "hobbits": 1, "elves": 1})
+
+        # Other pages are parsed once, then reused until their source changes
+        self.assertEqual(site_files.record_for(*self.pages[1]).title, "Old post")
+        self.store.put(self.pages[1][0], PageRecord(site_files.source_hash(self.pages[1][0]), "/blog/old.html", "Stored", terms={}))
+        self.assertEqual(site_files.record_for(*self.pages[1]).title, "Stored")
+        # A record made while the search index was off has no terms and is made again
+        self.store.put(self.pages[1][0], PageRecord(site_files.source_hash(self.pages[1][0]), "/blog/old.html", "Stored"))
+        self.assertEqual(site_files.record_for(*self.pages[1]).title, "Old post")
+        self.write(os.path.join("blog", "old.md"), "# Edited")
+        self.assertEqual(site_files.record_for(*self.pages[1]).title, "Edited")
+
+    def test_records_of_removed_pages_pruned(self):
+        site_files = SiteFiles(self.content, self.docs, store=self.store, search=True)
+        site_files.write(self.pages)
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "sitemap.xml")))
+        site_files.write(self.pages[1:])
+        self.assertIsNone(self.store.get(self.pages[0][0]))
+        self.assertIsNotNone(self.store.get(self.pages[1][0]))
+
+
+if __name__ == "__main__":
+    unittest.main()
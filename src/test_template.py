@@ -0,0 +1,69 @@
+import io
+import os
+import tempfile
+import unittest
+
+from htmlnode import LeafNode, ParentNode
+from template import Template, load_template, template_path_for
+
+
+class TestTemplate(unittest.TestCase):
+    def test_render(self):
+        template = Template("<title>{{ Title }}</title><article>{{ Content }}</article>")
+        self.assertEqual(
+            template.render(Title="Hello", Content="<p>Body</p>"),
+            "<title>Hello</title><article><p>Body</p></article>",
+        )
+
+    def test_basepath_applied_to_template_only(self):
+        template = Template('<link href="/index.css" /><img src="/logo.png" />{{ Content }}', "/site/")
+        self.assertEqual(
+            template.render(Content='<a href="/blog">x</a>'),
+            '<link href="/site/index.css" /><img src="/site/logo.png" /><a href="/blog">x</a>',
+        )
+
+    def test_asset_rewrites_applied_at_compile_time(self):
+        template = Template('<link href="/index.css?v=1" /><a href="//cdn.example.com/x.js">{{ Content }}</a>', "/site/", {"/index.css": "/index.abc.css"})
+        self.assertEqual(template.segments[0], '<link href="/site/index.abc.css?v=1" /><a href="//cdn.example.com/x.js">')
+        self.assertEqual(template.asset_urls, {"/index.css"})
+
+    def test_unknown_placeholder_left_in_place(self):
+        template = Template("{{ Title }} {{ Author }}")
+        self.assertEqual(template.render(Title="Hello"), "Hello {{ Author }}")
+
+    def test_repeated_placeholder(self):
+        template = Template("{{ Title }}|{{ Title }}")
+        self.assertEqual(template.render(Title="x"), "x|x")
+
+    def test_write_streams_nodes(self):
+        template = Template("<title>{{ Title }}</title><article>{{ Content }}</article>")
+        node = ParentNode("div", [LeafNode("p", "Body")])
+        buf = io.StringIO()
+        template.write(buf, Title="Hello", Content=node)
+        self.assertEqual(buf.getvalue(), template.render(Title="Hello", Content=node.to_html()))
+
+
+class TestTemplatePath(unittest.TestCase):
+    def test_template_path_for(self):
+        self.assertEqual(template_path_for("./template.html", None), "./template.html")
+        self.assertEqual(template_path_for("./template.html", "blog"), os.path.join(".", "templates", "blog.html"))
+
+
+class TestLoadTemplate(unittest.TestCase):
+    def test_reloads_when_mtime_changes(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "template.html")
+            with open(path, "w") as f:
+                f.write("one {{ Content }}")
+            first = load_template(path)
+            self.assertIs(load_template(path), first)
+
+            with open(path, "w") as f:
+                f.write("two {{ Content }}")
+            stat = os.stat(path)
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            self.assertEqual(load_template(path).render(Content="x"), "two x")
+
+
+if __name__ == "__main__":
+    unittest.main()
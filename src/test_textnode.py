@@ -1,6 +1,6 @@
 import unittest
 
-from textnode import TextNode, TextType, text_node_to_html_node
+from textnode import TextNode, TextType, basepath_resolver, text_node_to_html_node
 
 
 class TestTextNode(unittest.TestCase):
@@ -30,6 +30,12 @@ class TestTextNode(unittest.TestCase):
         self.assertEqual(node, node2)
 
 
+    def test_slots(self):
+        node = TextNode("This is a text node", TextType.TEXT)
+        self.assertFalse(hasattr(node, "__dict__"))
+        self.assertEqual(repr(node), "TextNode(This is a text node, TextType.TEXT, None)")
+
+
 class TestTextNodeToHtmlNode(unittest.TestCase):
     def test_text(self):
         node = TextNode("This is a text node", TextType.TEXT)
@@ -69,6 +75,33 @@ class TestTextNodeToHtmlNode(unittest.TestCase):
         self.assertEqual(html_node.value, "This is an image")
         self.assertEqual(html_node.props, {"src": "https://www.test.com/image.png"})
 
+    def test_link_with_resolver(self):
+        node = TextNode("This is a link", TextType.LINK, "/blog/tom")
+        html_node = text_node_to_html_node(node, basepath_resolver("/site/"))
+        self.assertEqual(html_node.props, {"href": "/site/blog/tom"})
+
+    def test_image_with_resolver(self):
+        node = TextNode("This is an image", TextType.IMAGE, "/images/tom.png")
+        html_node = text_node_to_html_node(node, basepath_resolver("/site/"))
+        self.assertEqual(html_node.props, {"src": "/site/images/tom.png"})
+
+
+class TestBasepathResolver(unittest.TestCase):
+    def test_resolver_rewrites_keep_query_and_fragment(self):
+        resolve_url = basepath_resolver("/", {"/index.css": "/index.abc.css"})
+        self.assertEqual(resolve_url("/index.css?v=2#top"), "/index.abc.css?v=2#top")
+        self.assertEqual(resolve_url("/other.css"), "/other.css")
+
+    def test_root_basepath_needs_no_resolver(self):
+        self.assertIsNone(basepath_resolver("/"))
+
+    def test_only_root_relative_urls_rewritten(self):
+        resolve_url = basepath_resolver("/site/")
+        self.assertEqual(resolve_url("/index.css"), "/site/index.css")
+        self.assertEqual(resolve_url("https://www.test.com/a"), "https://www.test.com/a")
+        self.assertEqual(resolve_url("//cdn.test.com/a.png"), "//cdn.test.com/a.png")
+        self.assertEqual(resolve_url("relative/page"), "relative/page")
+
 
 
 if __name__ == "__main__":
@@ -10,6 +10,8 @@ class TextType(Enum):
     IMAGE = "image" # ![alt text](url)
 
 class TextNode:
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type, url=None):
         self.text = text # Text content
         self.text_type = text_type # TextType enum
@@ -22,22 +24,58 @@ class TextNode:
         return f'TextNode({self.text}, {self.text_type}, {self.url})'
 
 
-def text_node_to_html_node(text_node):
-    if text_node.text_type == TextType.TEXT:
-        return LeafNode(None, text_node.text)
-    elif text_node.text_type == TextType.BOLD:
-        return LeafNode("b", text_node.text)
-    elif text_node.text_type == TextType.ITALIC:
-        return LeafNode("i", text_node.text)
-    elif text_node.text_type == TextType.CODE:
-        return LeafNode("code", text_node.text)
-    elif text_node.text_type == TextType.LINK:
-        if not text_node.url:
-            raise ValueError("Link text nodes must have a URL")
-        return LeafNode("a", text_node.text, {"href": text_node.url})
-    elif text_node.text_type == TextType.IMAGE:
-        if not text_node.url:
-            raise ValueError("Image text nodes must have a URL")
-        return LeafNode("img", text_node.text, {"src": text_node.url})
-    else:
-        raise ValueError("Unknown TextType")
\ No newline at end of file
+def basepath_resolver(basepath, rewrites=None):
+    # rewrites maps site URLs to the URLs to emit instead (fingerprinted assets); it is applied before the basepath
+    if basepath == "/" and not rewrites:
+        return None
+    def resolve_url(url):
+        # Only root-relative URLs are rewritten; absolute and protocol-relative ones are left alone
+        if url.startswith("/") and not url.startswith("//"):
+            if rewrites:
+                end = len(url)
+                for separator in "?#":
+                    position = url.find(separator)
+                    if position != -1 and position < end:
+                        end = position
+                url = rewrites.get(url[:end], url[:end]) + url[end:]
+            return basepath + url[1:]
+        return url
+    return resolve_url
+
+
+def leaf_handler(tag):
+    def to_html_node(text_node, resolve_url):
+        return LeafNode(tag, text_node.text)
+    return to_html_node
+
+
+def link_to_html_node(text_node, resolve_url):
+    if not text_node.url:
+        raise ValueError("Link text nodes must have a URL")
+    url = resolve_url(text_node.url) if resolve_url else text_node.url
+    return LeafNode("a", text_node.text, {"href": url})
+
+
+def image_to_html_node(text_node, resolve_url):
+    if not text_node.url:
+        raise ValueError("Image text nodes must have a URL")
+    url = resolve_url(text_node.url) if resolve_url else text_node.url
+    return LeafNode("img", text_node.text, {"src": url})
+
+
+# text type -> handler(text_node, resolve_url) returning its LeafNode; one dict lookup per node
+INLINE_HANDLERS = {
+    TextType.TEXT: leaf_handler(None),
+    TextType.BOLD: leaf_handler("b"),
+    TextType.ITALIC: leaf_handler("i"),
+    TextType.CODE: leaf_handler("code"),
+    TextType.LINK: link_to_html_node,
+    TextType.IMAGE: image_to_html_node,
+}
+
+
+def text_node_to_html_node(text_node, resolve_url=None):
+    handler = INLINE_HANDLERS.get(text_node.text_type)
+    if handler is None:
+        raise ValueError("Unknown TextType")
+    return handler(text_node, resolve_url)